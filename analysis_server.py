@@ -0,0 +1,454 @@
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+import math
+import multiprocessing
+import time
+
+from game_state import GameState
+from move_selection import multipv_search
+from notation import move_to_san, move_to_uci, uci_to_move
+from result_cache import ResultCache, cached_search, search
+from search_limits import SearchLimits
+from search_stats import SearchStats
+from transposition_table import DEFAULT_TT_SIZE, TranspositionTable
+
+logger = logging.getLogger(__name__)
+
+# Protocol: one JSON object per line in each direction.
+#   {"type": "analyze", "id": ..., "fen": ..., "depth": 4, "movetime": 1.5,
+#    "multipv": 1}
+#   {"type": "cancel", "id": ...}
+#   {"type": "metrics"}
+# An analysis response gives the best line ("bestmove", "san", "score", "pv")
+# and all of them, best first, in "lines".
+# Every response has a "status" of "ok", "cancelled" or "error" and echoes
+# the "id" of its request.
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 10
+# Latencies of the last requests kept for the percentiles
+LATENCY_WINDOW = 1000
+
+
+class RequestError(Exception):
+    pass
+
+
+# ===============================================================
+# WORKER PROCESSES
+# ===============================================================
+
+# Transposition table of the worker process, kept warm across requests
+_worker_tt: TranspositionTable | None = None
+# Shared stop flags, one per server worker slot
+_stop_flags = None
+_worker_cache: ResultCache | None = None
+
+
+class SlotStopFlag:
+    """Stop flag of a search, read from the shared array of the server"""
+
+    def __init__(self, flags, slot: int):
+        self.flags = flags
+        self.slot = slot
+
+    def is_set(self) -> bool:
+        return bool(self.flags[self.slot])
+
+
+def init_worker(
+    tt_size: int, stop_flags=None, cache_path: str | None = None
+) -> None:
+    global _worker_tt, _stop_flags, _worker_cache
+    _worker_tt = TranspositionTable(tt_size)
+    _stop_flags = stop_flags
+    _worker_cache = ResultCache(cache_path) if cache_path is not None else None
+
+
+def analyze_position(
+    fen: str,
+    depth: int,
+    movetime: float | None,
+    slot: int | None = None,
+    multipv: int = 1,
+) -> dict:
+    """
+    Search `fen` in a worker process, the result as a response dict.
+
+    The search stops early, with the last completed depth, when the stop
+    flag of `slot` is set. With a result cache, fixed depth requests are
+    served from it when possible and every result is stored in it. Only
+    single line results are cached.
+    """
+    tt = _worker_tt if _worker_tt is not None else TranspositionTable()
+    game_state = GameState.from_fen(fen)
+    if game_state.checkmate or game_state.draw:
+        raise RequestError("No legal move to analyze")
+
+    limits = None
+    if slot is not None and _stop_flags is not None:
+        limits = SearchLimits(stop=SlotStopFlag(_stop_flags, slot))
+    start = time.perf_counter()
+    cached = False
+    if multipv > 1:
+        stats = SearchStats()
+        pv_lines = multipv_search(
+            game_state, depth, multipv, stats, tt, movetime, limits
+        )
+        lines = [
+            line_response(
+                game_state,
+                move_to_uci(line.move),
+                line.score,
+                [move_to_uci(move) for move in line.pv],
+            )
+            for line in pv_lines
+        ]
+        completed_depth = len(stats.nodes_per_depth) - 1
+        nodes = stats.total_nodes
+    else:
+        if _worker_cache is not None and movetime is None:
+            result, cached = cached_search(_worker_cache, game_state, depth, tt, limits)
+        else:
+            result = search(game_state, depth, tt, movetime, limits)
+            if _worker_cache is not None:
+                _worker_cache.put(game_state, result)
+        lines = [line_response(game_state, result.best_move, result.score, result.pv)]
+        completed_depth = result.depth
+        nodes = result.nodes
+    return {
+        **lines[0],
+        "lines": lines,
+        "depth": completed_depth,
+        "nodes": nodes,
+        "time": time.perf_counter() - start,
+        "cached": cached,
+    }
+
+
+def line_response(
+    game_state: GameState, best_move: str, score: float, pv: list[str]
+) -> dict:
+    return {
+        "bestmove": best_move,
+        "san": move_to_san(game_state, uci_to_move(game_state, best_move)),
+        "score": score,
+        "pv": pv,
+    }
+
+
+# ===============================================================
+# SERVER
+# ===============================================================
+
+
+@dataclass
+class Job:
+    connection: "Connection"
+    request_id: object
+    fen: str
+    depth: int
+    movetime: float | None
+    multipv: int = 1
+    received: float = field(default_factory=time.perf_counter)
+    cancelled: bool = False
+    # Worker slot searching the job, None while queued or once answered
+    slot: int | None = None
+
+
+class Connection:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.jobs: dict[object, Job] = {}
+        self._lock = asyncio.Lock()
+
+    async def send(self, response: dict) -> None:
+        if self.writer.is_closing():
+            return
+        async with self._lock:
+            self.writer.write(json.dumps(response).encode() + b"\n")
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile, 0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+@dataclass
+class Metrics:
+    completed: int = 0
+    cancelled: int = 0
+    failed: int = 0
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_WINDOW)
+    )
+
+    def to_dict(self) -> dict:
+        latencies = list(self.latencies)
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p99": percentile(latencies, 99),
+        }
+
+
+class AnalysisServer:
+    """
+    Long-running analysis service over TCP or a Unix socket.
+
+    Requests wait in a bounded queue: once it is full, the server stops
+    reading from the connection that submits, which pushes back on the
+    client through the socket. `workers` tasks each feed one search at a
+    time to a pool of as many processes, whose transposition tables stay
+    warm between requests. The pool starts its processes from a fork server,
+    so they never inherit the sockets of client connections. With
+    `cache_path`, the workers share a `ResultCache` across restarts.
+
+    A `movetime` is a hard limit of the search. A queued request that is
+    cancelled is never searched. A running one is answered as cancelled at
+    once and the stop flag of its worker slot, shared with the processes,
+    ends its search within a few hundred nodes.
+
+    Requests with `multipv` above 1 run a multi-PV search and bypass the
+    result cache.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        tt_size: int = DEFAULT_TT_SIZE,
+        cache_path: str | None = None,
+    ):
+        self.workers = workers
+        self.tt_size = tt_size
+        self.cache_path = cache_path
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(queue_size)
+        self.metrics = Metrics()
+        self.running = 0
+        self._pool: ProcessPoolExecutor | None = None
+        self._stop_flags = None
+        self._tasks: list[asyncio.Task] = []
+        self._server: asyncio.Server | None = None
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        path: str | None = None,
+    ) -> asyncio.Server:
+        """Listen on the Unix socket `path` if given, else on (host, port)"""
+        context = multiprocessing.get_context("forkserver")
+        self._stop_flags = context.RawArray("b", self.workers)
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(self.tt_size, self._stop_flags, self.cache_path),
+        )
+        self._tasks = [
+            asyncio.create_task(self._worker(slot)) for slot in range(self.workers)
+        ]
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def metrics_response(self) -> dict:
+        return {
+            "status": "ok",
+            "queue_depth": self.queue.qsize(),
+            "running": self.running,
+            "workers": self.workers,
+            **self.metrics.to_dict(),
+        }
+
+    # ------ Connections ------ #
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = Connection(writer)
+        try:
+            while line := await reader.readline():
+                await self._dispatch(connection, line)
+        except ConnectionError:
+            pass
+        finally:
+            for job in connection.jobs.values():
+                self._stop(job)
+            connection.jobs.clear()
+            writer.close()
+
+    async def _dispatch(self, connection: Connection, line: bytes) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object")
+            request_id = request.get("id")
+            # Ids key the pending jobs of the connection
+            if request_id is not None and not isinstance(request_id, (str, int)):
+                raise RequestError("id must be a string, an integer or null")
+            kind = request.get("type", "analyze")
+            if kind == "metrics":
+                await connection.send({"id": request_id, **self.metrics_response()})
+            elif kind == "cancel":
+                await self._cancel(connection, request_id)
+            elif kind == "analyze":
+                await self._submit(connection, request)
+            else:
+                raise RequestError(f"Unknown request type {kind!r}")
+        except (RequestError, ValueError) as e:
+            await connection.send(
+                {"id": request_id, "status": "error", "error": str(e)}
+            )
+
+    async def _submit(self, connection: Connection, request: dict) -> None:
+        request_id = request.get("id")
+        if request_id in connection.jobs:
+            raise RequestError(f"Request {request_id!r} is already pending")
+        fen = request.get("fen")
+        if not isinstance(fen, str):
+            raise RequestError("Missing FEN")
+        movetime = request.get("movetime")
+        if movetime is not None and (
+            not isinstance(movetime, (int, float)) or movetime <= 0
+        ):
+            raise RequestError("movetime must be a positive number of seconds")
+        depth = request.get("depth")
+        if depth is None:
+            depth = MAX_DEPTH if movetime is not None else DEFAULT_DEPTH
+        if not isinstance(depth, int) or not 1 <= depth <= MAX_DEPTH:
+            raise RequestError(f"depth must be an integer from 1 to {MAX_DEPTH}")
+        multipv = request.get("multipv", 1)
+        if not isinstance(multipv, int) or multipv < 1:
+            raise RequestError("multipv must be a positive integer")
+
+        job = Job(connection, request_id, fen, depth, movetime, multipv)
+        connection.jobs[request_id] = job
+        await self.queue.put(job)
+
+    async def _cancel(self, connection: Connection, request_id: object) -> None:
+        job = connection.jobs.pop(request_id, None)
+        if job is None:
+            raise RequestError(f"No pending request {request_id!r}")
+        self._stop(job)
+        self.metrics.cancelled += 1
+        await connection.send({"id": request_id, "status": "cancelled"})
+
+    def _stop(self, job: Job) -> None:
+        """Drop `job`, stopping its search if it is running"""
+        job.cancelled = True
+        if job.slot is not None and self._stop_flags is not None:
+            self._stop_flags[job.slot] = 1
+
+    # ------ Workers ------ #
+
+    async def _worker(self, slot: int) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.cancelled:
+                    continue
+                self.running += 1
+                assert self._stop_flags is not None
+                self._stop_flags[slot] = 0
+                job.slot = slot
+                try:
+                    result = await loop.run_in_executor(
+                        self._pool,
+                        analyze_position,
+                        job.fen,
+                        job.depth,
+                        job.movetime,
+                        slot,
+                        job.multipv,
+                    )
+                    response = {"id": job.request_id, "status": "ok", **result}
+                except Exception as e:
+                    response = {
+                        "id": job.request_id,
+                        "status": "error",
+                        "error": str(e) or type(e).__name__,
+                    }
+                finally:
+                    self.running -= 1
+                    job.slot = None
+                if job.cancelled:
+                    continue
+                job.connection.jobs.pop(job.request_id, None)
+                if response["status"] == "ok":
+                    self.metrics.completed += 1
+                else:
+                    self.metrics.failed += 1
+                self.metrics.latencies.append(time.perf_counter() - job.received)
+                await job.connection.send(response)
+            finally:
+                self.queue.task_done()
+
+
+async def serve(server: AnalysisServer, **listen) -> None:
+    listener = await server.start(**listen)
+    for sock in listener.sockets:
+        logger.info("Analysis server listening on %s", sock.getsockname())
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analysis server speaking JSON lines over TCP or a Unix socket"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--tt-size", type=int, default=DEFAULT_TT_SIZE)
+    parser.add_argument("--cache", metavar="PATH", help="SQLite result cache")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = AnalysisServer(args.workers, args.queue_size, args.tt_size, args.cache)
+    if args.unix:
+        listen = {"path": args.unix}
+    else:
+        listen = {"host": args.host, "port": args.port}
+    try:
+        asyncio.run(serve(server, **listen))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
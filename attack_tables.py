@@ -0,0 +1,108 @@
+from collections.abc import Iterator
+
+from config import BLACK, WHITE
+from table_cache import cached_table
+
+# Bumped whenever a table below changes
+ATTACK_TABLES_VERSION = 1
+
+# Squares are board indexes (a1 = 0, h8 = 63), a set of squares is the int
+# with the bits of those indexes set.
+
+ORTHOGONAL = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+DIAGONAL = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
+KNIGHT_JUMPS = [(1, 2), (-1, 2), (1, -2), (-1, -2), (2, 1), (-2, 1), (2, -1), (-2, -1)]
+
+
+def build_attack_tables() -> dict[str, list]:
+    """
+    - between[a][b]: squares strictly between a and b when they share a
+      rank, file or diagonal, else 0
+    - line[a][b]: the whole rank, file or diagonal through a and b, else 0
+    - orthogonal[s], diagonal[s]: squares a rook or a bishop on s attacks
+      on an empty board
+    - knight[s], king[s]: squares a knight or a king on s attacks
+    - pawn[color][s]: squares a pawn of `color` on s attacks
+    """
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    orthogonal = [0] * 64
+    diagonal = [0] * 64
+    knight = [0] * 64
+    king = [0] * 64
+    # Indexed by color
+    pawn = [[0] * 64, [0] * 64]
+
+    def on_board(file: int, rank: int) -> bool:
+        return 0 <= file < 8 and 0 <= rank < 8
+
+    for square in range(64):
+        file, rank = square % 8, square // 8
+        for directions, rays in ((ORTHOGONAL, orthogonal), (DIAGONAL, diagonal)):
+            for file_delta, rank_delta in directions:
+                # The full line through `square` in this direction
+                full = 1 << square
+                for sign in (1, -1):
+                    f, r = file + sign * file_delta, rank + sign * rank_delta
+                    while on_board(f, r):
+                        full |= 1 << (f + 8 * r)
+                        f, r = f + sign * file_delta, r + sign * rank_delta
+
+                passed = 0
+                f, r = file + file_delta, rank + rank_delta
+                while on_board(f, r):
+                    target = f + 8 * r
+                    rays[square] |= 1 << target
+                    between[square][target] = passed
+                    line[square][target] = full
+                    passed |= 1 << target
+                    f, r = f + file_delta, r + rank_delta
+
+        for file_delta, rank_delta in KNIGHT_JUMPS:
+            if on_board(file + file_delta, rank + rank_delta):
+                knight[square] |= 1 << (square + file_delta + 8 * rank_delta)
+        for file_delta, rank_delta in ORTHOGONAL + DIAGONAL:
+            if on_board(file + file_delta, rank + rank_delta):
+                king[square] |= 1 << (square + file_delta + 8 * rank_delta)
+        for color, rank_delta in ((BLACK, -1), (WHITE, 1)):
+            for file_delta in (1, -1):
+                if on_board(file + file_delta, rank + rank_delta):
+                    pawn[color][square] |= 1 << (square + file_delta + 8 * rank_delta)
+
+    return {
+        "between": between,
+        "line": line,
+        "orthogonal": orthogonal,
+        "diagonal": diagonal,
+        "knight": knight,
+        "king": king,
+        "pawn": pawn,
+    }
+
+
+_tables = cached_table("attacks", ATTACK_TABLES_VERSION, build_attack_tables)
+
+BETWEEN: list[list[int]] = _tables["between"]
+LINE: list[list[int]] = _tables["line"]
+ORTHOGONAL_RAYS: list[int] = _tables["orthogonal"]
+DIAGONAL_RAYS: list[int] = _tables["diagonal"]
+KNIGHT_ATTACKS: list[int] = _tables["knight"]
+KING_ATTACKS: list[int] = _tables["king"]
+PAWN_ATTACKS: list[list[int]] = _tables["pawn"]
+
+del _tables
+
+
+def squares(mask: int) -> Iterator[int]:
+    """Indexes of the squares of `mask`, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def occupancy(idx_list: list[int]) -> int:
+    mask = 0
+    for idx in idx_list:
+        mask |= 1 << idx
+    return mask
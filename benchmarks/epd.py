@@ -0,0 +1,274 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import shlex
+import sys
+import time
+
+from config import Move
+from eval_cache import EvalCache, PawnHashTable
+from game_state import GameState
+from move_selection import iterative_deepening
+from notation import move_to_san, san_to_move
+from search_limits import SearchLimits
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+
+DEFAULT_SUITE = os.path.join(os.path.dirname(__file__), "mates.epd")
+DEFAULT_MAX_DEPTH = 20
+DEFAULT_MOVETIME = 1.0
+
+
+@dataclass
+class EPDEntry:
+    # Board, side to move, castling and en passant fields, with counters
+    fen: str
+    # Opcode -> operands, eg. {"bm": ["Qxf7+"], "id": ["WAC.001"]}
+    operations: dict[str, list[str]] = field(default_factory=dict)
+
+    @property
+    def id(self) -> str:
+        return " ".join(self.operations.get("id", []))
+
+    @property
+    def best_moves(self) -> list[str]:
+        return self.operations.get("bm", [])
+
+    @property
+    def avoid_moves(self) -> list[str]:
+        return self.operations.get("am", [])
+
+
+@dataclass
+class PositionResult:
+    id: str
+    fen: str
+    move: str
+    solved: bool
+    # Seconds and nodes from which the best move stayed a solution
+    time_to_solution: float | None
+    nodes_to_solution: int | None
+    depth: int
+    nodes: int
+    time: float
+
+
+# ===============================================================
+# EPD FILES
+# ===============================================================
+
+
+def parse_epd_line(line: str) -> EPDEntry | None:
+    """
+    `<board> <color> <castling> <en passant> <opcode> <operands>; ...`,
+    None for blank and comment lines.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split(maxsplit=4)
+    if len(fields) < 4:
+        raise ValueError(f"Not an EPD record: {line}")
+    operations: dict[str, list[str]] = {}
+    if len(fields) == 5:
+        for operation in split_operations(fields[4]):
+            opcode, *operands = shlex.split(operation)
+            operations[opcode] = operands
+
+    counters = [
+        operations.get("hmvc", ["0"])[0],
+        operations.get("fmvn", ["1"])[0],
+    ]
+    return EPDEntry(" ".join(fields[:4] + counters), operations)
+
+
+def split_operations(text: str) -> list[str]:
+    """Operations separated by ';', which may also appear inside quotes"""
+    operations: list[str] = []
+    current: list[str] = []
+    quoted = False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        if char == ";" and not quoted:
+            operations.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    operations.append("".join(current).strip())
+    return [operation for operation in operations if operation]
+
+
+def read_epd(path: str) -> list[EPDEntry]:
+    entries: list[EPDEntry] = []
+    with open(path) as f:
+        for line in f:
+            entry = parse_epd_line(line)
+            if entry is not None:
+                entries.append(entry)
+    return entries
+
+
+# ===============================================================
+# SOLVING
+# ===============================================================
+
+
+def solve_position(
+    entry: EPDEntry,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    movetime: float | None = DEFAULT_MOVETIME,
+    nodes: int | None = None,
+) -> PositionResult:
+    """
+    Search `entry` with fresh caches, within `movetime` seconds or `nodes`
+    nodes. It is solved when the move played is one of the `bm` moves and
+    none of the `am` moves.
+    """
+    game_state = GameState.from_fen(entry.fen)
+    game_state.eval_cache = EvalCache()
+    game_state.pawn_table = PawnHashTable()
+    best = [san_to_move(game_state, san) for san in entry.best_moves]
+    avoid = [san_to_move(game_state, san) for san in entry.avoid_moves]
+
+    def is_solution(move: Move) -> bool:
+        return (not best or move in best) and move not in avoid
+
+    stats = SearchStats()
+    # (seconds, nodes, best move) after each completed iteration
+    iterations: list[tuple[float, int, Move]] = []
+    start = time.perf_counter()
+
+    def on_iteration(depth: int, eval: float, move: Move) -> None:
+        iterations.append((time.perf_counter() - start, stats.total_nodes, move))
+
+    limits = SearchLimits(max_nodes=nodes) if nodes is not None else None
+    _, move = iterative_deepening(
+        game_state,
+        max_depth,
+        stats=stats,
+        tt=TranspositionTable(),
+        movetime=movetime,
+        limits=limits,
+        on_iteration=on_iteration,
+    )
+    elapsed = time.perf_counter() - start
+    # A stopped iteration may still have changed the move
+    iterations.append((elapsed, stats.total_nodes, move))
+
+    solved = is_solution(move)
+    time_to_solution = nodes_to_solution = None
+    if solved:
+        first = len(iterations) - 1
+        while first > 0 and is_solution(iterations[first - 1][2]):
+            first -= 1
+        time_to_solution, nodes_to_solution, _ = iterations[first]
+
+    return PositionResult(
+        entry.id,
+        entry.fen,
+        move_to_san(game_state, move),
+        solved,
+        time_to_solution,
+        nodes_to_solution,
+        len(stats.nodes_per_depth) - 1,
+        stats.total_nodes,
+        elapsed,
+    )
+
+
+def run_suite(
+    entries: list[EPDEntry],
+    max_depth: int = DEFAULT_MAX_DEPTH,
+    movetime: float | None = DEFAULT_MOVETIME,
+    nodes: int | None = None,
+    workers: int | None = None,
+) -> dict:
+    """Solve every entry across a process pool, the summary as a dict"""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        results = list(
+            pool.map(
+                solve_position,
+                entries,
+                [max_depth] * len(entries),
+                [movetime] * len(entries),
+                [nodes] * len(entries),
+            )
+        )
+    wall_time = time.perf_counter() - start
+
+    total_nodes = sum(result.nodes for result in results)
+    search_time = sum(result.time for result in results)
+    solved = sum(result.solved for result in results)
+    return {
+        "limits": {"max_depth": max_depth, "movetime": movetime, "nodes": nodes},
+        "solved": solved,
+        "total": len(results),
+        "solve_rate": solved / len(results) if results else 0.0,
+        "nodes": total_nodes,
+        "search_time": search_time,
+        "wall_time": wall_time,
+        # Per process: nodes over the time spent searching them
+        "nps": total_nodes / search_time if search_time else 0.0,
+        "positions": [asdict(result) for result in results],
+    }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"{'id':<16} {'move':<8} {'solved':<6} {'tts':>7} {'depth':>5} {'nodes':>8}"
+    ]
+    for position in summary["positions"]:
+        tts = position["time_to_solution"]
+        lines.append(
+            f"{position['id'][:16]:<16} {position['move']:<8}"
+            f" {'yes' if position['solved'] else 'no':<6}"
+            f" {'-' if tts is None else f'{tts:.2f}':>7}"
+            f" {position['depth']:>5} {position['nodes']:>8}"
+        )
+    lines.append(
+        f"Solved {summary['solved']}/{summary['total']}"
+        f" ({summary['solve_rate']:.0%}), {summary['nodes']} nodes,"
+        f" {summary['nps']:.0f} nps, {summary['wall_time']:.1f}s"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EPD test suite runner, run from the repository root with "
+        "`python -m benchmarks.epd`"
+    )
+    parser.add_argument("epd", nargs="*", default=[DEFAULT_SUITE])
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument("-t", "--movetime", type=float, default=DEFAULT_MOVETIME)
+    limit.add_argument(
+        "-n", "--nodes", type=int, help="node budget, for reproducible runs"
+    )
+    parser.add_argument("-d", "--depth", type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument(
+        "--json", metavar="PATH", help="write the summary as JSON, - for stdout"
+    )
+    args = parser.parse_args()
+
+    entries = [entry for path in args.epd for entry in read_epd(path)]
+    movetime = None if args.nodes is not None else args.movetime
+    summary = run_suite(entries, args.depth, movetime, args.nodes, args.workers)
+    summary["suites"] = args.epd
+
+    if args.json == "-":
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+        return
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    print(format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import argparse
+from collections.abc import Callable
+from dataclasses import dataclass
+import importlib
+import statistics
+import time
+import tracemalloc
+
+import move_generation as mv
+from benchmarks.regression import CORPUS
+from chess_board import BoardState
+from config import BISHOP, BLACK, KING, KNIGHT, PAWN, QUEEN, ROOK, WHITE, CastlingState
+from game_logic import analyze_king_safety
+from game_state import GameState
+from legal_moves import generate_legal_moves
+from move_selection import minmax_selection
+
+# Generator name -> piece type whose squares it is benchmarked on
+GENERATORS: dict[str, int] = {
+    "generate_pawn_moves": PAWN,
+    "generate_knight_moves": KNIGHT,
+    "generate_bishop_moves": BISHOP,
+    "generate_rook_moves": ROOK,
+    "generate_queen_moves": QUEEN,
+    "generate_king_moves": KING,
+    "generate_pawn_controlled_squares": PAWN,
+    "generate_knight_controlled_squares": KNIGHT,
+    "generate_bishop_controlled_squares": BISHOP,
+    "generate_rook_controlled_squares": ROOK,
+    "generate_queen_controlled_squares": QUEEN,
+    "generate_king_controlled_squares": KING,
+}
+
+DEFAULT_TRACE_DEPTH = 2
+DEFAULT_MAX_POSITIONS = 500
+# Calls timed together per sample, so the timer cost stays small
+INNER_LOOPS = 20
+PERCENTILES = (50, 90, 99)
+
+
+# Kinds of node `generate_legal_moves` is benchmarked on
+NODE_KINDS = ("normal", "pinned", "check")
+
+
+@dataclass
+class Position:
+    board: list[int]
+    en_passant_target: int | None
+    active_color: int = WHITE
+    castling_bits: int = 0
+
+
+@dataclass
+class GeneratorResult:
+    name: str
+    calls: int
+    ns_per_call: float
+    percentiles: dict[int, float]
+    bytes_per_call: float
+
+
+# ===============================================================
+# SAMPLES
+# ===============================================================
+
+
+def trace_positions(
+    fens: list[str],
+    depth: int = DEFAULT_TRACE_DEPTH,
+    max_positions: int = DEFAULT_MAX_POSITIONS,
+) -> list[Position]:
+    """
+    Positions reached by `minmax_selection` on `fens`: every position made
+    during the search, up to `max_positions` per FEN.
+    """
+    positions: list[Position] = []
+    original = GameState.make_move
+
+    for fen in fens:
+        traced: list[Position] = []
+
+        def make_move(self: GameState, *args, **kwargs) -> None:
+            original(self, *args, **kwargs)
+            if len(traced) < max_positions:
+                traced.append(
+                    Position(
+                        self.board[:],
+                        self.en_passant_target,
+                        self.active_color,
+                        self.castling_state.to_bits(),
+                    )
+                )
+
+        GameState.make_move = make_move
+        try:
+            minmax_selection(GameState.from_fen(fen), depth)
+        finally:
+            GameState.make_move = original
+        positions.extend(traced)
+
+    return positions
+
+
+def generator_samples(name: str, positions: list[Position]) -> list[tuple]:
+    """Argument tuples of `name` for every matching piece of `positions`"""
+    piece_type = GENERATORS[name]
+    samples: list[tuple] = []
+    for position in positions:
+        for square_idx, piece in enumerate(position.board):
+            if abs(piece) != piece_type:
+                continue
+            color = WHITE if piece > 0 else BLACK
+            if name == "generate_pawn_moves":
+                samples.append(
+                    (position.board, square_idx, color, position.en_passant_target)
+                )
+            else:
+                samples.append((position.board, square_idx, color))
+    return samples
+
+
+def legal_move_samples(positions: list[Position]) -> dict[str, list[tuple]]:
+    """
+    `generate_legal_moves` argument tuples of `positions` by kind of node:
+    in check, with pinned pieces, or neither
+    """
+    samples: dict[str, list[tuple]] = {kind: [] for kind in NODE_KINDS}
+    for position in positions:
+        board_state = BoardState.from_board(position.board)
+        _, _, king_square = board_state.get_color_state(position.active_color)
+        checking, pinned = analyze_king_safety(
+            position.board, king_square, position.active_color, board_state
+        )
+        kind = "check" if checking else "pinned" if pinned else "normal"
+        samples[kind].append(
+            (
+                position.board,
+                position.active_color,
+                board_state,
+                checking,
+                pinned,
+                CastlingState.from_bits(position.castling_bits),
+                position.en_passant_target,
+            )
+        )
+    return samples
+
+
+# ===============================================================
+# MEASUREMENT
+# ===============================================================
+
+
+def timer_overhead() -> float:
+    """Nanoseconds taken by an empty timed inner loop"""
+    timings: list[int] = []
+    for _ in range(1000):
+        start = time.perf_counter_ns()
+        for _ in range(INNER_LOOPS):
+            pass
+        timings.append(time.perf_counter_ns() - start)
+    return min(timings) / INNER_LOOPS
+
+
+def time_calls(
+    func: Callable, samples: list[tuple], overhead: float = 0.0
+) -> list[float]:
+    """Nanoseconds per call of `func` on each sample"""
+    timings: list[float] = []
+    for args in samples:
+        start = time.perf_counter_ns()
+        for _ in range(INNER_LOOPS):
+            func(*args)
+        timings.append(
+            max((time.perf_counter_ns() - start) / INNER_LOOPS - overhead, 0.0)
+        )
+    return timings
+
+
+def bytes_per_call(func: Callable, samples: list[tuple]) -> float:
+    """Mean peak of memory allocated by a call, measured with tracemalloc"""
+    tracemalloc.start()
+    try:
+        total = 0
+        for args in samples:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func(*args)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / len(samples) if samples else 0.0
+
+
+def percentiles(timings: list[float]) -> dict[int, float]:
+    if len(timings) < 2:
+        return {p: timings[0] if timings else 0.0 for p in PERCENTILES}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {p: cuts[p - 1] for p in PERCENTILES}
+
+
+def bench_generator(
+    name: str,
+    samples: list[tuple],
+    func: Callable | None = None,
+    overhead: float = 0.0,
+) -> GeneratorResult:
+    """Benchmark `func` (default: `move_generation.<name>`) on `samples`"""
+    func = func or getattr(mv, name)
+    timings = time_calls(func, samples, overhead)
+    return GeneratorResult(
+        name,
+        len(samples),
+        statistics.fmean(timings) if timings else 0.0,
+        percentiles(timings),
+        bytes_per_call(func, samples),
+    )
+
+
+def compare_generators(
+    name: str,
+    candidate: Callable,
+    samples: list[tuple],
+    rounds: int = 5,
+    overhead: float = 0.0,
+) -> tuple[GeneratorResult, GeneratorResult]:
+    """
+    A/B benchmark of `candidate` against `move_generation.<name>`.
+
+    Both must return the same squares on every sample. Rounds alternate
+    between the two so that drifts in machine speed hit both alike.
+    """
+    current = getattr(mv, name)
+    for args in samples:
+        if sorted(current(*args)) != sorted(candidate(*args)):
+            raise ValueError(f"Candidate {name} differs on square {args[1]}")
+
+    funcs = (current, candidate)
+    timings: tuple[list[float], list[float]] = ([], [])
+    for _ in range(rounds):
+        for func, func_timings in zip(funcs, timings):
+            func_timings.extend(time_calls(func, samples, overhead))
+
+    return tuple(  # pyright: ignore[reportReturnType]
+        GeneratorResult(
+            name,
+            len(samples),
+            statistics.fmean(func_timings) if func_timings else 0.0,
+            percentiles(func_timings),
+            bytes_per_call(func, samples),
+        )
+        for func, func_timings in zip(funcs, timings)
+    )
+
+
+def format_results(results: list[GeneratorResult]) -> str:
+    header = f"{'generator':<36} {'calls':>7} {'ns/call':>9}"
+    header += "".join(f" {f'p{p}':>8}" for p in PERCENTILES)
+    lines = [header + f" {'B/call':>8}"]
+    for r in sorted(results, key=lambda r: r.ns_per_call, reverse=True):
+        line = f"{r.name:<36} {r.calls:>7} {r.ns_per_call:>9.0f}"
+        line += "".join(f" {r.percentiles[p]:>8.0f}" for p in PERCENTILES)
+        lines.append(line + f" {r.bytes_per_call:>8.0f}")
+    return "\n".join(lines)
+
+
+def load_candidate(path: str) -> Callable:
+    """`module:function` to the function"""
+    module, _, function = path.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmarks of the move generators, run from the "
+        "repository root with `python -m benchmarks.generators`"
+    )
+    parser.add_argument(
+        "fens", nargs="*", help="positions to trace, the regression corpus by default"
+    )
+    parser.add_argument("-d", "--depth", type=int, default=DEFAULT_TRACE_DEPTH)
+    parser.add_argument("--max-positions", type=int, default=DEFAULT_MAX_POSITIONS)
+    parser.add_argument(
+        "-g", "--generators", nargs="+", choices=list(GENERATORS), default=None
+    )
+    parser.add_argument(
+        "--nodes",
+        action="store_true",
+        help="time generate_legal_moves on normal, pinned and check nodes",
+    )
+    parser.add_argument(
+        "--candidate",
+        metavar="NAME=MODULE:FUNCTION",
+        help="A/B the generator NAME against an alternative implementation",
+    )
+    args = parser.parse_args()
+
+    positions = trace_positions(
+        args.fens or list(CORPUS.values()), args.depth, args.max_positions
+    )
+    overhead = timer_overhead()
+    print(f"{len(positions)} traced positions, timer overhead {overhead:.0f} ns")
+
+    if args.nodes:
+        results = [
+            bench_generator(
+                f"generate_legal_moves ({kind})",
+                samples,
+                generate_legal_moves,
+                overhead,
+            )
+            for kind, samples in legal_move_samples(positions).items()
+        ]
+        print(format_results(results))
+        return
+
+    if args.candidate:
+        name, _, path = args.candidate.partition("=")
+        current, candidate = compare_generators(
+            name,
+            load_candidate(path),
+            generator_samples(name, positions),
+            overhead=overhead,
+        )
+        current.name, candidate.name = "current", "candidate"
+        print(f"{name} against {path}")
+        print(format_results([current, candidate]))
+        print(f"speedup: {current.ns_per_call / candidate.ns_per_call:.2f}x")
+        return
+
+    results = [
+        bench_generator(name, generator_samples(name, positions), overhead=overhead)
+        for name in args.generators or GENERATORS
+    ]
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
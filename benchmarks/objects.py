@@ -0,0 +1,171 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import sys
+import timeit
+
+from chess_board import BoardState
+from config import CastlingState, Move, Piece, PieceMoves, PinnedPiece
+from game_state import GameState
+from move_selection import minmax_search
+
+DEFAULT_FEN = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+CONSTRUCTIONS = 100_000
+
+# ===============================================================
+# LEGACY LAYOUT
+# ===============================================================
+
+# The former plain dataclasses, with a per-instance __dict__, kept as the
+# reference the slotted classes are measured against.
+
+
+@dataclass
+class LegacyPiece:
+    piece: int
+    index: int
+
+
+@dataclass
+class LegacyMove:
+    piece: LegacyPiece
+    to_idx: int
+    promotion: int | None = None
+
+
+@dataclass
+class LegacyPieceMoves:
+    pieces: list = field(default_factory=list)
+    move_list: list = field(default_factory=list)
+
+
+@dataclass
+class LegacyCastlingState:
+    white_kingside: bool = True
+    white_queenside: bool = True
+    black_kingside: bool = True
+    black_queenside: bool = True
+
+
+@dataclass
+class LegacyPinnedPiece:
+    piece: LegacyPiece
+    pin_vector: tuple[int, int]
+    pinning_piece_index: int
+
+
+@dataclass
+class LegacyBoardState:
+    w_pieces: list[int]
+    w_idx: list[int]
+    b_pieces: list[int]
+    b_idx: list[int]
+    w_king_idx: int
+    b_king_idx: int
+
+
+def object_size(obj: object) -> int:
+    """Bytes of the instance itself and of its attribute dict if it has one"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+# class name -> (current factory, legacy factory)
+FACTORIES: dict[str, tuple[Callable[[], object], Callable[[], object]]] = {
+    "Piece": (lambda: Piece(1, 8), lambda: LegacyPiece(1, 8)),
+    "Move": (
+        lambda: Move(Piece(1, 8), 16),
+        lambda: LegacyMove(LegacyPiece(1, 8), 16),
+    ),
+    "PieceMoves": (PieceMoves, LegacyPieceMoves),
+    "CastlingState": (CastlingState, LegacyCastlingState),
+    "PinnedPiece": (
+        lambda: PinnedPiece(Piece(3, 9), (1, 1), 27),
+        lambda: LegacyPinnedPiece(LegacyPiece(3, 9), (1, 1), 27),
+    ),
+    "BoardState": (
+        lambda: BoardState([], [], [], [], 4, 60),
+        lambda: LegacyBoardState([], [], [], [], 4, 60),
+    ),
+}
+
+
+# ===============================================================
+# ALLOCATIONS DURING SEARCH
+# ===============================================================
+
+
+def count_instances(fen: str, depth: int) -> tuple[dict[str, int], int]:
+    """
+    Instances of each class built by a search, and the number of nodes.
+
+    Constructors are wrapped for the duration of the search only.
+    """
+    classes = {
+        "Piece": Piece,
+        "Move": Move,
+        "PieceMoves": PieceMoves,
+        "CastlingState": CastlingState,
+        "PinnedPiece": PinnedPiece,
+        "BoardState": BoardState,
+        "GameState": GameState,
+    }
+    counts = dict.fromkeys(classes, 0)
+    originals = {name: cls.__init__ for name, cls in classes.items()}
+
+    def counting(name: str, original: Callable) -> Callable:
+        def init(self, *args, **kwargs):
+            counts[name] += 1
+            original(self, *args, **kwargs)
+
+        return init
+
+    for name, cls in classes.items():
+        cls.__init__ = counting(name, originals[name])
+    try:
+        _, stats = minmax_search(GameState.from_fen(fen), depth)
+    finally:
+        for name, cls in classes.items():
+            cls.__init__ = originals[name]
+    return counts, stats.total_nodes
+
+
+def main():
+    print(
+        f"{'class':<14} {'legacy B':>9} {'slotted B':>10} {'legacy ns':>10}"
+        f" {'slotted ns':>11}"
+    )
+    for name, (current, legacy) in FACTORIES.items():
+        times = [
+            min(timeit.repeat(factory, number=CONSTRUCTIONS, repeat=5))
+            / CONSTRUCTIONS
+            * 1e9
+            for factory in (legacy, current)
+        ]
+        print(
+            f"{name:<14} {object_size(legacy()):>9} {object_size(current()):>10}"
+            f" {times[0]:>10.0f} {times[1]:>11.0f}"
+        )
+    game_state_size = object_size(GameState.starting_position())
+    print(f"{'GameState':<14} {'':>9} {game_state_size:>10}")
+
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    counts, nodes = count_instances(DEFAULT_FEN, depth)
+    print(f"\nInstances built by a depth {depth} search ({nodes} nodes)")
+    print(f"{'class':<14} {'instances':>10} {'per node':>9} {'KB saved':>9}")
+    saved_total = 0
+    for name, count in counts.items():
+        saved = 0
+        if name in FACTORIES:
+            current, legacy = FACTORIES[name]
+            saved = count * (object_size(legacy()) - object_size(current()))
+        saved_total += saved
+        print(f"{name:<14} {count:>10} {count / nodes:>9.1f} {saved / 1024:>9.0f}")
+    print(
+        f"Total saved: {saved_total / 1024:.0f} KB, {saved_total / nodes:.0f} B/node"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import time
+
+from benchmarks.regression import CORPUS, cold
+from parallel_search import (
+    FREE_THREADED,
+    PROCESSES,
+    THREADS,
+    parallel_search,
+    process_pool,
+)
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+
+POSITIONS = ["kiwipete", "closed_center", "tactic_4"]
+DEPTH = 3
+WORKERS = (1, 2, 4)
+MODES = (THREADS, PROCESSES)
+
+
+@dataclass
+class ScalingResult:
+    mode: str
+    workers: int
+    # Totals over the positions
+    time: float
+    nodes: int
+    nps: float
+    # Time of the single worker run of the same mode over `time`
+    speedup: float
+
+
+def run_mode(
+    mode: str, workers: int, fens: list[str], depth: int, pool: Executor
+) -> tuple[float, int]:
+    """Seconds and nodes of a parallel search of every position"""
+    stats = SearchStats()
+    start = time.perf_counter()
+    for fen in fens:
+        parallel_search(
+            cold(fen), depth, workers, mode, stats, TranspositionTable(), pool=pool
+        )
+    return time.perf_counter() - start, stats.total_nodes
+
+
+def measure_scaling(
+    fens: list[str],
+    depth: int = DEPTH,
+    workers: tuple[int, ...] = WORKERS,
+    modes: tuple[str, ...] = MODES,
+) -> list[ScalingResult]:
+    """
+    Time a parallel search of `fens` for every mode and number of workers.
+    The pools are started and warmed up before timing, so that the process
+    mode is not charged for starting its workers.
+    """
+    results: list[ScalingResult] = []
+    for mode in modes:
+        single: float | None = None
+        for n in workers:
+            executor = ThreadPoolExecutor if mode == THREADS else process_pool
+            with executor(n) as pool:
+                run_mode(mode, n, fens[:1], 1, pool)
+                elapsed, nodes = run_mode(mode, n, fens, depth, pool)
+            single = single if single is not None else elapsed
+            speedup = single / elapsed
+            results.append(
+                ScalingResult(mode, n, elapsed, nodes, nodes / elapsed, speedup)
+            )
+    return results
+
+
+def format_results(results: list[ScalingResult]) -> str:
+    lines = [
+        f"{'mode':<10} {'workers':>7} {'time':>8} {'nodes':>9} {'nps':>8}"
+        f" {'speedup':>8}"
+    ]
+    for r in results:
+        lines.append(
+            f"{r.mode:<10} {r.workers:>7} {r.time:>8.2f} {r.nodes:>9}"
+            f" {r.nps:>8.0f} {r.speedup:>7.2f}x"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Parallel search scaling, run from the repository root with "
+        "`python -m benchmarks.parallel`"
+    )
+    parser.add_argument(
+        "--positions",
+        nargs="+",
+        choices=list(CORPUS),
+        default=POSITIONS,
+        help="positions of the regression corpus",
+    )
+    parser.add_argument("-d", "--depth", type=int, default=DEPTH)
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=list(WORKERS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    args = parser.parse_args()
+
+    fens = [CORPUS[name] for name in args.positions]
+    results = measure_scaling(fens, args.depth, tuple(args.workers), tuple(args.modes))
+
+    print(
+        f"Python {platform.python_version()}"
+        f" ({'free-threaded' if FREE_THREADED else 'GIL'}), {os.cpu_count()} CPUs"
+    )
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "free_threaded": FREE_THREADED,
+                    "cpus": os.cpu_count(),
+                    "depth": args.depth,
+                    "positions": args.positions,
+                    "results": [asdict(r) for r in results],
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+import argparse
+from collections import Counter
 import cProfile
+import json
+import os
+import signal
 import time
 import pstats
+from types import FrameType
 
 from game_state import GameState
 from move_selection import minmax_selection
+from phase_timers import PhaseTimers
+
+DEFAULT_SAMPLING_INTERVAL = 0.001
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
 
 
 def profile_engine(fen: str, depth: int = 3):
@@ -22,5 +32,183 @@ def profile_engine(fen: str, depth: int = 3):
     return move
 
 
+def time_phases(fen: str, depth: int = 3):
+    """
+    Time the hot spots of the engine on a specific position, without the
+    slowdown of cProfile
+    """
+    game_state = GameState.from_fen(fen)
+
+    with PhaseTimers() as timers:
+        start = time.perf_counter()
+        move = minmax_selection(game_state, depth)
+        elapsed = time.perf_counter() - start
+
+    print(f"{move} in {elapsed:.3f}s")
+    print(timers.report(elapsed))
+
+    return move
+
+
+# ===============================================================
+# SAMPLING PROFILER
+# ===============================================================
+
+
+def frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a SIGPROF timer interrupts the process every
+    `interval` seconds of CPU time and the handler records the current call
+    stack. Functions cost nothing between samples, so small hot functions
+    are not inflated like under cProfile's tracing.
+
+    Unix only, and must run in the main thread (signal handlers).
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLING_INTERVAL):
+        self.interval: float = interval
+        # Stacks as tuples of frame names, outermost first
+        self.samples: Counter[tuple[str, ...]] = Counter()
+        self.elapsed: float = 0.0
+        self._start: float = 0.0
+        self._previous_handler = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+        self.elapsed += time.perf_counter() - self._start
+
+    def _sample(self, _signum: int, frame: FrameType | None) -> None:
+        stack: list[str] = []
+        while frame is not None:
+            stack.append(frame_name(frame))
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[tuple(stack)] += 1
+
+    def collapsed(self) -> list[str]:
+        """Brendan Gregg's collapsed stacks ("a;b;c count"), for flamegraph.pl"""
+        return [
+            f"{';'.join(stack)} {count}"
+            for stack, count in sorted(self.samples.items())
+        ]
+
+    def speedscope(self, name: str = "minmax_selection") -> dict:
+        """Sampled profile in the speedscope file format"""
+        frames: list[dict] = []
+        frame_index: dict[str, int] = {}
+        samples: list[list[int]] = []
+        weights: list[float] = []
+
+        for stack, count in self.samples.items():
+            sample: list[int] = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame})
+                sample.append(frame_index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval)
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "benchmarks/profiler.py",
+        }
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+
+    def write_speedscope(self, path: str, name: str = "minmax_selection") -> None:
+        with open(path, "w") as f:
+            json.dump(self.speedscope(name), f)
+
+
+def sample_engine(
+    fens: list[str],
+    depth: int = 3,
+    interval: float = DEFAULT_SAMPLING_INTERVAL,
+) -> SamplingProfiler:
+    """Sample `minmax_selection` on every position of `fens`"""
+    profiler = SamplingProfiler(interval)
+    for fen in fens:
+        game_state = GameState.from_fen(fen)
+        with profiler:
+            minmax_selection(game_state, depth)
+    return profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profile minmax_selection, run from the repository root "
+        "with `python -m benchmarks.profiler`"
+    )
+    parser.add_argument("fens", nargs="+", help="positions to search")
+    parser.add_argument("-d", "--depth", type=int, default=3)
+    parser.add_argument(
+        "-m", "--mode", choices=["sample", "cprofile", "phases"], default="sample"
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=DEFAULT_SAMPLING_INTERVAL,
+        help="sampling interval in seconds of CPU time",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="profile",
+        help="sample mode writes OUTPUT.collapsed and OUTPUT.speedscope.json",
+    )
+    args = parser.parse_args()
+
+    if args.mode == "cprofile":
+        for fen in args.fens:
+            profile_engine(fen, args.depth)
+    elif args.mode == "phases":
+        for fen in args.fens:
+            time_phases(fen, args.depth)
+    else:
+        profiler = sample_engine(args.fens, args.depth, args.interval)
+        profiler.write_collapsed(args.output + ".collapsed")
+        profiler.write_speedscope(args.output + ".speedscope.json")
+        print(
+            f"{sum(profiler.samples.values())} samples in {profiler.elapsed:.3f}s,"
+            f" written to {args.output}.collapsed and {args.output}.speedscope.json"
+        )
+
+
 if __name__ == "__main__":
-    ...
+    main()
@@ -0,0 +1,254 @@
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from eval_cache import EvalCache, PawnHashTable
+from game_state import GameState
+from move_selection import generate_move_list, minmax_search
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Positions the benchmarks run on: name -> FEN
+CORPUS: dict[str, str] = {
+    # Openings
+    "start": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "fried_liver": "r1bqkb1r/pppp1ppp/2n2n2/4p1N1/2B1P3/8/PPPP1PPP/RNBQK2R b KQkq - 0 1",
+    # Middlegames
+    "kiwipete": "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "closed_center": "r1bq1rk1/pp2nppp/2n1p3/2ppP3/3P4/2PB1N2/PP3PPP/R1BQ1RK1 w - - 0 9",
+    # Endgames
+    "rook_endgame": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "pawn_endgame": "8/5k2/3p4/1p1Pp2p/pP2Pp1P/P4P1K/8/8 b - - 0 50",
+    # Tactical positions
+    "tactic_4": "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2",
+    "promotion": "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+}
+
+PERFT_DEPTH = 3
+SEARCH_DEPTH = 3
+EVAL_ITERATIONS = 2000
+REPEATS = 5
+MIN_TIMING = 0.05
+
+# A timed metric regresses when it is worse than the baseline by more than
+# max(THRESHOLD, NOISE_FACTOR * relative spread of the two runs).
+THRESHOLD = 0.10
+NOISE_FACTOR = 2
+# Node counts are deterministic, any growth above this is a regression
+NODES_THRESHOLD = 0.0
+
+
+@dataclass
+class Metric:
+    value: float
+    # Relative spread of the repeats, 0 for exact metrics
+    noise: float
+    higher_is_better: bool
+
+
+def measure(run, repeats: int) -> tuple[float, float]:
+    """
+    Seconds per call of `run()`, best of `repeats` timings, and the relative
+    spread of the timings ((median - best) / best).
+
+    Each timing loops over `run` until it lasts `MIN_TIMING` seconds, so
+    short benchmarks are not dominated by timer resolution.
+    """
+    loops = 1
+    while True:
+        elapsed = time_loops(run, loops)
+        if elapsed >= MIN_TIMING:
+            break
+        loops *= 2
+
+    timings = [elapsed / loops]
+    for _ in range(repeats - 1):
+        timings.append(time_loops(run, loops) / loops)
+    best = min(timings)
+    return best, (statistics.median(timings) - best) / best
+
+
+def time_loops(run, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        run()
+    return time.perf_counter() - start
+
+
+def perft(game_state: GameState, depth: int) -> int:
+    """Number of leaf nodes of the legal move tree, leaves counted in bulk"""
+    move_list = generate_move_list(game_state)
+    if depth <= 1:
+        return len(move_list) if depth == 1 else 1
+    nodes = 0
+    for move in move_list:
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        nodes += perft(g, depth - 1)
+    return nodes
+
+
+def uncached(fen: str) -> GameState:
+    game_state = GameState.from_fen(fen)
+    game_state.eval_cache = None
+    game_state.pawn_table = None
+    return game_state
+
+
+def cold(fen: str) -> GameState:
+    """`fen` with empty caches, so that no search profits from an earlier one"""
+    game_state = GameState.from_fen(fen)
+    game_state.eval_cache = EvalCache()
+    game_state.pawn_table = PawnHashTable()
+    return game_state
+
+
+def benchmark_position(fen: str, repeats: int = REPEATS) -> dict[str, Metric]:
+    metrics: dict[str, Metric] = {}
+
+    # ------ PERFT ------ #
+    nodes = perft(GameState.from_fen(fen), PERFT_DEPTH)
+    elapsed, noise = measure(
+        lambda: perft(GameState.from_fen(fen), PERFT_DEPTH), repeats
+    )
+    metrics["perft_nodes"] = Metric(nodes, 0.0, False)
+    metrics["perft_nps"] = Metric(nodes / elapsed, noise, True)
+
+    # ------ SEARCH ------ #
+    _, stats = minmax_search(cold(fen), SEARCH_DEPTH)
+    elapsed, noise = measure(lambda: minmax_search(cold(fen), SEARCH_DEPTH), repeats)
+    metrics["search_nodes"] = Metric(stats.total_nodes, 0.0, False)
+    metrics["search_time"] = Metric(elapsed, noise, False)
+
+    # ------ EVALUATION ------ #
+    game_state = uncached(fen)
+
+    def evaluate():
+        for _ in range(EVAL_ITERATIONS):
+            game_state.evaluate()
+
+    elapsed, noise = measure(evaluate, repeats)
+    metrics["eval_per_second"] = Metric(EVAL_ITERATIONS / elapsed, noise, True)
+
+    return metrics
+
+
+def run_benchmarks(
+    corpus: dict[str, str] = CORPUS, repeats: int = REPEATS
+) -> dict[str, dict[str, Metric]]:
+    return {name: benchmark_position(fen, repeats) for name, fen in corpus.items()}
+
+
+# ===============================================================
+# BASELINES
+# ===============================================================
+
+
+def save_baseline(results: dict[str, dict[str, Metric]], path: str) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {
+            name: {metric: asdict(m) for metric, m in metrics.items()}
+            for name, metrics in results.items()
+        },
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_baseline(path: str) -> dict[str, dict[str, Metric]]:
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        name: {metric: Metric(**m) for metric, m in metrics.items()}
+        for name, metrics in data["results"].items()
+    }
+
+
+def regression(baseline: Metric, current: Metric) -> float:
+    """
+    Relative change of `current` against `baseline`, positive when it got
+    worse
+    """
+    if not baseline.value:
+        return 0.0
+    change = (current.value - baseline.value) / baseline.value
+    return -change if baseline.higher_is_better else change
+
+
+def allowed_regression(baseline: Metric, current: Metric) -> float:
+    if baseline.noise == 0 and current.noise == 0:
+        return NODES_THRESHOLD
+    return max(THRESHOLD, NOISE_FACTOR * max(baseline.noise, current.noise))
+
+
+def compare(
+    baseline: dict[str, dict[str, Metric]],
+    current: dict[str, dict[str, Metric]],
+) -> list[str]:
+    """
+    Print the change of every metric present in both runs.
+
+    Returns:
+        - descriptions of the metrics that regressed
+    """
+    regressions: list[str] = []
+    print(
+        f"{'position':<14} {'metric':<16} {'baseline':>12} {'current':>12}"
+        f" {'change':>8}"
+    )
+    for name, metrics in current.items():
+        for metric, m in metrics.items():
+            if metric not in baseline.get(name, {}):
+                continue
+            base = baseline[name][metric]
+            worse = regression(base, m)
+            flag = ""
+            if worse > allowed_regression(base, m):
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}: {100 * worse:+.1f}% worse")
+            print(
+                f"{name:<14} {metric:<16} {base.value:>12.4g} {m.value:>12.4g}"
+                f" {-100 * worse:>+7.1f}%{flag}"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Engine benchmarks, run from the repository root with "
+        "`python -m benchmarks.regression`"
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the new baseline"
+    )
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument(
+        "--positions", nargs="+", choices=list(CORPUS), help="subset of the corpus"
+    )
+    args = parser.parse_args()
+
+    corpus = {name: CORPUS[name] for name in args.positions or CORPUS}
+    results = run_benchmarks(corpus, args.repeats)
+
+    if args.save or not os.path.exists(args.baseline):
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(load_baseline(args.baseline), results)
+    if regressions:
+        print("\n".join(["", "Regressions:"] + regressions))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
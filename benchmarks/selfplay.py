@@ -0,0 +1,471 @@
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date
+import importlib
+import math
+import os
+import time
+from typing import Any, Callable
+
+from config import WHITE
+from eval_cache import EvalCache, PawnHashTable
+from game_state import GameState
+import move_selection as ms
+from move_selection import iterative_deepening
+from notation import move_to_san
+from search_limits import SearchLimits
+from transposition_table import TranspositionTable
+
+# Balanced starting positions, each one is played with both colors
+OPENINGS: list[str] = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+    "rnbqkbnr/pppp1ppp/4p3/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2",
+    "rnbqkb1r/pppppppp/5n2/8/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2",
+    "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3",
+    "rnbqkb1r/ppp1pppp/5n2/3p4/3P1B2/5N2/PPP1PPPP/RN1QKB1R b KQkq - 3 3",
+    "rnbqkbnr/pp2pppp/2p5/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3",
+]
+
+DEFAULT_MAX_PLIES = 200
+REPETITIONS_FOR_DRAW = 3
+
+# Tables built at import time from constants that may be overridden:
+# table -> (constants it is built from, builder)
+DERIVED_TABLES: dict[str, tuple[tuple[str, ...], Callable[[], Any]]] = {
+    "move_selection.REDUCTION_TABLE": (
+        ("move_selection.LMR_BASE", "move_selection.LMR_DIVISOR"),
+        lambda: ms.build_reduction_table(ms.LMR_MAX_DEPTH, ms.LMR_MAX_MOVES),
+    ),
+}
+
+# SPRT defaults: H0 elo <= 0 against H1 elo >= 10, 5% error rates
+SPRT_ELO0 = 0
+SPRT_ELO1 = 10
+SPRT_ALPHA = 0.05
+SPRT_BETA = 0.05
+
+
+@dataclass
+class EngineConfig:
+    """
+    - depth: maximum iterative deepening depth
+    - movetime: seconds per move, no new iteration starts past half of it
+    - nodes: node budget per move, for matches reproducible on any machine
+    - overrides: module constants set while the engine thinks, eg.
+      {"evaluate_position.DOUBLED_PAWN": -0.2, "move_selection.FUTILITY_MARGIN": 3}
+      Tables built from overridden constants (`DERIVED_TABLES`) are rebuilt.
+    """
+
+    name: str
+    depth: int = 3
+    movetime: float | None = None
+    nodes: int | None = None
+    overrides: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class GameResult:
+    opening: str
+    white: str
+    black: str
+    # "1-0", "0-1" or "1/2-1/2"
+    result: str
+    termination: str
+    moves: list[str]
+    seconds: float
+
+
+# ===============================================================
+# PLAYING A GAME
+# ===============================================================
+
+
+class Engine:
+    """
+    An `EngineConfig` with its own caches, kept warm across moves. Caches are
+    not shared between engines since overrides change the evaluation.
+    """
+
+    def __init__(self, config: EngineConfig):
+        self.config: EngineConfig = config
+        self.eval_cache = EvalCache()
+        self.pawn_table = PawnHashTable()
+        self.tt = TranspositionTable()
+        # Derived tables built with the overrides, kept across moves
+        self._tables: dict[str, Any] = {}
+
+    def _swap_overrides(self) -> dict[str, Any]:
+        """Apply the overrides, return the values they replaced"""
+        previous: dict[str, Any] = {}
+        for path, value in self.config.overrides.items():
+            previous[path] = swap_attribute(path, value)
+        for path, (constants, build) in DERIVED_TABLES.items():
+            if any(constant in self.config.overrides for constant in constants):
+                if path not in self._tables:
+                    self._tables[path] = build()
+                previous[path] = swap_attribute(path, self._tables[path])
+        return previous
+
+    def _restore_overrides(self, previous: dict[str, Any]) -> None:
+        for path, value in previous.items():
+            swap_attribute(path, value)
+
+    def select_move(self, game_state: GameState):
+        previous = self._swap_overrides()
+        try:
+            g = game_state.copy()
+            g.eval_cache = self.eval_cache
+            g.pawn_table = self.pawn_table
+            limits = None
+            if self.config.nodes is not None:
+                limits = SearchLimits(max_nodes=self.config.nodes)
+            return iterative_deepening(
+                g,
+                self.config.depth,
+                tt=self.tt,
+                movetime=self.config.movetime,
+                limits=limits,
+            )[1]
+        finally:
+            self._restore_overrides(previous)
+
+
+def swap_attribute(path: str, value: Any) -> Any:
+    """Set the module attribute `path` ("module.NAME"), return its old value"""
+    module_name, _, name = path.rpartition(".")
+    module = importlib.import_module(module_name)
+    old = getattr(module, name)
+    setattr(module, name, value)
+    return old
+
+
+def play_game(
+    opening: str,
+    white: EngineConfig,
+    black: EngineConfig,
+    max_plies: int = DEFAULT_MAX_PLIES,
+) -> GameResult:
+    """
+    Play one game from `opening`. Checkmate and draws are adjudicated by the
+    `GameState`, threefold repetition and `max_plies` by the runner.
+    """
+    start = time.perf_counter()
+    engines = {True: Engine(white), False: Engine(black)}
+    game_state = GameState.from_fen(opening)
+    white_to_move = game_state.active_color == WHITE
+    seen: dict[int, int] = {game_state.zobrist_key: 1}
+    moves: list[str] = []
+
+    result, termination = "1/2-1/2", "max plies"
+    for _ in range(max_plies):
+        if game_state.checkmate:
+            result = "0-1" if white_to_move else "1-0"
+            termination = "checkmate"
+            break
+        if game_state.draw:
+            termination = "stalemate" if not game_state.legal_moves else "50 moves"
+            break
+        if seen[game_state.zobrist_key] >= REPETITIONS_FOR_DRAW:
+            termination = "repetition"
+            break
+
+        move = engines[white_to_move].select_move(game_state)
+        moves.append(move_to_san(game_state, move))
+        game_state.make_move(move.piece, move.to_idx, move.promotion)
+        white_to_move = not white_to_move
+        seen[game_state.zobrist_key] = seen.get(game_state.zobrist_key, 0) + 1
+
+    return GameResult(
+        opening,
+        white.name,
+        black.name,
+        result,
+        termination,
+        moves,
+        time.perf_counter() - start,
+    )
+
+
+# ===============================================================
+# PGN
+# ===============================================================
+
+
+def to_pgn(game: GameResult, round_number: int) -> str:
+    g = GameState.from_fen(game.opening)
+    tags = {
+        "Event": "Self-play",
+        "Site": "?",
+        "Date": date.today().strftime("%Y.%m.%d"),
+        "Round": str(round_number),
+        "White": game.white,
+        "Black": game.black,
+        "Result": game.result,
+        "SetUp": "1",
+        "FEN": game.opening,
+        "PlyCount": str(len(game.moves)),
+        "Termination": game.termination,
+    }
+    header = "\n".join(f'[{tag} "{value}"]' for tag, value in tags.items())
+
+    tokens: list[str] = []
+    move_number = g.full_moves
+    white_to_move = g.active_color == WHITE
+    if not white_to_move and game.moves:
+        tokens.append(f"{move_number}...")
+    for san in game.moves:
+        if white_to_move:
+            tokens.append(f"{move_number}.")
+        tokens.append(san)
+        if not white_to_move:
+            move_number += 1
+        white_to_move = not white_to_move
+    tokens.append(game.result)
+
+    lines: list[str] = []
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return header + "\n\n" + "\n".join(lines) + "\n"
+
+
+# ===============================================================
+# STATISTICS
+# ===============================================================
+
+
+@dataclass
+class MatchScore:
+    """Wins, draws and losses of the first engine"""
+
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def add(self, game: GameResult, first: str) -> None:
+        if game.result == "1/2-1/2":
+            self.draws += 1
+        elif (game.result == "1-0") == (game.white == first):
+            self.wins += 1
+        else:
+            self.losses += 1
+
+    def variance(self) -> float:
+        """Variance of a single game score"""
+        s = self.score
+        return (
+            self.wins * (1 - s) ** 2 + self.draws * (0.5 - s) ** 2 + self.losses * s**2
+        ) / self.games
+
+    def elo(self) -> tuple[float, float]:
+        """Elo difference and its 95% error margin"""
+        if not self.games:
+            return 0.0, math.inf
+        margin = 1.96 * math.sqrt(self.variance() / self.games)
+        elo = score_to_elo(self.score)
+        high = score_to_elo(min(self.score + margin, 1))
+        low = score_to_elo(max(self.score - margin, 0))
+        return elo, (high - low) / 2
+
+    def llr(self, elo0: float = SPRT_ELO0, elo1: float = SPRT_ELO1) -> float:
+        """
+        Log-likelihood ratio of H1 (elo1) against H0 (elo0), normal
+        approximation of the trinomial game outcomes.
+        """
+        if not self.wins + self.losses or not self.games:
+            return 0.0
+        variance = self.variance()
+        if variance == 0:
+            return 0.0
+        s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+        return (s1 - s0) * (2 * self.score - s0 - s1) * self.games / (2 * variance)
+
+
+def score_to_elo(score: float) -> float:
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def sprt_bounds(
+    alpha: float = SPRT_ALPHA, beta: float = SPRT_BETA
+) -> tuple[float, float]:
+    """Lower (accept H0) and upper (accept H1) bounds of the LLR"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_decision(
+    score: MatchScore,
+    elo0: float = SPRT_ELO0,
+    elo1: float = SPRT_ELO1,
+    alpha: float = SPRT_ALPHA,
+    beta: float = SPRT_BETA,
+) -> str | None:
+    """'H0', 'H1' or None while the test has to go on"""
+    lower, upper = sprt_bounds(alpha, beta)
+    llr = score.llr(elo0, elo1)
+    if llr <= lower:
+        return "H0"
+    if llr >= upper:
+        return "H1"
+    return None
+
+
+# ===============================================================
+# MATCH
+# ===============================================================
+
+
+@dataclass
+class MatchResult:
+    score: MatchScore
+    games: list[GameResult]
+    seconds: float
+    sprt: str | None
+
+    @property
+    def games_per_hour(self) -> float:
+        return len(self.games) / self.seconds * 3600 if self.seconds else 0.0
+
+
+def run_match(
+    first: EngineConfig,
+    second: EngineConfig,
+    openings: list[str] = OPENINGS,
+    rounds: int = 1,
+    workers: int | None = None,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    sprt: tuple[float, float] | None = None,
+    pgn_path: str | None = None,
+) -> MatchResult:
+    """
+    Play every opening `rounds` times with both colors, games running in a
+    process pool.
+
+    With `sprt` = (elo0, elo1) the match stops as soon as the test accepts
+    one of the hypotheses, pending games being cancelled.
+    """
+    if first.name == second.name:
+        raise ValueError("Engines need distinct names to be told apart")
+
+    score = MatchScore()
+    games: list[GameResult] = []
+    decision: str | None = None
+    start = time.perf_counter()
+    pgn = open(pgn_path, "w") if pgn_path else None
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        pending: set[Future] = set()
+        for _ in range(rounds):
+            for opening in openings:
+                pending.add(pool.submit(play_game, opening, first, second, max_plies))
+                pending.add(pool.submit(play_game, opening, second, first, max_plies))
+
+        try:
+            while pending and decision is None:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    game = future.result()
+                    games.append(game)
+                    score.add(game, first.name)
+                    if pgn is not None:
+                        pgn.write(to_pgn(game, len(games)) + "\n")
+                if sprt is not None:
+                    decision = sprt_decision(score, *sprt)
+        finally:
+            for future in pending:
+                future.cancel()
+            if pgn is not None:
+                pgn.close()
+
+    return MatchResult(score, games, time.perf_counter() - start, decision)
+
+
+def report(result: MatchResult, first: str, second: str) -> str:
+    s = result.score
+    elo, margin = s.elo()
+    lines = [
+        f"{first} vs {second}: {s.games} games,"
+        f" {result.games_per_hour:.0f} games/hour",
+        f"W/D/L: {s.wins}/{s.draws}/{s.losses}, score {100 * s.score:.1f}%",
+        f"Elo: {elo:+.1f} +/- {margin:.1f} (95%)",
+    ]
+    if result.sprt is not None:
+        lines.append(f"SPRT: {result.sprt} accepted (LLR {s.llr():.2f})")
+    return "\n".join(lines)
+
+
+def parse_engine(spec: str) -> EngineConfig:
+    """
+    name:depth[:movetime|<nodes>n][:module.CONSTANT=value,...] eg.
+    'new:3::evaluate_position.DOUBLED_PAWN=-0.3' or 'old:8:20000n'
+    """
+    parts = spec.split(":")
+    config = EngineConfig(parts[0], int(parts[1]) if len(parts) > 1 else 3)
+    if len(parts) > 2 and parts[2].endswith("n"):
+        config.nodes = int(parts[2][:-1])
+    elif len(parts) > 2 and parts[2]:
+        config.movetime = float(parts[2])
+    if len(parts) > 3 and parts[3]:
+        for override in parts[3].split(","):
+            path, _, value = override.partition("=")
+            config.overrides[path] = float(value)
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Engine self-play match, run from the repository root "
+        "with `python -m benchmarks.selfplay`"
+    )
+    parser.add_argument("first", type=parse_engine, help=parse_engine.__doc__)
+    parser.add_argument("second", type=parse_engine)
+    parser.add_argument("-r", "--rounds", type=int, default=1)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument(
+        "--sprt",
+        nargs=2,
+        type=float,
+        metavar=("ELO0", "ELO1"),
+        help="stop when the SPRT accepts elo0 or elo1",
+    )
+    parser.add_argument("--pgn", default="selfplay.pgn")
+    args = parser.parse_args()
+
+    result = run_match(
+        args.first,
+        args.second,
+        rounds=args.rounds,
+        workers=args.workers,
+        max_plies=args.max_plies,
+        sprt=tuple(args.sprt) if args.sprt else None,
+        pgn_path=args.pgn,
+    )
+    print(report(result, args.first.name, args.second.name))
+
+
+if __name__ == "__main__":
+    main()
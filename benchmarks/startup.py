@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from table_cache import TABLE_CACHE_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+SEARCH_DEPTH = 2
+
+# Run by a fresh interpreter: timings of the imports, of the starting position
+# and of a first search, and whether profiling modules were imported
+SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+from game_state import GameState
+from move_selection import minmax_selection
+imported = time.perf_counter()
+game_state = GameState.starting_position()
+position = time.perf_counter()
+minmax_selection(game_state, {depth})
+searched = time.perf_counter()
+print(json.dumps({{
+    "imports": imported - start,
+    "starting_position": position - imported,
+    "first_search": searched - position,
+    "profiler_imported": "cProfile" in sys.modules
+    or "benchmarks.profiler" in sys.modules,
+}}))
+"""
+
+
+def run_once(depth: int, table_cache: str) -> dict:
+    """Timings of one fresh process, `total` including interpreter startup"""
+    env = {**os.environ, TABLE_CACHE_ENV: table_cache}
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(depth=depth)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    total = time.perf_counter() - start
+    return {**json.loads(output), "total": total}
+
+
+def measure_startup(runs: int = RUNS, depth: int = SEARCH_DEPTH) -> dict[str, dict]:
+    """
+    Median timings over `runs` processes for each state of the table cache:
+        - cold: the tables are built and the cache file written
+        - warm: the tables are read from the cache file
+        - disabled: the tables are built, no file is used
+    """
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tables.marshal")
+        modes = {"cold": path, "warm": path, "disabled": ""}
+        for mode, table_cache in modes.items():
+            samples = []
+            for _ in range(runs):
+                if mode == "cold" and os.path.exists(path):
+                    os.remove(path)
+                samples.append(run_once(depth, table_cache))
+            results[mode] = {
+                key: statistics.median(sample[key] for sample in samples)
+                for key in ("imports", "starting_position", "first_search", "total")
+            }
+            results[mode]["profiler_imported"] = any(
+                sample["profiler_imported"] for sample in samples
+            )
+    return results
+
+
+def format_results(results: dict[str, dict]) -> str:
+    lines = [
+        f"{'cache':<9} {'imports':>9} {'position':>9} {'search':>9} {'total':>9}"
+    ]
+    for mode, r in results.items():
+        lines.append(
+            f"{mode:<9} {1000 * r['imports']:>7.1f}ms"
+            f" {1000 * r['starting_position']:>7.1f}ms"
+            f" {1000 * r['first_search']:>7.1f}ms {1000 * r['total']:>7.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cold start time of a new engine process, run from the "
+        "repository root with `python -m benchmarks.startup`"
+    )
+    parser.add_argument("-n", "--runs", type=int, default=RUNS)
+    parser.add_argument("-d", "--depth", type=int, default=SEARCH_DEPTH)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    results = measure_startup(args.runs, args.depth)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(format_results(results))
+    if any(r["profiler_imported"] for r in results.values()):
+        print("Warning: the engine imports the profiler")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from collections.abc import Iterator
 from dataclasses import dataclass
 import logging
+import re
 
 from config import (
     FEN_CONVERSION,
@@ -31,6 +32,10 @@ from config import (
 
 logger = logging.getLogger(__name__)
 
+FEN_PATTERN = re.compile(
+    r"^([1-8pPrRnNbBqQkK/]+) ([wb]) ([KQkq-]+) ([a-h][1-8]|-) (\d+) (\d+)$"
+)
+
 PIECE_SYMBOLS = {
     EMPTY_SQUARE: "·",
     WHITE_PAWN: "♙",
@@ -284,17 +289,11 @@ def find_pieces(
 
 def parse_fen_to_board(fen: str) -> list[int]:
     """ """
-    import re
-
-    pattern = r"^([1-8pPrRnNbBqQkK/]+) ([wb]) ([KQkq-]+) ([a-h][1-8]|-) (\d+) (\d+)$"
-    matches = re.match(pattern, fen)
+    matches = FEN_PATTERN.match(fen)
 
     if matches is None:
         raise ValueError("Wrong fen string input")
 
-    for match in matches.groups():
-        print(match)
-
     board_match, active_color, castling, en_passant, half_moves, full_moves = (
         matches.groups()
     )
@@ -316,7 +315,7 @@ def parse_fen_to_board(fen: str) -> list[int]:
 def parse_fen_to_chess_game(fen: str): ...
 
 
-@dataclass
+@dataclass(slots=True)
 class BoardState:
     w_pieces: list[int]
     w_idx: list[int]
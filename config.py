@@ -49,19 +49,24 @@ BOARD_TO_FEN = {v: k for k, v in FEN_CONVERSION.items()}
 ###########################
 
 
-@dataclass
+# Slotted: no per-instance __dict__, these are created by the million during
+# search. Frozen dataclasses and NamedTuples are slower to construct.
+
+
+@dataclass(slots=True)
 class Piece:
     piece: int
     index: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Move:
     piece: Piece
     to_idx: int
+    promotion: int | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PieceMoves:
     pieces: list[Piece] = field(default_factory=list)
     move_list: list[list[int]] = field(default_factory=list)
@@ -70,38 +75,49 @@ class PieceMoves:
         return len(self.pieces) > 0
 
 
-@dataclass
+# Castling rights bits
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 0b1111
+KINGSIDE_BIT = {WHITE: WHITE_KINGSIDE, BLACK: BLACK_KINGSIDE}
+QUEENSIDE_BIT = {WHITE: WHITE_QUEENSIDE, BLACK: BLACK_QUEENSIDE}
+
+
+@dataclass(slots=True)
 class CastlingState:
-    white_kingside: bool = True
-    white_queenside: bool = True
-    black_kingside: bool = True
-    black_queenside: bool = True
+    """Castling rights packed into 4 bits: K=1, Q=2, k=4, q=8"""
+
+    bits: int = ALL_CASTLING
+
+    @property
+    def white_kingside(self) -> bool:
+        return bool(self.bits & WHITE_KINGSIDE)
+
+    @property
+    def white_queenside(self) -> bool:
+        return bool(self.bits & WHITE_QUEENSIDE)
+
+    @property
+    def black_kingside(self) -> bool:
+        return bool(self.bits & BLACK_KINGSIDE)
+
+    @property
+    def black_queenside(self) -> bool:
+        return bool(self.bits & BLACK_QUEENSIDE)
 
     def can_castle_kingside(self, color: int) -> bool:
-        return self.white_kingside if color == WHITE else self.black_kingside
+        return bool(self.bits & KINGSIDE_BIT[color])
 
     def can_castle_queenside(self, color: int) -> bool:
-        return self.white_queenside if color == WHITE else self.black_queenside
+        return bool(self.bits & QUEENSIDE_BIT[color])
 
     def disable_kingside(self, color: int):
-        if color == WHITE:
-            self.white_kingside = False
-        else:
-            self.black_kingside = False
+        self.bits &= ~KINGSIDE_BIT[color]
 
     def disable_queenside(self, color: int):
-        if color == WHITE:
-            self.white_queenside = False
-        else:
-            self.black_queenside = False
+        self.bits &= ~QUEENSIDE_BIT[color]
 
     def disable_all(self, color: int):
-        if color == WHITE:
-            self.disable_kingside(WHITE)
-            self.disable_queenside(WHITE)
-        else:
-            self.disable_kingside(BLACK)
-            self.disable_queenside(BLACK)
+        self.bits &= ~(KINGSIDE_BIT[color] | QUEENSIDE_BIT[color])
 
     def to_fen(self) -> str:
         fen: str = ""
@@ -116,26 +132,30 @@ class CastlingState:
         return fen or "-"
 
     def copy(self) -> "CastlingState":
-        return CastlingState(
-            white_kingside=self.white_kingside,
-            white_queenside=self.white_queenside,
-            black_kingside=self.black_kingside,
-            black_queenside=self.black_queenside,
-        )
+        return CastlingState(self.bits)
 
-    @classmethod
-    def from_fen(cls, fen: str) -> "CastlingState":
-        if fen == "-":
-            return cls(False, False, False, False)
-        return cls(
-            white_kingside="K" in fen,
-            white_queenside="Q" in fen,
-            black_kingside="k" in fen,
-            black_queenside="q" in fen,
-        )
+    def to_bits(self) -> int:
+        return self.bits
 
+    @classmethod
+    def from_bits(cls, bits: int) -> "CastlingState":
+        return cls(bits & ALL_CASTLING)
 
-@dataclass
+    @classmethod
+    def from_fen(cls, fen: str) -> "CastlingState":
+        bits = 0
+        for char, bit in (
+            ("K", WHITE_KINGSIDE),
+            ("Q", WHITE_QUEENSIDE),
+            ("k", BLACK_KINGSIDE),
+            ("q", BLACK_QUEENSIDE),
+        ):
+            if char in fen:
+                bits |= bit
+        return cls(bits)
+
+
+@dataclass(slots=True)
 class PinnedPiece:
     piece: Piece
     pin_vector: tuple[int, int]
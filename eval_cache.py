@@ -0,0 +1,173 @@
+import threading
+
+DEFAULT_EVAL_CACHE_SIZE = 1 << 16
+DEFAULT_EVAL_CACHE_WAYS = 4
+DEFAULT_PAWN_TABLE_SIZE = 1 << 14
+
+
+class EvalCache:
+    """
+    Fixed size cache of static evaluations keyed by zobrist key.
+
+    Slots are grouped in buckets of `ways` entries, the bucket being picked
+    by the low bits of the key. Each slot stores the full key to verify a
+    hit, and a bucket is kept in most recently used order so a full bucket
+    evicts its least recently used entry.
+
+    A slot holds a (key, value) tuple, replaced as a whole, so threads
+    sharing the cache always read a value with its own key. Concurrent
+    updates of a bucket may drop an entry and the counters may miss some
+    lookups, which only costs hits.
+    """
+
+    def __init__(
+        self,
+        size: int = DEFAULT_EVAL_CACHE_SIZE,
+        ways: int = DEFAULT_EVAL_CACHE_WAYS,
+    ):
+        self.ways: int = ways
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._allocate(size)
+
+    def _allocate(self, size: int) -> None:
+        if size < self.ways or size % self.ways:
+            raise ValueError("Cache size must be a multiple of the number of ways")
+        buckets = size // self.ways
+        if buckets & (buckets - 1):
+            raise ValueError("Number of buckets (size / ways) must be a power of two")
+
+        self.size: int = size
+        self._mask: int = buckets - 1
+        self._entries: list[tuple[int, float] | None] = [None] * size
+
+    def __len__(self) -> int:
+        return self.size - self._entries.count(None)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: int) -> float | None:
+        entries = self._entries
+        start = (key & self._mask) * self.ways
+        for slot in range(start, start + self.ways):
+            entry = entries[slot]
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                if slot != start:
+                    self._move_to_front(start, slot, entry)
+                return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: float) -> None:
+        entries = self._entries
+        start = (key & self._mask) * self.ways
+        last = start + self.ways - 1
+        slot = start
+        entry = entries[slot]
+        while slot < last and entry is not None and entry[0] != key:
+            slot += 1
+            entry = entries[slot]
+        if entry is not None and entry[0] != key:
+            self.evictions += 1
+        self._move_to_front(start, slot, (key, value))
+
+    def _move_to_front(self, start: int, slot: int, entry: tuple[int, float]) -> None:
+        """Shift the bucket entries before `slot` back by one, put `entry` first"""
+        entries = self._entries
+        entries[start : slot + 1] = [entry, *entries[start:slot]]
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        self._entries = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def resize(self, size: int) -> None:
+        """Change the number of slots, keeping as many entries as fit"""
+        entries = [entry for entry in self._entries if entry is not None]
+        evictions = self.evictions
+        self._allocate(size)
+        # Reinsert least recently used entries first so they are evicted first
+        for key, value in reversed(entries):
+            self.put(key, value)
+        self.evictions = evictions
+
+
+class PawnHashTable:
+    """
+    Direct mapped table of pawn structure evaluations keyed by pawn zobrist
+    key. An entry is (score, w_passed, b_passed), see
+    `evaluate_position.evaluate_pawn_structure`.
+
+    Pawn structures change rarely during a search, so a small table serves
+    most nodes. A slot holds a (key, entry) tuple, so like `EvalCache` the
+    table can be shared by threads.
+    """
+
+    def __init__(self, size: int = DEFAULT_PAWN_TABLE_SIZE):
+        self.hits: int = 0
+        self.misses: int = 0
+        self._allocate(size)
+
+    def _allocate(self, size: int) -> None:
+        if size < 1 or size & (size - 1):
+            raise ValueError("Pawn table size must be a power of two")
+        self.size: int = size
+        self._mask: int = size - 1
+        self._entries: list[tuple[int, tuple[float, int, int]] | None] = [None] * size
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: int) -> tuple[float, int, int] | None:
+        stored = self._entries[key & self._mask]
+        if stored is not None and stored[0] == key:
+            self.hits += 1
+            return stored[1]
+        self.misses += 1
+        return None
+
+    def put(self, key: int, entry: tuple[float, int, int]) -> None:
+        self._entries[key & self._mask] = (key, entry)
+
+    def clear(self) -> None:
+        self._allocate(self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, size: int) -> None:
+        """Change the number of slots, entries are dropped"""
+        self._allocate(size)
+
+
+# ===============================================================
+# PER THREAD CACHES
+# ===============================================================
+
+# Caches of each thread, so that no cache is shared between threads unless
+# it is passed explicitly
+_thread_caches = threading.local()
+
+
+def thread_eval_cache() -> EvalCache:
+    """Eval cache of the calling thread, the default of a new `GameState`"""
+    cache = getattr(_thread_caches, "eval_cache", None)
+    if cache is None:
+        cache = _thread_caches.eval_cache = EvalCache()
+    return cache
+
+
+def thread_pawn_table() -> PawnHashTable:
+    """Pawn hash table of the calling thread, the default of a new `GameState`"""
+    table = getattr(_thread_caches, "pawn_table", None)
+    if table is None:
+        table = _thread_caches.pawn_table = PawnHashTable()
+    return table
@@ -1,7 +1,119 @@
-from config import EMPTY_SQUARE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE
+from config import EMPTY_SQUARE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK
 
 EVAL_DICT = {PAWN: 1, KNIGHT: 3, BISHOP: 3, ROOK: 5, QUEEN: 9, KING: 0}
 
+# ------ PAWN STRUCTURE ------ #
+
+DOUBLED_PAWN = -0.15
+ISOLATED_PAWN = -0.15
+BACKWARD_PAWN = -0.1
+# Indexed by the rank of the pawn counted from its own side (0 based)
+PASSED_PAWN = [0, 0.05, 0.1, 0.2, 0.35, 0.6, 1.0, 0]
+
+
+def build_pawn_masks() -> tuple[
+    list[int], dict[int, list[int]], dict[int, list[int]], dict[int, list[int]]
+]:
+    """
+    Precompute the bitboards used by the pawn structure evaluation.
+
+    Returns:
+        - adjacent_files[file]: squares of the files next to `file`
+        - passed_span[color][square]: squares in front of a pawn on its file
+          and the adjacent ones, which must be free of ennemy pawns for it to
+          be passed
+        - support_span[color][square]: squares on the adjacent files level
+          with or behind a pawn, where friendly pawns can support it
+        - stop_attackers[color][square]: squares from where an ennemy pawn
+          attacks the square in front of a pawn
+    """
+    file_masks = [sum(1 << (rank * 8 + file) for rank in range(8)) for file in range(8)]
+    adjacent_files = [
+        (file_masks[file - 1] if file > 0 else 0)
+        | (file_masks[file + 1] if file < 7 else 0)
+        for file in range(8)
+    ]
+
+    passed_span: dict[int, list[int]] = {WHITE: [], BLACK: []}
+    support_span: dict[int, list[int]] = {WHITE: [], BLACK: []}
+    stop_attackers: dict[int, list[int]] = {WHITE: [], BLACK: []}
+
+    for color, forward in ((WHITE, 1), (BLACK, -1)):
+        for square in range(64):
+            file, rank = square % 8, square // 8
+            files = [f for f in (file - 1, file, file + 1) if 0 <= f < 8]
+            ahead = [r for r in range(8) if (r - rank) * forward > 0]
+            behind = [r for r in range(8) if (r - rank) * forward <= 0]
+
+            passed_span[color].append(
+                sum(1 << (r * 8 + f) for r in ahead for f in files)
+            )
+            support_span[color].append(
+                sum(1 << (r * 8 + f) for r in behind for f in files if f != file)
+            )
+            attacker_rank = rank + 2 * forward
+            stop_attackers[color].append(
+                sum(1 << (attacker_rank * 8 + f) for f in files if f != file)
+                if 0 <= attacker_rank < 8
+                else 0
+            )
+
+    return adjacent_files, passed_span, support_span, stop_attackers
+
+
+ADJACENT_FILES, PASSED_SPAN, SUPPORT_SPAN, STOP_ATTACKERS = build_pawn_masks()
+
+
+def evaluate_pawn_structure(board: list[int]) -> tuple[float, int, int]:
+    """
+    Score the pawn structure: doubled, isolated and backward pawns are
+    penalized, passed pawns get a bonus growing as they advance.
+
+    Returns:
+        - (score, w_passed, b_passed): white relative score, and bitboards of
+          the white and black passed pawns
+    """
+    pawns: dict[int, list[int]] = {WHITE: [], BLACK: []}
+    bitboards: dict[int, int] = {WHITE: 0, BLACK: 0}
+    for square, piece in enumerate(board):
+        if piece == PAWN:
+            pawns[WHITE].append(square)
+            bitboards[WHITE] |= 1 << square
+        elif piece == -PAWN:
+            pawns[BLACK].append(square)
+            bitboards[BLACK] |= 1 << square
+
+    score: float = 0
+    passed: dict[int, int] = {WHITE: 0, BLACK: 0}
+
+    for color, ennemy, sign in ((WHITE, BLACK, 1), (BLACK, WHITE, -1)):
+        own = bitboards[color]
+        other = bitboards[ennemy]
+        files: list[int] = [0] * 8
+
+        for square in pawns[color]:
+            file = square % 8
+            files[file] += 1
+
+            if not PASSED_SPAN[color][square] & other:
+                passed[color] |= 1 << square
+                relative_rank = square // 8 if color == WHITE else 7 - square // 8
+                score += sign * PASSED_PAWN[relative_rank]
+
+            if not ADJACENT_FILES[file] & own:
+                score += sign * ISOLATED_PAWN
+            elif (
+                not SUPPORT_SPAN[color][square] & own
+                and STOP_ATTACKERS[color][square] & other
+            ):
+                score += sign * BACKWARD_PAWN
+
+        for count in files:
+            if count > 1:
+                score += sign * DOUBLED_PAWN * (count - 1)
+
+    return round(score, 2), passed[WHITE], passed[BLACK]
+
 
 def evaluate_position(
     active_color: int,
@@ -9,6 +121,7 @@ def evaluate_position(
     b_piece_list: list[int],
     checkmate: bool,
     draw: bool,
+    pawn_structure: float = 0,
 ) -> float:
     if draw:
         return 0
@@ -23,7 +136,7 @@ def evaluate_position(
         for piece in b_piece_list:
             b_score += EVAL_DICT[abs(piece)]
 
-        return w_score - b_score
+        return w_score - b_score + pawn_structure
 
 
 if __name__ == "__main__":
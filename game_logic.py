@@ -1,8 +1,11 @@
+import attack_tables as at
 import chess_board as cb
 import move_generation as mv
 import logging
 
+from attack_tables import occupancy
 from config import (
+    Move,
     Piece,
     PieceMoves,
     CastlingState,
@@ -32,82 +35,100 @@ from config import (
 
 logger = logging.getLogger(__name__)
 
+# Piece values used by the static exchange evaluation. The king is worth more
+# than anything else so that capturing with it into an attacked square never
+# pays off.
+SEE_VALUES = {PAWN: 1, KNIGHT: 3, BISHOP: 3, ROOK: 5, QUEEN: 9, KING: 100}
+
+DIRECTIONS: list[tuple[int, int]] = [
+    # files
+    (0, 1),
+    (1, 0),
+    (-1, 0),
+    (0, -1),
+    # diagonals
+    (1, 1),
+    (-1, 1),
+    (1, -1),
+    (-1, -1),
+]
+
 
 def analyze_king_safety(
-    board: list[int], king_square_idx: int, color: int
+    board: list[int],
+    king_square_idx: int,
+    color: int,
+    board_state: cb.BoardState | None = None,
 ) -> tuple[list[Piece], list[PinnedPiece]]:
     """
     Scan for checking pieces and pinned pieces.
 
-    If multiple checking pieces are found at some point,
-    terminate and return only the checking pieces.
+    Every ennemy piece is looked up in the attack tables from the king
+    square: a slider on one of the king's lines checks when the squares
+    between them are empty and pins the only friendly piece standing there.
+
+    If multiple checking pieces are found,
+    return only the checking pieces.
     -> the king has to move so pinned pieces dont matter
     """
-    # if abs(board[king_square_idx]) != KING:
-    #    raise ValueError(
-    #        "Can't check for pin/check, piece is not a king",
-    #    )
-
-    file, rank = cb.parse_index(king_square_idx)
+    if board_state is None:
+        board_state = cb.BoardState.from_board(board)
+    ennemy_color = BLACK if color == WHITE else WHITE
+    e_piece_list, e_idx_list, _ = board_state.get_color_state(ennemy_color)
+    occupied = occupancy(board_state.w_idx) | occupancy(board_state.b_idx)
 
     checking_pieces: list[Piece] = []
     pinned_pieces: list[PinnedPiece] = []
-    check_count: int = 0
-
-    directions = [
-        # files
-        (0, 1),
-        (1, 0),
-        (-1, 0),
-        (0, -1),
-        # diagonals
-        (1, 1),
-        (-1, 1),
-        (1, -1),
-        (-1, -1),
-    ]
-
-    # ------ KNIGHT CHECK ------ #
-    knight_threat = knight_check(board, file, rank, color)
-    if knight_threat is not None:
-        checking_pieces.append(knight_threat)
-        check_count += 1
 
-    # ------ PAWN CHECK ------ #
-    pawn_delta = [(1, 1), (-1, 1)] if color == WHITE else [(1, -1), (-1, -1)]
-
-    threatening_piece = BLACK_PAWN if color == WHITE else WHITE_PAWN
-    for file_delta, rank_delta in pawn_delta:
-        new_file = file + file_delta
-        new_rank = rank + rank_delta
-        if new_file > 8 or new_file < 1 or new_rank > 8 or new_rank < 1:
+    # An ennemy pawn checks from where a pawn of ours on the king square
+    # would attack
+    pawn_attacks = at.PAWN_ATTACKS[color][king_square_idx]
+    knight_attacks = at.KNIGHT_ATTACKS[king_square_idx]
+    diagonal_rays = at.DIAGONAL_RAYS[king_square_idx]
+    orthogonal_rays = at.ORTHOGONAL_RAYS[king_square_idx]
+    between = at.BETWEEN[king_square_idx]
+
+    for piece, idx in zip(e_piece_list, e_idx_list):
+        kind = abs(piece)
+        bit = 1 << idx
+        if kind == PAWN:
+            if pawn_attacks & bit:
+                checking_pieces.append(Piece(piece, idx))
+            continue
+        if kind == KNIGHT:
+            if knight_attacks & bit:
+                checking_pieces.append(Piece(piece, idx))
+            continue
+        if kind == KING:
+            continue
+        rays = 0
+        if kind != ROOK:
+            rays |= diagonal_rays
+        if kind != BISHOP:
+            rays |= orthogonal_rays
+        if not rays & bit:
             continue
-        square_idx = cb.parse_coordinates_to_idx(new_file, new_rank)
-        piece_on_board = board[square_idx]
-
-        if piece_on_board == threatening_piece:
-            checking_pieces.append(Piece(piece_on_board, square_idx))
-            check_count += 1
-
-    if check_count > 1:
-        return (checking_pieces, pinned_pieces)
-
-    # ------ SLIDING PIECES ------ #
-
-    for direction in directions:
-        checking_piece, pinned_piece = directional_check(
-            board, file, rank, color, direction
-        )
-        if checking_piece is not None:
-            checking_pieces.append(checking_piece)
-            check_count += 1
-
-        if check_count > 1:
-            return (checking_pieces, pinned_pieces)
-
-        if pinned_piece is not None:
-            pinned_pieces.append(pinned_piece)
 
+        blockers = between[idx] & occupied
+        if not blockers:
+            checking_pieces.append(Piece(piece, idx))
+        # A single friendly piece between the slider and the king is pinned
+        elif not blockers & (blockers - 1):
+            pinned_idx = blockers.bit_length() - 1
+            pinned = board[pinned_idx]
+            if (pinned > 0) == (color == WHITE):
+                file_delta = idx % 8 - king_square_idx % 8
+                rank_delta = idx // 8 - king_square_idx // 8
+                pin_vector = (
+                    (file_delta > 0) - (file_delta < 0),
+                    (rank_delta > 0) - (rank_delta < 0),
+                )
+                pinned_pieces.append(
+                    PinnedPiece(Piece(pinned, pinned_idx), pin_vector, idx)
+                )
+
+    if len(checking_pieces) > 1:
+        return (checking_pieces, [])
     return (checking_pieces, pinned_pieces)
 
 
@@ -220,5 +241,111 @@ def knight_check(board: list[int], file: int, rank: int, color: int) -> Piece |
     return None
 
 
+def least_valuable_attacker(board: list[int], square_idx: int, color: int) -> Piece | None:
+    """
+    Find the cheapest piece of `color` attacking `square_idx`.
+
+    Sliders are found with `directional_check` from the square, so a piece
+    removed from `board` uncovers the x-ray attacker standing behind it.
+    Pins are ignored.
+    """
+    ennemy_color = BLACK if color == WHITE else WHITE
+    file, rank = cb.parse_index(square_idx)
+
+    # ------ PAWNS ------ #
+    # A pawn of `color` attacks the square from where an ennemy pawn on the
+    # square would attack.
+    pawn_rank = rank - 1 if color == WHITE else rank + 1
+    if 1 <= pawn_rank <= 8:
+        pawn = WHITE_PAWN if color == WHITE else BLACK_PAWN
+        for idx in mv.generate_pawn_controlled_squares(board, square_idx, ennemy_color):
+            if board[idx] == pawn:
+                return Piece(pawn, idx)
+
+    # ------ KNIGHTS ------ #
+    knight = knight_check(board, file, rank, ennemy_color)
+    if knight is not None:
+        return knight
+
+    # ------ SLIDING PIECES ------ #
+    best: Piece | None = None
+    for direction in DIRECTIONS:
+        slider, _ = directional_check(board, file, rank, ennemy_color, direction)
+        if slider is not None and (
+            best is None or SEE_VALUES[abs(slider.piece)] < SEE_VALUES[abs(best.piece)]
+        ):
+            best = slider
+    if best is not None:
+        return best
+
+    # ------ KING ------ #
+    king = WHITE_KING if color == WHITE else BLACK_KING
+    for idx in mv.generate_king_controlled_squares(board, square_idx, color):
+        if board[idx] == king:
+            return Piece(king, idx)
+
+    return None
+
+
+def see(board: list[int], move: Move) -> int:
+    """
+    Static exchange evaluation of `move`: the material balance, for the side
+    making it, of the capture sequence on `move.to_idx` when both sides keep
+    recapturing with their least valuable attacker and may stop at any point.
+
+    Works on a copy of `board`, the game state is never touched.
+
+    Returns:
+        - 0 for an even trade, > 0 when the move wins material, < 0 when it loses material.
+    """
+    board = board.copy()
+    target = move.to_idx
+    mover = move.piece.piece
+    color = WHITE if mover > 0 else BLACK
+
+    captured = board[target]
+    gain: list[int] = [SEE_VALUES[abs(captured)] if captured != EMPTY_SQUARE else 0]
+
+    # En passant: pawn moving diagonally to an empty square
+    if (
+        abs(mover) == PAWN
+        and captured == EMPTY_SQUARE
+        and (target - move.piece.index) % 8 != 0
+    ):
+        gain[0] = SEE_VALUES[PAWN]
+        board[target - 8 if color == WHITE else target + 8] = EMPTY_SQUARE
+
+    piece_on_square = mover
+    if move.promotion is not None:
+        piece_on_square = move.promotion
+        gain[0] += SEE_VALUES[abs(move.promotion)] - SEE_VALUES[PAWN]
+
+    board[move.piece.index] = EMPTY_SQUARE
+    board[target] = piece_on_square
+
+    color = BLACK if color == WHITE else WHITE
+    depth = 0
+    while True:
+        attacker = least_valuable_attacker(board, target, color)
+        if attacker is None:
+            break
+        depth += 1
+        gain.append(SEE_VALUES[abs(piece_on_square)] - gain[depth - 1])
+        # Even unanswered this capture loses, so the side to move stands pat
+        if max(-gain[depth - 1], gain[depth]) < 0:
+            depth -= 1
+            break
+        board[attacker.index] = EMPTY_SQUARE
+        board[target] = attacker.piece
+        piece_on_square = attacker.piece
+        color = BLACK if color == WHITE else WHITE
+
+    while depth > 0:
+        gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        depth -= 1
+
+    return gain[0]
+
+
 if __name__ == "__main__":
     ...
@@ -1,6 +1,9 @@
-from typing import override
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from typing import TYPE_CHECKING, Any, override
+import struct
+
 import chess_board as cb
-import re
 
 from chess_board import (
     BoardState,
@@ -10,7 +13,13 @@ from chess_board import (
 )
 from game_logic import analyze_king_safety
 
-from evaluate_position import evaluate_position
+from eval_cache import (
+    EvalCache,
+    PawnHashTable,
+    thread_eval_cache,
+    thread_pawn_table,
+)
+from evaluate_position import evaluate_pawn_structure, evaluate_position
 
 from config import (
     BLACK_ROOK,
@@ -29,15 +38,49 @@ from config import (
     PinnedPiece,
 )
 from legal_moves import generate_legal_moves
+from zobrist import (
+    CASTLING_KEYS,
+    PIECE_KEYS,
+    SIDE_KEY,
+    compute_hash,
+    compute_pawn_hash,
+    en_passant_key,
+)
+
+if TYPE_CHECKING:
+    from position_store import PositionStore, StoredPosition
 
 FEN_START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
+# Default of the cache arguments of `GameState`: the caches of the calling
+# thread, see `eval_cache.thread_eval_cache`. None disables a cache.
+THREAD_CACHE: Any = object()
+
 # ===============================================================
 # GAMESTATE CLASS
 # ===============================================================
 
 
 class GameState:
+    __slots__ = (
+        "board",
+        "active_color",
+        "castling_state",
+        "en_passant_target",
+        "half_moves",
+        "full_moves",
+        "checking_pieces",
+        "pinned_pieces",
+        "legal_moves",
+        "eval_cache",
+        "pawn_table",
+        "board_state",
+        "zobrist_key",
+        "pawn_key",
+        "checkmate",
+        "draw",
+    )
+
     def __init__(
         self,
         board: list[int],
@@ -49,7 +92,16 @@ class GameState:
         legal_moves: PieceMoves | None = None,
         half_moves: int = 0,
         full_moves: int = 1,
+        zobrist_key: int | None = None,
+        eval_cache: EvalCache | None = THREAD_CACHE,
+        pawn_key: int | None = None,
+        pawn_table: PawnHashTable | None = THREAD_CACHE,
     ):
+        if eval_cache is THREAD_CACHE:
+            eval_cache = thread_eval_cache()
+        if pawn_table is THREAD_CACHE:
+            pawn_table = thread_pawn_table()
+
         self.board: list[int] = board
         self.active_color: int = active_color
         self.castling_state: CastlingState = castling_state
@@ -59,9 +111,25 @@ class GameState:
         self.checking_pieces: list[Piece] | None = checking_pieces
         self.pinned_pieces: list[PinnedPiece] | None = pinned_pieces
         self.legal_moves: PieceMoves | None = legal_moves
+        self.eval_cache: EvalCache | None = eval_cache
+        self.pawn_table: PawnHashTable | None = pawn_table
 
         self.board_state: BoardState = BoardState.from_board(self.board)
 
+        self.zobrist_key: int = (
+            zobrist_key
+            if zobrist_key is not None
+            else compute_hash(
+                self.board,
+                self.active_color,
+                self.castling_state,
+                self.en_passant_target,
+            )
+        )
+        self.pawn_key: int = (
+            pawn_key if pawn_key is not None else compute_pawn_hash(self.board)
+        )
+
         if self.checking_pieces is None:
             self._update_king_safety()
         if self.legal_moves is None:
@@ -97,19 +165,38 @@ class GameState:
             self.legal_moves,
             self.half_moves,
             self.full_moves,
+            self.zobrist_key,
+            self.eval_cache,
+            self.pawn_key,
+            self.pawn_table,
         )
 
+    def lookup(self, store: "PositionStore") -> "StoredPosition | None":
+        """Look this position up in a `PositionStore`, e.g. before searching it"""
+        return store.get(self)
+
     def to_fen(self) -> str:
         return game_state_to_fen(self)
 
+    def to_bytes(self) -> bytes:
+        return pack_position(
+            self.board,
+            self.active_color,
+            self.castling_state,
+            self.en_passant_target,
+            self.half_moves,
+            self.full_moves,
+        )
+
     # ---------------------------------------------------------------------
     # MAKING A MOVE
     # ---------------------------------------------------------------------
 
     def make_move(self, piece: Piece, move: int, promotion: int | None = None) -> None:
+        captured = self.board[move]
         self._update_half_moves(piece, move)
         self._update_board(piece, move, promotion)
-        self._update_castling_state(piece)
+        self._update_castling_state(piece, move, captured)
         self._update_en_passant_target(piece, move)
 
         if self.active_color == BLACK:
@@ -118,6 +205,7 @@ class GameState:
         self._update_board_state()
 
         self.active_color = WHITE if self.active_color == BLACK else BLACK
+        self.zobrist_key ^= SIDE_KEY
 
         self._update_king_safety()
         self._update_legal_moves()
@@ -129,8 +217,8 @@ class GameState:
         # Special moves?
         ## PAWN moving to last rank -> promotion
         if promotion is not None:
-            self.board[piece.index] = EMPTY_SQUARE
-            self.board[move] = promotion
+            self._set_square(piece.index, EMPTY_SQUARE)
+            self._set_square(move, promotion)
 
         ## Castling Kingside
         elif (
@@ -139,15 +227,15 @@ class GameState:
             and move in [62, 6]
         ):
             ### Mutate KING
-            self.board[piece.index] = EMPTY_SQUARE
-            self.board[move] = piece.piece
+            self._set_square(piece.index, EMPTY_SQUARE)
+            self._set_square(move, piece.piece)
 
             ### Mutate ROOK
             from_idx = 7 if self.active_color == WHITE else 63
             to_idx = 5 if self.active_color == WHITE else 61
-            self.board[from_idx] = EMPTY_SQUARE
-            self.board[to_idx] = (
-                WHITE_ROOK if self.active_color == WHITE else BLACK_ROOK
+            self._set_square(from_idx, EMPTY_SQUARE)
+            self._set_square(
+                to_idx, WHITE_ROOK if self.active_color == WHITE else BLACK_ROOK
             )
 
         ## Castling Queenside
@@ -157,34 +245,73 @@ class GameState:
             and move in [58, 2]
         ):
             ### Mutate KING
-            self.board[piece.index] = EMPTY_SQUARE
-            self.board[move] = piece.piece
+            self._set_square(piece.index, EMPTY_SQUARE)
+            self._set_square(move, piece.piece)
 
             ### Mutate ROOK
             from_idx = 0 if self.active_color == WHITE else 56
             to_idx = 3 if self.active_color == WHITE else 59
-            self.board[from_idx] = EMPTY_SQUARE
-            self.board[to_idx] = (
-                WHITE_ROOK if self.active_color == WHITE else BLACK_ROOK
+            self._set_square(from_idx, EMPTY_SQUARE)
+            self._set_square(
+                to_idx, WHITE_ROOK if self.active_color == WHITE else BLACK_ROOK
             )
+
+        ## En passant capture: remove the pawn behind the target square
+        elif (
+            abs(piece.piece) == PAWN
+            and move == self.en_passant_target
+            and (move - piece.index) % 8 != 0
+        ):
+            self._set_square(piece.index, EMPTY_SQUARE)
+            self._set_square(move, piece.piece)
+            captured_idx = move - 8 if self.active_color == WHITE else move + 8
+            self._set_square(captured_idx, EMPTY_SQUARE)
+
         # Not a special move? mutate
         else:
-            self.board[piece.index] = EMPTY_SQUARE
-            self.board[move] = piece.piece
-
-    def _update_castling_state(self, piece: Piece) -> None:
-        if piece.piece == abs(KING):
+            self._set_square(piece.index, EMPTY_SQUARE)
+            self._set_square(move, piece.piece)
+
+    def _set_square(self, square_idx: int, piece: int) -> None:
+        """Mutate one square of the board, keeping the zobrist keys in sync"""
+        old_piece = self.board[square_idx]
+        if old_piece != EMPTY_SQUARE:
+            self.zobrist_key ^= PIECE_KEYS[old_piece][square_idx]
+            if abs(old_piece) == PAWN:
+                self.pawn_key ^= PIECE_KEYS[old_piece][square_idx]
+        if piece != EMPTY_SQUARE:
+            self.zobrist_key ^= PIECE_KEYS[piece][square_idx]
+            if abs(piece) == PAWN:
+                self.pawn_key ^= PIECE_KEYS[piece][square_idx]
+        self.board[square_idx] = piece
+
+    def _update_castling_state(self, piece: Piece, move: int, captured: int) -> None:
+        self.zobrist_key ^= CASTLING_KEYS[self.castling_state.to_bits()]
+        if abs(piece.piece) == KING:
             self.castling_state.disable_all(self.active_color)
         elif abs(piece.piece) == ROOK and piece.index in [7, 63]:
             self.castling_state.disable_kingside(self.active_color)
         elif abs(piece.piece) == ROOK and piece.index in [0, 56]:
             self.castling_state.disable_queenside(self.active_color)
 
+        # Capturing a rook on its corner removes the ennemy castling right
+        ennemy = BLACK if self.active_color == WHITE else WHITE
+        if abs(captured) == ROOK:
+            if move in [7, 63]:
+                self.castling_state.disable_kingside(ennemy)
+            elif move in [0, 56]:
+                self.castling_state.disable_queenside(ennemy)
+        self.zobrist_key ^= CASTLING_KEYS[self.castling_state.to_bits()]
+
     def _update_en_passant_target(self, piece: Piece, move: int):
+        self.zobrist_key ^= en_passant_key(self.en_passant_target)
         if abs(piece.piece) == PAWN and abs(piece.index - move) == 16:
             self.en_passant_target = (
                 piece.index + 8 if self.active_color == WHITE else piece.index - 8
             )
+        else:
+            self.en_passant_target = None
+        self.zobrist_key ^= en_passant_key(self.en_passant_target)
 
     def _update_half_moves(self, piece: Piece, move: int) -> None:
         if abs(piece.piece) == PAWN or self.board[move] != EMPTY_SQUARE:
@@ -202,7 +329,9 @@ class GameState:
             else self.board_state.b_king_idx
         )
 
-        safety = analyze_king_safety(self.board, active_king_idx, self.active_color)
+        safety = analyze_king_safety(
+            self.board, active_king_idx, self.active_color, self.board_state
+        )
 
         self.checking_pieces = safety[0]
         self.pinned_pieces = safety[1]
@@ -221,30 +350,58 @@ class GameState:
         )
 
     def _update_endgame_state(self) -> None:
+        self.checkmate: bool = False
+        self.draw: bool = False
         if not self.legal_moves:
             if self.checking_pieces != []:
-                self.checkmate: bool = True
+                self.checkmate = True
             else:
-                self.draw: bool = True
+                self.draw = True
         elif self.half_moves == 100:
             self.draw = True
-        else:
-            self.checkmate = False
-            self.draw = False
 
     # ---------------------------------------------------------------------
     # POSITION EVALUATION
     # ---------------------------------------------------------------------
 
     def evaluate(self) -> float:
+        """
+        Static evaluation, white relative. Regular positions go through
+        `eval_cache`, mate and draw scores are cheap and never cached.
+        """
+        if self.checkmate or self.draw or self.eval_cache is None:
+            return self._evaluate()
+
+        eval = self.eval_cache.get(self.zobrist_key)
+        if eval is None:
+            eval = self._evaluate()
+            self.eval_cache.put(self.zobrist_key, eval)
+        return eval
+
+    def _evaluate(self) -> float:
         return evaluate_position(
             self.active_color,
             self.board_state.w_pieces,
             self.board_state.b_pieces,
             self.checkmate,
             self.draw,
+            0 if self.checkmate or self.draw else self.pawn_structure()[0],
         )
 
+    def pawn_structure(self) -> tuple[float, int, int]:
+        """
+        (score, w_passed, b_passed) of the pawn structure, looked up in
+        `pawn_table` by pawn key before being computed.
+        """
+        if self.pawn_table is None:
+            return evaluate_pawn_structure(self.board)
+
+        entry = self.pawn_table.get(self.pawn_key)
+        if entry is None:
+            entry = evaluate_pawn_structure(self.board)
+            self.pawn_table.put(self.pawn_key, entry)
+        return entry
+
     # ---------------------------------------------------------------------
     # CLASS METHOD
     # ---------------------------------------------------------------------
@@ -274,6 +431,19 @@ class GameState:
             full_moves=int(full),
         )
 
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> "GameState":
+        """Create a game from a packed position (see `pack_position`)"""
+        board, active_color, castling, en_passant, half, full = unpack_position(data)
+        return cls(
+            board=board,
+            active_color=active_color,
+            castling_state=CastlingState.from_bits(castling),
+            en_passant_target=en_passant,
+            half_moves=half,
+            full_moves=full,
+        )
+
     @classmethod
     def empty_board(cls) -> "GameState":
         """Create a game with empty board (for testing)"""
@@ -290,8 +460,7 @@ class GameState:
 
 
 def parse_fen(fen: str):
-    pattern = r"^([1-8RrNnBbQqKkPp/]+) ([wb]) ([KkQq-]+) ([a-h][1-8]|-) (\d+) (\d+)$"
-    match = re.match(pattern, fen)
+    match = cb.FEN_PATTERN.match(fen)
 
     if match is None:
         raise ValueError("Wrong fen input")
@@ -322,28 +491,28 @@ def parse_en_passant_fen(fen: str) -> int | None:
         return cb.square_to_index(fen)
 
 
+def board_to_fen(board: list[int]) -> str:
+    """Piece placement field of a FEN string, from rank 8 down to rank 1"""
+    ranks: list[str] = []
+    for rank in range(7, -1, -1):
+        row: str = ""
+        empty_count: int = 0
+        for s in board[rank * 8 : rank * 8 + 8]:
+            if s == EMPTY_SQUARE:
+                empty_count += 1
+            else:
+                if empty_count > 0:
+                    row += str(empty_count)
+                    empty_count = 0
+                row += BOARD_TO_FEN[s]
+        if empty_count > 0:
+            row += str(empty_count)
+        ranks.append(row)
+    return "/".join(ranks)
+
+
 def game_state_to_fen(game_state: GameState) -> str:
-    board: str = ""
-    square_count: int = 0
-    empty_count: int = 0
-    for s in game_state.board:
-        if s == EMPTY_SQUARE:
-            empty_count += 1
-            square_count += 1
-        else:
-            if empty_count > 0:
-                board += str(empty_count)
-                empty_count = 0
-            board += BOARD_TO_FEN[s]
-            square_count += 1
-        if square_count == 8:
-            if empty_count > 0:
-                board += str(empty_count)
-                empty_count = 0
-            board += "/"
-            square_count = 0
-
-    board = board.rstrip("/")
+    board: str = board_to_fen(game_state.board)
 
     active_color: str = "w" if game_state.active_color == WHITE else "b"
 
@@ -351,7 +520,7 @@ def game_state_to_fen(game_state: GameState) -> str:
 
     en_passant = (
         index_to_square(game_state.en_passant_target)
-        if game_state.en_passant_target
+        if game_state.en_passant_target is not None
         else "-"
     )
 
@@ -360,6 +529,125 @@ def game_state_to_fen(game_state: GameState) -> str:
     return fen
 
 
+# ===============================================================
+# BINARY POSITION FORMAT
+# ===============================================================
+
+# Fixed size record, little endian:
+#   - 32 bytes: board, one nibble per square (low nibble = even square)
+#   - 1 byte: active color (bit 0) and castling rights (bits 1-4, see `CastlingState.to_bits`)
+#   - 1 byte: en passant target square, 0xFF if none
+#   - 1 byte: half moves (capped at 255)
+#   - 2 bytes: full moves
+POSITION_STRUCT = struct.Struct("<32sBBBH")
+POSITION_SIZE = POSITION_STRUCT.size
+NO_EN_PASSANT = 0xFF
+
+# White pieces keep their value, black pieces are stored as 8 + abs(piece)
+PIECE_TO_NIBBLE: dict[int, int] = {
+    piece: piece if piece >= 0 else 8 - piece for piece in range(-6, 7)
+}
+NIBBLE_TO_PIECE: dict[int, int] = {v: k for k, v in PIECE_TO_NIBBLE.items()}
+
+# Every byte value decoded into its two squares, None for invalid nibbles
+BYTE_TO_SQUARES: list[tuple[int | None, int | None]] = [
+    (NIBBLE_TO_PIECE.get(byte & 0xF), NIBBLE_TO_PIECE.get(byte >> 4))
+    for byte in range(256)
+]
+
+
+def pack_position(
+    board: list[int],
+    active_color: int,
+    castling_state: CastlingState,
+    en_passant_target: int | None,
+    half_moves: int,
+    full_moves: int,
+) -> bytes:
+    """Pack a position into a `POSITION_SIZE` bytes record"""
+    packed_board = bytes(
+        PIECE_TO_NIBBLE[board[i]] | PIECE_TO_NIBBLE[board[i + 1]] << 4
+        for i in range(0, 64, 2)
+    )
+    return POSITION_STRUCT.pack(
+        packed_board,
+        (active_color == WHITE) | castling_state.to_bits() << 1,
+        NO_EN_PASSANT if en_passant_target is None else en_passant_target,
+        min(half_moves, 255),
+        full_moves,
+    )
+
+
+def decode_board(packed_board: bytes) -> list[int]:
+    """
+    Decode the 32 bytes board of a packed position.
+    Invalid nibbles are decoded as None.
+    """
+    return list(chain.from_iterable(map(BYTE_TO_SQUARES.__getitem__, packed_board)))
+
+
+def unpack_position(
+    data: bytes | memoryview,
+) -> tuple[list[int], int, int, int | None, int, int]:
+    """
+    Unpack a `POSITION_SIZE` bytes record.
+
+    Returns:
+        - (board, active_color, castling_bits, en_passant_target, half_moves, full_moves)
+
+    Raises:
+        ValueError
+            - wrong record size
+            - invalid piece nibble
+    """
+    if len(data) != POSITION_SIZE:
+        raise ValueError(f"A packed position is {POSITION_SIZE} bytes long")
+
+    packed_board, flags, en_passant, half, full = POSITION_STRUCT.unpack(data)
+    board = decode_board(packed_board)
+    if None in board:
+        raise ValueError("Invalid piece in packed position")
+
+    return (
+        board,
+        WHITE if flags & 1 else BLACK,
+        flags >> 1,
+        None if en_passant == NO_EN_PASSANT else en_passant,
+        half,
+        full,
+    )
+
+
+def pack_positions(game_states: Iterable[GameState]) -> bytes:
+    """Concatenate the packed records of `game_states`"""
+    return b"".join(g.to_bytes() for g in game_states)
+
+
+def iter_unpack_positions(
+    buffer: bytes | memoryview,
+) -> Iterator[tuple[list[int], int, int, int | None, int, int]]:
+    """
+    Decode consecutive packed positions straight from `buffer` (bytes,
+    memoryview or mmap), without copying it or going through strings.
+
+    Records are not validated, see `unpack_position` for the yielded tuples.
+    """
+    if len(buffer) % POSITION_SIZE:
+        raise ValueError(f"Buffer size is not a multiple of {POSITION_SIZE}")
+
+    for packed_board, flags, en_passant, half, full in POSITION_STRUCT.iter_unpack(
+        buffer
+    ):
+        yield (
+            decode_board(packed_board),
+            WHITE if flags & 1 else BLACK,
+            flags >> 1,
+            None if en_passant == NO_EN_PASSANT else en_passant,
+            half,
+            full,
+        )
+
+
 if __name__ == "__main__":
     g = GameState.from_fen(FEN_START)
     print(g)
@@ -3,6 +3,7 @@ import move_generation as mv
 import game_logic as gl
 import logging
 
+from attack_tables import occupancy
 from chess_board import ChessBoard, BoardState, create_starting_position
 from config import BLACK, WHITE, CastlingState, Piece, PieceMoves, PinnedPiece
 
@@ -33,11 +34,8 @@ def generate_legal_moves(
 
     e_piece_list, e_idx_list, _ = board_state.get_color_state(ennemy_color)
 
-    # Get king safety informations
-
-    ennemy_controlled: set[int] = mv.generate_controlled_squares(
-        board, ennemy_color, e_piece_list, e_idx_list
-    )
+    # In check, king moves are tested square by square against the ennemy
+    # pieces: the squares they control are only generated out of check
 
     ##########################################
     # ------ 2 OR MORE CHECKING PIECE ------ #
@@ -47,8 +45,13 @@ def generate_legal_moves(
     # - We return only the king legal moves
 
     if checking_pieces and len(checking_pieces) > 1:
-        legal_moves = mv.generate_king_legal_moves(
-            board, color, king_square, ennemy_controlled
+        legal_moves = mv.generate_king_escapes(
+            board,
+            color,
+            king_square,
+            e_piece_list,
+            e_idx_list,
+            occupancy(idx_list) | occupancy(e_idx_list),
         )
         if legal_moves == []:
             return PieceMoves()
@@ -64,6 +67,10 @@ def generate_legal_moves(
     # no checking piece? generate all moves
 
     elif not checking_pieces:
+        ennemy_controlled: set[int] = mv.generate_controlled_squares(
+            board, ennemy_color, e_piece_list, e_idx_list
+        )
+
         # If no pinned pieces we generate all the moves without filtering
         if not pinned_pieces:
             return mv.generate_all_moves(
@@ -95,10 +102,10 @@ def generate_legal_moves(
     # ------ 1 CHECKING PIECE ------ #
     ##################################
 
-    # 1 checking piece? legal king moves + blocking moves
+    # 1 checking piece? king escapes, captures of the checker and blocks
 
     else:
-        return mv.generate_single_check_moves(
+        return mv.generate_evasion_moves(
             board,
             color,
             piece_list,
@@ -106,6 +113,8 @@ def generate_legal_moves(
             king_square,
             checking_pieces[0],
             pinned_pieces,
-            ennemy_controlled,
+            e_piece_list,
+            e_idx_list,
+            occupancy(idx_list) | occupancy(e_idx_list),
             en_passant_target,
         )
@@ -25,8 +25,6 @@ from legal_moves import generate_legal_moves
 from game_state import GameState
 from move_selection import simple_selection, minmax_selection, min_max
 
-from benchmarks.profiler import profile_engine
-
 logger = logging.getLogger(__name__)
 
 
@@ -67,6 +65,9 @@ def start():
 
 
 def profile():
+    # cProfile is only loaded when profiling
+    from benchmarks.profiler import profile_engine
+
     fen = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
     move = profile_engine(fen, 3)
 
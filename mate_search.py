@@ -0,0 +1,176 @@
+import argparse
+from dataclasses import dataclass
+
+from config import Move
+from game_state import GameState
+from move_selection import generate_move_list
+from notation import move_to_san
+
+
+@dataclass
+class MateResult:
+    # Number of attacker moves of the forced mate, None if there is none
+    mate_in: int | None
+    # Attacker moves and longest defences, ending with the mating move
+    line: list[Move]
+    # Positions made while proving or refuting the mate
+    nodes: int
+
+
+class MateSolver:
+    """
+    AND/OR search proving forced mates for the side to move.
+
+    The attacker only plays checking moves unless `checks_only` is False,
+    which makes proofs of quiet mates possible but much more expensive. At
+    defender nodes every reply must be refuted, ordered by the mobility they
+    leave the attacker, fewest moves first since those replies are the
+    likeliest to escape.
+
+    Mate-distance pruning: once a mate in d is proven at an attacker node,
+    its remaining moves are only searched for mates in less than d. Results
+    are memoized by zobrist key: a proven mate in d holds for any larger
+    bound, and a refuted bound holds for any smaller one.
+    """
+
+    def __init__(self, checks_only: bool = True):
+        self.checks_only = checks_only
+        self.nodes = 0
+        # key -> (mate distance, best move) for attacker and defender nodes
+        self._proven: dict[int, tuple[int, Move | None]] = {}
+        # key -> largest number of attacker moves with no mate
+        self._refuted: dict[int, int] = {}
+
+    def solve(self, game_state: GameState, max_moves: int) -> MateResult:
+        """Shortest forced mate in at most `max_moves` attacker moves"""
+        for moves in range(1, max_moves + 1):
+            mate_in = self._attack(game_state, moves)
+            if mate_in is not None:
+                return MateResult(mate_in, self._line(game_state), self.nodes)
+        return MateResult(None, [], self.nodes)
+
+    # ------ AND/OR search ------ #
+
+    def _attack(self, game_state: GameState, moves: int) -> int | None:
+        """Mate distance of the shortest mate within `moves`, None if none"""
+        key = game_state.zobrist_key
+        proven = self._proven.get(key)
+        if proven is not None and proven[0] <= moves:
+            return proven[0]
+        if self._refuted.get(key, 0) >= moves:
+            return None
+
+        best: int | None = None
+        best_move: Move | None = None
+        for move in generate_move_list(game_state):
+            # Mate-distance pruning: only a shorter mate improves on `best`
+            bound = moves if best is None else best - 1
+            if bound < 1:
+                break
+            g = self._make(game_state, move)
+            if self.checks_only and not g.checking_pieces:
+                continue
+            if g.checkmate:
+                best, best_move = 1, move
+                break
+            if bound == 1 or g.draw:
+                continue
+            defended = self._defend(g, bound - 1)
+            if defended is not None:
+                best, best_move = defended + 1, move
+
+        if best is None:
+            self._refuted[key] = max(self._refuted.get(key, 0), moves)
+            return None
+        self._proven[key] = (best, best_move)
+        return best
+
+    def _defend(self, game_state: GameState, moves: int) -> int | None:
+        """Mate distance against the longest defence, None if one escapes"""
+        key = game_state.zobrist_key
+        proven = self._proven.get(key)
+        if proven is not None and proven[0] <= moves:
+            return proven[0]
+        if self._refuted.get(key, 0) >= moves:
+            return None
+
+        worst = 0
+        worst_reply: Move | None = None
+        for g, reply in self._order_replies(game_state):
+            mate_in = self._attack(g, moves)
+            if mate_in is None:
+                self._refuted[key] = max(self._refuted.get(key, 0), moves)
+                return None
+            if mate_in > worst:
+                worst, worst_reply = mate_in, reply
+
+        self._proven[key] = (worst, worst_reply)
+        return worst
+
+    def _order_replies(self, game_state: GameState) -> list[tuple[GameState, Move]]:
+        """Replies with their positions, fewest attacker moves first"""
+        children = [
+            (self._make(game_state, reply), reply)
+            for reply in generate_move_list(game_state)
+        ]
+        children.sort(key=lambda child: len(generate_move_list(child[0])))
+        return children
+
+    def _make(self, game_state: GameState, move: Move) -> GameState:
+        self.nodes += 1
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        return g
+
+    def _line(self, game_state: GameState) -> list[Move]:
+        """Proven moves from `game_state` until the mate"""
+        line: list[Move] = []
+        g = game_state
+        while not g.checkmate:
+            proven = self._proven.get(g.zobrist_key)
+            if proven is None or proven[1] is None:
+                break
+            line.append(proven[1])
+            g = g.copy()
+            g.make_move(proven[1].piece, proven[1].to_idx, proven[1].promotion)
+        return line
+
+
+def solve_mate(
+    game_state: GameState, max_moves: int, checks_only: bool = True
+) -> MateResult:
+    return MateSolver(checks_only).solve(game_state, max_moves)
+
+
+def format_line(game_state: GameState, line: list[Move]) -> str:
+    sans: list[str] = []
+    g = game_state
+    for move in line:
+        sans.append(move_to_san(g, move))
+        g = g.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+    return " ".join(sans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prove a forced mate")
+    parser.add_argument("fen")
+    parser.add_argument("moves", type=int, help="maximum attacker moves")
+    parser.add_argument(
+        "--all-moves",
+        action="store_true",
+        help="let the attacker play quiet moves, not only checks",
+    )
+    args = parser.parse_args()
+
+    game_state = GameState.from_fen(args.fen)
+    result = solve_mate(game_state, args.moves, not args.all_moves)
+    if result.mate_in is None:
+        print(f"No forced mate in {args.moves} ({result.nodes} nodes)")
+    else:
+        print(f"Mate in {result.mate_in}: {format_line(game_state, result.line)}")
+        print(f"{result.nodes} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
+import attack_tables as at
 import chess_board as cb
+from itertools import chain
 import logging
 
 from config import (
@@ -588,6 +590,10 @@ def generate_all_moves(
     for piece, idx in zip(piece_list, idx_list):
         if abs(piece) == PAWN:
             moves = generate_pawn_moves(board, idx, color, en_passant_target)
+            if en_passant_target is not None and en_passant_target in moves:
+                remove_exposing_en_passant(
+                    board, color, king_square, idx, moves, en_passant_target
+                )
         elif abs(piece) == KING:
             moves = generate_king_legal_moves(
                 board, color, king_square, ennemy_controlled
@@ -616,8 +622,16 @@ def generate_moves_filter_pinned(
     ennemy_controlled: set[int],
     en_passant_target: int | None = None,
 ) -> PieceMoves:
-    """ """
-    pin_lookup = {pinned.piece.index: pinned for pinned in pinned_pieces}
+    """
+    `generate_all_moves` for a position with pinned pieces.
+
+    The squares a pinned piece may move to are looked up once per pin: the
+    line from the king up to the pinning piece, capture included.
+    """
+    pin_masks = {
+        pinned.piece.index: pin_mask(king_square, pinned.pinning_piece_index)
+        for pinned in pinned_pieces
+    }
 
     piece_moves = PieceMoves()
 
@@ -629,14 +643,18 @@ def generate_moves_filter_pinned(
             moves.extend(
                 generate_castling_moves(board, color, castling_state, ennemy_controlled)
             )
+        elif idx in pin_masks:
+            moves = generate_pinned_piece_moves(
+                board, piece, idx, color, pin_masks[idx], en_passant_target
+            )
         elif abs(piece) == PAWN:
             moves = generate_pawn_moves(board, idx, color, en_passant_target)
-            if idx in pin_lookup:
-                moves = filter_pinned_piece_moves(moves, piece, pin_lookup[idx])
+            if en_passant_target is not None and en_passant_target in moves:
+                remove_exposing_en_passant(
+                    board, color, king_square, idx, moves, en_passant_target
+                )
         else:
             moves = MOVE_GENERATOR[abs(piece)](board, idx, color)
-            if idx in pin_lookup:
-                moves = filter_pinned_piece_moves(moves, piece, pin_lookup[idx])
 
         if moves:
             piece_moves.pieces.append(Piece(piece, idx))
@@ -645,216 +663,246 @@ def generate_moves_filter_pinned(
     return piece_moves
 
 
-def filter_pinned_piece_moves(
-    moves: list[int], piece: int, pinned_piece: PinnedPiece
-) -> list[int]:
-    """ """
-    pin_vector = pinned_piece.pin_vector
-    ennemy_idx = pinned_piece.pinning_piece_index
+def pin_mask(king_square: int, pinning_piece_index: int) -> int:
+    """Squares a piece pinned to the king by `pinning_piece_index` may move to"""
+    return at.BETWEEN[king_square][pinning_piece_index] | 1 << pinning_piece_index
 
-    filtered_moves: list[int] = []
 
-    if abs(piece) == KNIGHT:
-        return []
-
-    elif abs(piece) == ROOK:
-        if pin_vector[0] * pin_vector[1] != 0:
-            return []
-        else:
-            for move in moves:
-                if cb.is_index_aligned(move, ennemy_idx):
-                    filtered_moves.append(move)
-
-    elif abs(piece) == BISHOP:
-        if pin_vector[0] * pin_vector[1] == 0:
-            return []
-        else:
-            for move in moves:
-                if cb.is_index_on_diagonal(move, ennemy_idx):
-                    filtered_moves.append(move)
-
-    elif abs(piece) in [QUEEN, PAWN]:
-        if pin_vector[0] * pin_vector[1] == 0:
-            for move in moves:
-                if cb.is_index_aligned(move, ennemy_idx):
-                    filtered_moves.append(move)
-        else:
-            for move in moves:
-                if cb.is_index_on_diagonal(move, ennemy_idx):
-                    filtered_moves.append(move)
+def generate_pinned_piece_moves(
+    board: list[int],
+    piece: int,
+    idx: int,
+    color: int,
+    allowed: int,
+    en_passant_target: int | None = None,
+) -> list[int]:
+    """
+    Moves of a pinned piece, all on `allowed`, its `pin_mask`.
 
-    return filtered_moves
+    The squares of a pin are empty up to the pinning piece, so a slider
+    reaches every square of the pin on its own rays without generating its
+    moves. A knight never stays on its pin.
+    """
+    kind = abs(piece)
+    if kind == PAWN:
+        moves = generate_pawn_moves(board, idx, color, en_passant_target)
+        return [move for move in moves if allowed >> move & 1]
+    if kind == KNIGHT:
+        return []
+    rays = 0
+    if kind != ROOK:
+        rays |= at.DIAGONAL_RAYS[idx]
+    if kind != BISHOP:
+        rays |= at.ORTHOGONAL_RAYS[idx]
+    return list(at.squares(rays & allowed))
 
 
-def generate_single_check_moves(
+def remove_exposing_en_passant(
     board: list[int],
     color: int,
-    piece_list: list[int],
-    idx_list: list[int],
     king_square: int,
-    checking_piece: Piece,
-    pinned_pieces: list[PinnedPiece],
-    ennemy_controlled: set[int],
-    en_passant_target: int | None = None,
-) -> PieceMoves:
-    """ """
-    allowed_squares: set[int] = set()
-
-    capturing_move = checking_piece.index
-
-    if abs(checking_piece.piece) in [KNIGHT, PAWN]:
-        allowed_squares.add(capturing_move)
-
-    else:
-        allowed_squares.add(capturing_move)
-        allowed_squares.update(
-            generate_blocking_moves(board, king_square, checking_piece)
-        )
-
-    if pinned_pieces == []:
-        return generate_single_check_no_pin_moves(
-            board,
-            color,
-            piece_list,
-            idx_list,
-            king_square,
-            ennemy_controlled,
-            allowed_squares,
-            en_passant_target,
-        )
-
-    else:
-        return generate_single_check_pinned_moves(
-            board,
-            color,
-            piece_list,
-            idx_list,
-            king_square,
-            pinned_pieces,
-            ennemy_controlled,
-            allowed_squares,
-            en_passant_target,
-        )
-
-
-def generate_single_check_no_pin_moves(
+    idx: int,
+    moves: list[int],
+    en_passant_target: int,
+) -> None:
+    """
+    Drop the en passant capture from `moves` if it uncovers a slider on the
+    king, which happens too rarely to track the occupied squares for
+    """
+    if is_en_passant_exposing_king(
+        board,
+        color,
+        king_square,
+        idx,
+        en_passant_target,
+        at.occupancy([i for i, piece in enumerate(board) if piece != EMPTY_SQUARE]),
+    ):
+        moves.remove(en_passant_target)
+
+
+def generate_evasion_moves(
     board: list[int],
     color: int,
     piece_list: list[int],
     idx_list: list[int],
     king_square: int,
-    ennemy_controlled: set[int],
-    allowed_squares: set[int],
+    checking_piece: Piece,
+    pinned_pieces: list[PinnedPiece],
+    e_piece_list: list[int],
+    e_idx_list: list[int],
+    occupied: int,
     en_passant_target: int | None = None,
 ) -> PieceMoves:
+    """
+    Legal moves out of a single check: king escapes, captures of the
+    checking piece and interpositions between it and the king.
+
+    Other pieces may only land on `targets` (the checker square and the
+    squares between it and the king), so they look up which targets they
+    attack on an empty board and only test the squares in between against
+    `occupied`, instead of generating every move and filtering it.
+
+    A pinned piece never has an evasion: its pin line only crosses the line
+    of the check on the king square.
+    """
+    checker_bit = 1 << checking_piece.index
+    targets = at.BETWEEN[king_square][checking_piece.index] | checker_bit
+    pinned = {pinned.piece.index for pinned in pinned_pieces}
+    pawn_delta = 8 if color == WHITE else -8
+    start_rank = 1 if color == WHITE else 6
+
+    # The pawn that just moved two squares can also be taken en passant
+    en_passant_capture = (
+        en_passant_target is not None
+        and checking_piece.index == en_passant_target - pawn_delta
+    )
+
     piece_moves = PieceMoves()
 
     for piece, idx in zip(piece_list, idx_list):
-        legal_moves: list[int] = []
-        if abs(piece) == KING:
-            moves = generate_king_legal_moves(
-                board, color, king_square, ennemy_controlled
+        kind = abs(piece)
+        if kind == KING:
+            moves = generate_king_escapes(
+                board, color, king_square, e_piece_list, e_idx_list, occupied
             )
             if moves:
                 piece_moves.pieces.append(Piece(piece, idx))
                 piece_moves.move_list.append(moves)
             continue
+        if idx in pinned:
+            continue
 
-        elif abs(piece) == PAWN:
-            moves = generate_pawn_moves(board, idx, color, en_passant_target)
+        moves: list[int] = []
+        if kind == PAWN:
+            push = idx + pawn_delta
+            if board[push] == EMPTY_SQUARE:
+                if targets >> push & 1:
+                    moves.append(push)
+                double_push = push + pawn_delta
+                if (
+                    idx // 8 == start_rank
+                    and targets >> double_push & 1
+                    and board[double_push] == EMPTY_SQUARE
+                ):
+                    moves.append(double_push)
+            if at.PAWN_ATTACKS[color][idx] & checker_bit:
+                moves.append(checking_piece.index)
+            if (
+                en_passant_capture
+                and at.PAWN_ATTACKS[color][idx] >> en_passant_target & 1
+                and not is_en_passant_exposing_king(
+                    board, color, king_square, idx, en_passant_target, occupied
+                )
+            ):
+                moves.append(en_passant_target)
 
-        else:
-            moves = MOVE_GENERATOR[abs(piece)](board, idx, color)
+        elif kind == KNIGHT:
+            moves.extend(at.squares(at.KNIGHT_ATTACKS[idx] & targets))
 
-        for move in moves:
-            if move in allowed_squares:
-                legal_moves.append(move)
+        else:
+            reachable = 0
+            if kind != ROOK:
+                reachable |= at.DIAGONAL_RAYS[idx]
+            if kind != BISHOP:
+                reachable |= at.ORTHOGONAL_RAYS[idx]
+            between = at.BETWEEN[idx]
+            for target in at.squares(reachable & targets):
+                if not between[target] & occupied:
+                    moves.append(target)
 
-        if legal_moves:
+        if moves:
             piece_moves.pieces.append(Piece(piece, idx))
-            piece_moves.move_list.append(legal_moves)
+            piece_moves.move_list.append(moves)
 
     return piece_moves
 
 
-def generate_single_check_pinned_moves(
+def generate_king_escapes(
     board: list[int],
     color: int,
-    piece_list: list[int],
-    idx_list: list[int],
     king_square: int,
-    pinned_pieces: list[PinnedPiece],
-    ennemy_controlled: set[int],
-    allowed_squares: set[int],
-    en_passant_target: int | None = None,
-) -> PieceMoves:
-    pin_lookup = {pinned.piece.index: pinned for pinned in pinned_pieces}
-
-    piece_moves = PieceMoves()
+    e_piece_list: list[int],
+    e_idx_list: list[int],
+    occupied: int,
+) -> list[int]:
+    """
+    Legal moves of a king in check, tested square by square against the
+    ennemy pieces rather than against every square they control.
 
-    for piece, idx in zip(piece_list, idx_list):
-        legal_moves: list[int] = []
-        if abs(piece) == KING:
-            moves = generate_king_legal_moves(
-                board, color, king_square, ennemy_controlled
+    The king is removed from `occupied` first, so that a slider checking
+    along a line also covers the square behind the king.
+    """
+    knights = pawns = diagonal = orthogonal = e_king = 0
+    for piece, idx in zip(e_piece_list, e_idx_list):
+        kind = abs(piece)
+        if kind == PAWN:
+            pawns |= 1 << idx
+        elif kind == KNIGHT:
+            knights |= 1 << idx
+        elif kind == KING:
+            e_king |= 1 << idx
+        else:
+            if kind != ROOK:
+                diagonal |= 1 << idx
+            if kind != BISHOP:
+                orthogonal |= 1 << idx
+
+    occupied &= ~(1 << king_square)
+    escapes: list[int] = []
+    for square in at.squares(at.KING_ATTACKS[king_square]):
+        piece = board[square]
+        if piece != EMPTY_SQUARE and (piece > 0) == (color == WHITE):
+            continue
+        # An ennemy pawn attacks the square if a pawn of ours there would
+        # attack the ennemy pawn
+        if (
+            at.KNIGHT_ATTACKS[square] & knights
+            or at.PAWN_ATTACKS[color][square] & pawns
+            or at.KING_ATTACKS[square] & e_king
+        ):
+            continue
+        between = at.BETWEEN[square]
+        if any(
+            not between[slider] & occupied
+            for slider in chain(
+                at.squares(at.DIAGONAL_RAYS[square] & diagonal),
+                at.squares(at.ORTHOGONAL_RAYS[square] & orthogonal),
             )
-            if moves:
-                piece_moves.pieces.append(Piece(piece, idx))
-                piece_moves.move_list.append(moves)
+        ):
             continue
+        escapes.append(square)
+    return escapes
 
-        elif abs(piece) == PAWN:
-            moves = generate_pawn_moves(board, idx, color, en_passant_target)
-            if idx in pin_lookup:
-                moves = filter_pinned_piece_moves(moves, piece, pin_lookup[idx])
 
-        else:
-            moves = MOVE_GENERATOR[abs(piece)](board, idx, color)
-            if idx in pin_lookup:
-                moves = filter_pinned_piece_moves(moves, piece, pin_lookup[idx])
-
-        for move in moves:
-            if move in allowed_squares:
-                legal_moves.append(move)
-
-        if legal_moves:
-            piece_moves.pieces.append(Piece(piece, idx))
-            piece_moves.move_list.append(legal_moves)
-
-    return piece_moves
-
-
-def generate_blocking_moves(
-    board: list[int], king_square: int, checking_piece: Piece
-) -> list[int]:
-    """ """
-
-    blocking_moves: list[int] = []
-
-    k_file, k_rank = cb.parse_index(king_square)
-    c_file, c_rank = cb.parse_index(checking_piece.index)
-
-    file_diff = k_file - c_file
-    rank_diff = k_rank - c_rank
-
-    f_delta = file_diff if file_diff == 0 else (1 if file_diff > 0 else -1)
-    r_delta = rank_diff if rank_diff == 0 else (1 if rank_diff > 0 else -1)
-
-    i = 1
-    while True:
-        new_file = c_file + (i * f_delta)
-        new_rank = c_rank + (i * r_delta)
-
-        if new_file < 1 or new_file > 8 or new_rank < 1 or new_rank > 8:
-            break
-
-        square = cb.parse_coordinates_to_idx(new_file, new_rank)
-        if abs(board[square]) == KING:
-            return blocking_moves
-        blocking_moves.append(square)
-        i += 1
-
-    return blocking_moves
+def is_en_passant_exposing_king(
+    board: list[int],
+    color: int,
+    king_square: int,
+    from_idx: int,
+    to_idx: int,
+    occupied: int,
+) -> bool:
+    """
+    Whether the en passant capture `from_idx` -> `to_idx` leaves the king in
+    check: both pawns leaving their squares may uncover a slider, which no
+    pin detects.
+    """
+    captured_idx = to_idx - 8 if color == WHITE else to_idx + 8
+    occupied = occupied & ~(1 << from_idx | 1 << captured_idx) | 1 << to_idx
+    between = at.BETWEEN[king_square]
+    for rays, kinds in (
+        (at.ORTHOGONAL_RAYS, (ROOK, QUEEN)),
+        (at.DIAGONAL_RAYS, (BISHOP, QUEEN)),
+    ):
+        for square in at.squares(rays[king_square] & occupied):
+            piece = board[square]
+            if (
+                abs(piece) in kinds
+                and (piece > 0) != (color == WHITE)
+                and not between[square] & occupied
+            ):
+                return True
+    return False
 
 
 if __name__ == "__main__":
@@ -1,22 +1,106 @@
+from collections.abc import Callable
 from dataclasses import dataclass
-from time import time
+from math import log
+from time import perf_counter, time
 from config import (
     Move,
     Piece,
     PieceMoves,
     WHITE,
     BLACK,
+    EMPTY_SQUARE,
     PAWN,
     QUEEN,
     ROOK,
     BISHOP,
     KNIGHT,
 )
+from evaluate_position import EVAL_DICT
+from game_logic import see
 from game_state import GameState
 from legal_moves import generate_legal_moves
+from search_limits import SearchAborted, SearchLimits, StopFlag, with_deadline
+from search_stats import SearchStats
+from table_cache import cached_table
+from transposition_table import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+    TranspositionTable,
+    bound_flag,
+)
 
 PROMOTION_LIST = [QUEEN, ROOK, BISHOP, KNIGHT]
 
+# Move ordering: good captures and promotions score above quiet moves (0),
+# captures losing material (negative SEE) below them.
+CAPTURE_SCORE = 100
+LOSING_CAPTURE_SCORE = -100
+
+# Full search window, mate scores (+/- 10_000) fall outside of it.
+MIN_BOUND = -5000
+MAX_BOUND = 5000
+
+# ------ PRINCIPAL VARIATION SEARCH ------ #
+
+# Width of the zero window used to probe non-PV moves. Any positive width is
+# sound because a probe only has to decide "<= alpha" or "> alpha".
+NULL_WINDOW = 0.01
+
+# ------ LATE MOVE REDUCTIONS ------ #
+
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE_NUMBER = 3
+LMR_MAX_DEPTH = 64
+LMR_MAX_MOVES = 64
+LMR_BASE = 0.75
+LMR_DIVISOR = 2.25
+
+
+def build_reduction_table(max_depth: int, max_moves: int) -> list[list[int]]:
+    """
+    Precompute the late move reduction for every (depth, move_number) pair.
+
+    The reduction grows with log(depth) * log(move_number), so late moves
+    of deep nodes are reduced the most.
+    """
+    table: list[list[int]] = [[0] * max_moves for _ in range(max_depth)]
+    for depth in range(1, max_depth):
+        for move_number in range(1, max_moves):
+            table[depth][move_number] = int(
+                LMR_BASE + log(depth) * log(move_number) / LMR_DIVISOR
+            )
+    return table
+
+
+REDUCTION_TABLE = cached_table(
+    "reductions",
+    (LMR_MAX_DEPTH, LMR_MAX_MOVES, LMR_BASE, LMR_DIVISOR),
+    lambda: build_reduction_table(LMR_MAX_DEPTH, LMR_MAX_MOVES),
+)
+
+# ------ ASPIRATION WINDOWS ------ #
+
+ASPIRATION_MIN_DEPTH = 1
+ASPIRATION_WINDOW = 1.5
+ASPIRATION_GROWTH = 2
+
+# ------ MULTI-PV ------ #
+
+MULTIPV_LINES = 3
+
+# ------ FUTILITY PRUNING / RAZORING ------ #
+
+# Frontier nodes (depth 1): quiet moves are skipped when the static eval plus
+# the margin cannot reach alpha (or beta for the minimizing side).
+FUTILITY_DEPTH = 1
+FUTILITY_MARGIN = 2
+
+# Pre-frontier nodes (depth 2): far below alpha, verify with a quiescence
+# search and return its score if it confirms the fail-low.
+RAZORING_DEPTH = 2
+RAZORING_MARGIN = 4
+
 
 def simple_selection(
     game_state: GameState, piece_moves: PieceMoves
@@ -57,117 +141,692 @@ def simple_selection(
     return best_move  # pyright: ignore[reportPossiblyUnboundVariable]
 
 
+def generate_move_list(game_state: GameState) -> list[Move]:
+    """
+    Flatten the legal moves of `game_state` into a list of `Move`.
+
+    Pawn moves to the last rank are expanded into one `Move` per promotion
+    piece, signed with the color of the side to move.
+    """
+    assert game_state.legal_moves is not None
+    if game_state.active_color == WHITE:
+        sign = 1
+        promotion_rank = range(56, 64)
+    else:
+        sign = -1
+        promotion_rank = range(0, 8)
+
+    move_list: list[Move] = []
+    for piece, moves in zip(
+        game_state.legal_moves.pieces, game_state.legal_moves.move_list
+    ):
+        for idx in moves:
+            if (abs(piece.piece) == PAWN) and (idx in promotion_rank):
+                for promotion in PROMOTION_LIST:
+                    move_list.append(Move(piece, idx, sign * promotion))
+            else:
+                move_list.append(Move(piece, idx))
+    return move_list
+
+
+def is_capture(game_state: GameState, move: Move) -> bool:
+    """A move is a capture if it lands on a piece or is an en passant capture"""
+    if game_state.board[move.to_idx] != EMPTY_SQUARE:
+        return True
+    return (
+        abs(move.piece.piece) == PAWN
+        and move.to_idx == game_state.en_passant_target
+        and (move.to_idx - move.piece.index) % 8 != 0
+    )
+
+
+def is_quiet_move(game_state: GameState, move: Move) -> bool:
+    return move.promotion is None and not is_capture(game_state, move)
+
+
+def move_order_score(game_state: GameState, move: Move) -> int:
+    """
+    Captures by MVV-LVA and promotions first, then quiet moves (0), then
+    captures that lose material according to the static exchange evaluation.
+
+    SEE is only computed when the victim is worth less than the attacker,
+    any other capture wins or trades material.
+    """
+    score: int = 0
+    if is_capture(game_state, move):
+        victim = game_state.board[move.to_idx]
+        victim_value = EVAL_DICT[abs(victim)] if victim != EMPTY_SQUARE else EVAL_DICT[PAWN]
+        attacker_value = EVAL_DICT[abs(move.piece.piece)]
+        if victim_value < attacker_value:
+            exchange = see(game_state.board, move)
+            if exchange < 0:
+                return LOSING_CAPTURE_SCORE + exchange
+        score += CAPTURE_SCORE + 10 * victim_value - attacker_value
+    if move.promotion is not None:
+        score += CAPTURE_SCORE + EVAL_DICT[abs(move.promotion)]
+    return score
+
+
+def score_moves(game_state: GameState) -> list[tuple[int, Move]]:
+    """Legal moves of `game_state` with their ordering score, best first"""
+    scored_moves = [
+        (move_order_score(game_state, move), move)
+        for move in generate_move_list(game_state)
+    ]
+    scored_moves.sort(key=lambda scored_move: scored_move[0], reverse=True)
+    return scored_moves
+
+
+def order_moves(game_state: GameState) -> list[Move]:
+    """Legal moves of `game_state`, best candidates first"""
+    return [move for _, move in score_moves(game_state)]
+
+
+def put_first(move_list: list[Move], move: Move | None) -> list[Move]:
+    """Move `move` (hash or PV move) to the front of `move_list` if legal"""
+    if move is not None and move in move_list:
+        move_list.remove(move)
+        move_list.insert(0, move)
+    return move_list
+
+
+def late_move_reduction(depth: int, move_number: int) -> int:
+    """
+    Depth reduction for the `move_number`-th move (0 based) of a node with
+    `depth` remaining. Early moves and shallow nodes are never reduced.
+    """
+    if depth < LMR_MIN_DEPTH or move_number < LMR_MIN_MOVE_NUMBER:
+        return 0
+    reduction = REDUCTION_TABLE[min(depth, LMR_MAX_DEPTH - 1)][
+        min(move_number, LMR_MAX_MOVES - 1)
+    ]
+    return min(reduction, depth - 1)
+
+
+def quiescence(
+    game_state: GameState,
+    maximazing: bool,
+    alpha: float = MIN_BOUND,
+    beta: float = MAX_BOUND,
+    stats: SearchStats | None = None,
+    limits: SearchLimits | None = None,
+) -> float:
+    """
+    Search captures and promotions only, until the position is quiet.
+    Captures losing material according to SEE are pruned.
+
+    The static evaluation ("stand pat") is a lower bound for the maximizing
+    side and an upper bound for the minimizing side, since the side to move
+    is never forced to capture.
+    """
+    if stats is not None:
+        stats.qnodes += 1
+    if limits is not None:
+        limits.check()
+
+    stand_pat = game_state.evaluate()
+    if game_state.draw or game_state.checkmate:
+        return stand_pat
+
+    if maximazing:
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+    else:
+        if stand_pat <= alpha:
+            return stand_pat
+        beta = min(beta, stand_pat)
+
+    best_eval = stand_pat
+    for score, move in score_moves(game_state):
+        if score < 0:
+            if stats is not None:
+                stats.see_pruned += 1
+            continue
+        if is_quiet_move(game_state, move):
+            continue
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        eval = quiescence(g, not maximazing, alpha, beta, stats, limits)
+
+        if maximazing:
+            best_eval = max(best_eval, eval)
+            alpha = max(alpha, eval)
+        else:
+            best_eval = min(best_eval, eval)
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+
+    return best_eval
+
+
 def min_max(
     game_state: GameState,
     depth: int,
     maximazing: bool,
-    alpha: float = -5000,
-    beta: float = 5000,
+    alpha: float = MIN_BOUND,
+    beta: float = MAX_BOUND,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
 ) -> float:
-    promotion_rank = (
-        [i for i in range(56, 64, 1)]
-        if game_state.active_color == WHITE
-        else [i for i in range(0, 8, 1)]
-    )
-    if depth == 0 or game_state.draw or game_state.checkmate:
+    """
+    Alpha-beta search with principal variation search and late move reductions.
+
+    The first move is searched with the full window, the following ones with
+    a zero window probe (reduced for late quiet moves) and re-searched only
+    when the probe shows they can improve the score.
+
+    Near the leaves, nodes whose static eval is far outside the window are
+    razored (depth 2) or have their quiet moves pruned (depth 1).
+
+    With a transposition table, a stored search at least as deep returns
+    its score when its bound settles the window, and its best move is
+    searched first otherwise.
+    """
+    if depth == 0:
+        return quiescence(game_state, maximazing, alpha, beta, stats, limits)
+    if stats is not None:
+        stats.nodes += 1
+    if limits is not None:
+        limits.check()
+    if game_state.draw or game_state.checkmate:
         return game_state.evaluate()
-    assert game_state.legal_moves is not None
+
+    # ------ TRANSPOSITION TABLE ------ #
+    hash_move: Move | None = None
+    if tt is not None:
+        entry = tt.get(game_state.zobrist_key)
+        if stats is not None:
+            stats.tt_probes += 1
+            stats.tt_hits += entry is not None
+        if entry is not None:
+            if entry.depth >= depth and (
+                entry.flag == EXACT
+                or (entry.flag == LOWER_BOUND and entry.score >= beta)
+                or (entry.flag == UPPER_BOUND and entry.score <= alpha)
+            ):
+                if stats is not None:
+                    stats.tt_cutoffs += 1
+                return entry.score
+            hash_move = entry.best_move
+    alpha_orig, beta_orig = alpha, beta
+
+    in_check = game_state.checking_pieces != []
+
+    # ------ RAZORING ------ #
+    if not in_check and depth == RAZORING_DEPTH:
+        static_eval = game_state.evaluate()
+        if maximazing and static_eval + RAZORING_MARGIN <= alpha:
+            eval = quiescence(game_state, maximazing, alpha, beta, stats, limits)
+            if eval <= alpha:
+                if stats is not None:
+                    stats.razored += 1
+                return eval
+        elif not maximazing and static_eval - RAZORING_MARGIN >= beta:
+            eval = quiescence(game_state, maximazing, alpha, beta, stats, limits)
+            if eval >= beta:
+                if stats is not None:
+                    stats.razored += 1
+                return eval
+
+    # ------ FUTILITY PRUNING ------ #
+    futility_eval: float | None = None
+    if not in_check and depth <= FUTILITY_DEPTH:
+        static_eval = game_state.evaluate()
+        if maximazing and static_eval + FUTILITY_MARGIN <= alpha:
+            futility_eval = static_eval + FUTILITY_MARGIN
+        elif not maximazing and static_eval - FUTILITY_MARGIN >= beta:
+            futility_eval = static_eval - FUTILITY_MARGIN
+
+    best_eval = float("-inf") if maximazing else float("+inf")
+    best_move: Move | None = None
+
+    move_list = put_first(order_moves(game_state), hash_move)
+    for move_number, move in enumerate(move_list):
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+
+        # Quiet checks are neither pruned nor reduced: they may be forcing
+        quiet = (
+            not in_check
+            and is_quiet_move(game_state, move)
+            and g.checking_pieces == []
+        )
+
+        if quiet and futility_eval is not None:
+            if stats is not None:
+                stats.futility_pruned += 1
+            if maximazing:
+                best_eval = max(best_eval, futility_eval)
+            else:
+                best_eval = min(best_eval, futility_eval)
+            continue
+
+        reduction = 0
+        if quiet:
+            reduction = late_move_reduction(depth, move_number)
+
+        eval = search_move(
+            g,
+            depth,
+            maximazing,
+            alpha,
+            beta,
+            move_number,
+            reduction,
+            stats,
+            tt,
+            limits,
+        )
+
+        if best_move is None or (eval > best_eval if maximazing else eval < best_eval):
+            best_eval = eval
+            best_move = move
+        if maximazing:
+            alpha = max(alpha, eval)
+        else:
+            beta = min(beta, eval)
+        if beta <= alpha:
+            if stats is not None:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += move_number == 0
+            break
+
+    if tt is not None:
+        tt.put(
+            game_state.zobrist_key,
+            depth,
+            best_eval,
+            bound_flag(best_eval, alpha_orig, beta_orig),
+            best_move,
+        )
+    return best_eval
+
+
+def search_move(
+    g: GameState,
+    depth: int,
+    maximazing: bool,
+    alpha: float,
+    beta: float,
+    move_number: int,
+    reduction: int = 0,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+) -> float:
+    """
+    Search the child position `g` of a node with `depth` remaining.
+
+    `maximazing`, `alpha` and `beta` are the ones of the parent node.
+    The first move gets the full window, later moves a zero window probe
+    at `depth - 1 - reduction`, re-searched at full depth if it improves on
+    the bound, then with the full window if the score falls inside it.
+    """
+    if move_number == 0:
+        return min_max(g, depth - 1, not maximazing, alpha, beta, stats, tt, limits)
+
     if maximazing:
-        best_eval = float("-inf")
-        for piece, moves in zip(
-            game_state.legal_moves.pieces, game_state.legal_moves.move_list
-        ):
-            for idx in moves:
-                if (abs(piece.piece) == PAWN) and (idx in promotion_rank):
-                    for promotion in PROMOTION_LIST:
-                        g = game_state.copy()
-                        g.make_move(piece, idx, promotion)
-                        eval = min_max(g, depth - 1, False, alpha, beta)
-                        best_eval = max(best_eval, eval)
-                        alpha = max(alpha, eval)
-                        if beta <= alpha:
-                            return best_eval
-                else:
-                    g = game_state.copy()
-                    g.make_move(piece, idx)
-                    eval = min_max(g, depth - 1, False, alpha, beta)
-                    best_eval = max(best_eval, eval)
-                    alpha = max(alpha, eval)
-                    if beta <= alpha:
-                        return best_eval
-        return best_eval
+        null_alpha, null_beta = alpha, alpha + NULL_WINDOW
     else:
-        best_eval = float("+inf")
-        for piece, moves in zip(
-            game_state.legal_moves.pieces, game_state.legal_moves.move_list
-        ):
-            for idx in moves:
-                if (abs(piece.piece) == PAWN) and (idx in promotion_rank):
-                    for promotion in PROMOTION_LIST:
-                        g = game_state.copy()
-                        g.make_move(piece, idx, promotion)
-                        eval = min_max(g, depth - 1, True, alpha, beta)
-                        best_eval = min(best_eval, eval)
-                        beta = min(beta, eval)
-                        if beta <= alpha:
-                            return best_eval
-                else:
-                    g = game_state.copy()
-                    g.make_move(piece, idx)
-                    eval = min_max(g, depth - 1, True, alpha, beta)
-                    best_eval = min(best_eval, eval)
-                    beta = min(beta, eval)
-                    if beta <= alpha:
-                        return best_eval
-        return best_eval
+        null_alpha, null_beta = beta - NULL_WINDOW, beta
 
+    eval = min_max(
+        g,
+        depth - 1 - reduction,
+        not maximazing,
+        null_alpha,
+        null_beta,
+        stats,
+        tt,
+        limits,
+    )
 
-def minmax_selection(game_state: GameState, depth: int = 3) -> Move:
-    assert game_state.legal_moves is not None
-    piece_list = game_state.legal_moves.pieces
-    moves_list = game_state.legal_moves.move_list
+    if reduction and (eval > alpha if maximazing else eval < beta):
+        eval = min_max(
+            g, depth - 1, not maximazing, null_alpha, null_beta, stats, tt, limits
+        )
 
-    if game_state.active_color == WHITE:
-        best_eval = float("-inf")
-        promotion_rank = [i for i in range(56, 64, 1)]
+    if alpha < eval < beta:
+        eval = min_max(g, depth - 1, not maximazing, alpha, beta, stats, tt, limits)
 
-        for piece, move in zip(piece_list, moves_list):
-            for square in move:
-                if (abs(piece.piece) == PAWN) and (square in promotion_rank):
-                    for promotion in PROMOTION_LIST:
-                        g = game_state.copy()
-                        g.make_move(piece, square, promotion)
-                        eval = min_max(g, depth, False)
-                        if eval > best_eval:
-                            best_eval = eval
-                            best_move = Move(piece, square)
-                else:
-                    g = game_state.copy()
-                    g.make_move(piece, square)
-                    eval = min_max(g, depth, False)
-                    if eval > best_eval:
-                        best_eval = eval
-                        best_move = Move(piece, square)
-    else:
-        best_eval = float("+inf")
-        promotion_rank = [i for i in range(0, 8, 1)]
+    return eval
 
-        for piece, move in zip(piece_list, moves_list):
-            for square in move:
-                if (abs(piece.piece) == PAWN) and (square in promotion_rank):
-                    for promotion in PROMOTION_LIST:
-                        g = game_state.copy()
-                        g.make_move(piece, square, promotion)
-                        eval = min_max(g, depth, True)
-                        if eval < best_eval:
-                            best_eval = eval
-                            best_move = Move(piece, square)
-                else:
-                    g = game_state.copy()
-                    g.make_move(piece, square)
-                    eval = min_max(g, depth, True)
-                    if eval < best_eval:
-                        best_eval = eval
-                        best_move = Move(piece, square)
 
+def search_root(
+    game_state: GameState,
+    depth: int,
+    alpha: float = MIN_BOUND,
+    beta: float = MAX_BOUND,
+    pv_move: Move | None = None,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+    exclude: list[Move] | None = None,
+) -> tuple[float, Move]:
+    """
+    Search every root move with `depth` plies below it and return the best
+    (eval, move) pair for the side to move.
+
+    `pv_move`, the best move of a previous iteration, is searched first.
+    Moves in `exclude` are not searched.
+
+    When a limit interrupts the search, the best move so far is attached to
+    the `SearchAborted` if its eval is exact (inside the original window).
+    """
+    maximazing = game_state.active_color == WHITE
+    best_eval = float("-inf") if maximazing else float("+inf")
+    best_move: Move | None = None
+    alpha_orig, beta_orig = alpha, beta
+
+    move_list = put_first(order_moves(game_state), pv_move)
+    if exclude:
+        move_list = [move for move in move_list if move not in exclude]
+    for move_number, move in enumerate(move_list):
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        try:
+            eval = search_move(
+                g,
+                depth + 1,
+                maximazing,
+                alpha,
+                beta,
+                move_number,
+                stats=stats,
+                tt=tt,
+                limits=limits,
+            )
+        except SearchAborted as aborted:
+            if best_move is not None and alpha_orig < best_eval < beta_orig:
+                aborted.partial = (best_eval, best_move)
+            raise
+
+        if best_move is None or (eval > best_eval if maximazing else eval < best_eval):
+            best_eval = eval
+            best_move = move
+        if maximazing:
+            alpha = max(alpha, eval)
+        else:
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+
+    assert best_move is not None
+    return best_eval, best_move
+
+
+def aspiration_search(
+    game_state: GameState,
+    depth: int,
+    previous_eval: float,
+    pv_move: Move | None = None,
+    window: float = ASPIRATION_WINDOW,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+    exclude: list[Move] | None = None,
+) -> tuple[float, Move]:
+    """
+    Root search with a narrow window centred on `previous_eval`.
+
+    A score on or outside a bound (fail-low: eval <= alpha, fail-high:
+    eval >= beta, both white relative) is re-searched with that bound moved
+    past the score, the margin growing by `ASPIRATION_GROWTH` each time,
+    until the score lands inside the window or the bound reaches the full
+    window. A fail in favour of the side to move (high for white, low for
+    black) comes from a cutoff move, which is searched first in the re-search.
+    """
+    maximazing = game_state.active_color == WHITE
+    delta = window
+    alpha = max(previous_eval - delta, MIN_BOUND)
+    beta = min(previous_eval + delta, MAX_BOUND)
+
+    while True:
+        eval, best_move = search_root(
+            game_state, depth, alpha, beta, pv_move, stats, tt, limits, exclude
+        )
+        if stats is not None:
+            stats.aspiration_searches += 1
+
+        if eval <= alpha and alpha > MIN_BOUND:
+            if stats is not None:
+                stats.fail_lows += 1
+            alpha = max(eval - delta, MIN_BOUND)
+            if not maximazing:
+                pv_move = best_move
+        elif eval >= beta and beta < MAX_BOUND:
+            if stats is not None:
+                stats.fail_highs += 1
+            beta = min(eval + delta, MAX_BOUND)
+            if maximazing:
+                pv_move = best_move
+        else:
+            return eval, best_move
+
+        if stats is not None:
+            stats.re_searches += 1
+        delta *= ASPIRATION_GROWTH
+
+
+def iterative_deepening(
+    game_state: GameState,
+    depth: int,
+    window: float = ASPIRATION_WINDOW,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    movetime: float | None = None,
+    limits: SearchLimits | None = None,
+    on_iteration: Callable[[int, float, Move], None] | None = None,
+    exclude: list[Move] | None = None,
+) -> tuple[float, Move]:
+    """
+    Search the root at increasing depths up to `depth`.
+
+    Each iteration from `ASPIRATION_MIN_DEPTH` on uses an aspiration window
+    around the previous score and searches the previous best move first.
+    Results of earlier iterations are reused through `tt` if given.
+
+    `movetime` (seconds) is a hard deadline added to `limits`, and no new
+    iteration starts past half of it since it would likely not finish.
+    When a limit stops an iteration, its best move so far is returned if
+    its score is exact, else the result of the previous iteration. The
+    depth 0 iteration ignores the limits, so that there is always a move to
+    return.
+
+    `on_iteration(depth, eval, best_move)` is called after each completed
+    iteration. Root moves in `exclude` are not searched.
+    """
+    start = perf_counter()
+    if movetime is not None:
+        limits = with_deadline(limits, start + movetime)
+
+    eval, best_move = search_root(game_state, 0, stats=stats, tt=tt, exclude=exclude)
+    if stats is not None:
+        stats.nodes_per_depth.append(stats.total_nodes)
+    if on_iteration is not None:
+        on_iteration(0, eval, best_move)
+
+    for d in range(1, depth + 1):
+        searched = stats.total_nodes if stats is not None else 0
+        try:
+            if d < ASPIRATION_MIN_DEPTH:
+                eval, best_move = search_root(
+                    game_state,
+                    d,
+                    pv_move=best_move,
+                    stats=stats,
+                    tt=tt,
+                    limits=limits,
+                    exclude=exclude,
+                )
+            else:
+                eval, best_move = aspiration_search(
+                    game_state, d, eval, best_move, window, stats, tt, limits, exclude
+                )
+        except SearchAborted as aborted:
+            if aborted.partial is not None:
+                eval, best_move = aborted.partial
+            break
+        if stats is not None:
+            stats.nodes_per_depth.append(stats.total_nodes - searched)
+        if on_iteration is not None:
+            on_iteration(d, eval, best_move)
+        if movetime is not None and perf_counter() - start > movetime / 2:
+            break
+
+    if stats is not None:
+        stats.time += perf_counter() - start
+    return eval, best_move
+
+
+@dataclass
+class PVLine:
+    score: float
+    move: Move
+    pv: list[Move]
+
+
+def multipv_search(
+    game_state: GameState,
+    depth: int,
+    lines: int = MULTIPV_LINES,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    movetime: float | None = None,
+    limits: SearchLimits | None = None,
+) -> list[PVLine]:
+    """
+    Iterative deepening giving the best `lines` root moves exact scores and
+    principal variations, best line first.
+
+    At each depth, line k is a full window root search over the moves that
+    are not in lines 1 to k - 1, with the move of line k of the previous
+    depth first. Every line shares the transposition table: the subtrees of
+    the later lines were searched, as siblings of the best move, by the
+    earlier ones, so their stored bounds and best moves make the re-search
+    cheap. Limits and `movetime` work as in `iterative_deepening`.
+    """
+    start = perf_counter()
+    if movetime is not None:
+        limits = with_deadline(limits, start + movetime)
+    tt = tt if tt is not None else TranspositionTable()
+    lines = min(lines, len(generate_move_list(game_state)))
+
+    result = multipv_iteration(game_state, 0, lines, [], stats, tt)
+    if stats is not None:
+        stats.nodes_per_depth.append(stats.total_nodes)
+
+    for d in range(1, depth + 1):
+        searched = stats.total_nodes if stats is not None else 0
+        try:
+            result = multipv_iteration(
+                game_state, d, lines, [line.move for line in result], stats, tt, limits
+            )
+        except SearchAborted:
+            break
+        if stats is not None:
+            stats.nodes_per_depth.append(stats.total_nodes - searched)
+        if movetime is not None and perf_counter() - start > movetime / 2:
+            break
+
+    if stats is not None:
+        stats.time += perf_counter() - start
+    return result
+
+
+def multipv_iteration(
+    game_state: GameState,
+    depth: int,
+    lines: int,
+    previous: list[Move],
+    stats: SearchStats | None,
+    tt: TranspositionTable,
+    limits: SearchLimits | None = None,
+) -> list[PVLine]:
+    """One depth of `multipv_search`, `previous` being the moves of the last one"""
+    result: list[PVLine] = []
+    chosen: list[Move] = []
+    for _ in range(lines):
+        pv_move = next((move for move in previous if move not in chosen), None)
+        eval, move = search_root(
+            game_state,
+            depth,
+            pv_move=pv_move,
+            stats=stats,
+            tt=tt,
+            limits=limits,
+            exclude=chosen,
+        )
+        chosen.append(move)
+        result.append(PVLine(eval, move, principal_variation(game_state, move, tt)))
+    return result
+
+
+def minmax_selection(
+    game_state: GameState,
+    depth: int = 3,
+    stats: SearchStats | None = None,
+    max_nodes: int | None = None,
+    stop: StopFlag | None = None,
+) -> Move:
+    """
+    Best move of an iterative deepening search up to `depth`, stopped early
+    past `max_nodes` nodes or once `stop` is set (eg. a `threading.Event`).
+
+    A node limited search starts from an empty transposition table, so the
+    same position, depth and budget always give the same move.
+    """
+    limits = None
+    if max_nodes is not None or stop is not None:
+        limits = SearchLimits(stop=stop, max_nodes=max_nodes)
+    _, best_move = iterative_deepening(
+        game_state, depth, stats=stats, tt=TranspositionTable(), limits=limits
+    )
     return best_move
+
+
+def minmax_search(
+    game_state: GameState,
+    depth: int = 3,
+    max_nodes: int | None = None,
+    stop: StopFlag | None = None,
+) -> tuple[Move, SearchStats]:
+    """`minmax_selection` returning the statistics of the search with the move"""
+    stats = SearchStats()
+    return minmax_selection(game_state, depth, stats, max_nodes, stop), stats
+
+
+def principal_variation(
+    game_state: GameState,
+    best_move: Move,
+    tt: TranspositionTable,
+    max_length: int = 16,
+) -> list[Move]:
+    """
+    `best_move` followed by the best moves stored in `tt`, as long as they
+    are legal and no position repeats.
+    """
+    pv: list[Move] = []
+    seen = {game_state.zobrist_key}
+    g = game_state
+    move: Move | None = best_move
+    while move is not None and len(pv) < max_length:
+        if not any(
+            m.piece == move.piece
+            and m.to_idx == move.to_idx
+            and m.promotion == move.promotion
+            for m in generate_move_list(g)
+        ):
+            break
+        g = g.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        pv.append(move)
+        if g.zobrist_key in seen:
+            break
+        seen.add(g.zobrist_key)
+        entry = tt.get(g.zobrist_key)
+        move = entry.best_move if entry is not None else None
+    return pv
@@ -0,0 +1,89 @@
+import chess_board as cb
+from config import KING, PAWN, Move, BOARD_TO_FEN
+from game_state import GameState
+from move_selection import generate_move_list, is_capture
+
+
+def move_to_uci(move: Move) -> str:
+    """Long algebraic notation, eg. 'e7e8q'"""
+    uci = cb.index_to_square(move.piece.index) + cb.index_to_square(move.to_idx)
+    if move.promotion is not None:
+        uci += BOARD_TO_FEN[-abs(move.promotion)]
+    return uci
+
+
+def uci_to_move(game_state: GameState, uci: str) -> Move:
+    """The legal move of `game_state` written `uci`, ValueError if none"""
+    for move in generate_move_list(game_state):
+        if move_to_uci(move) == uci:
+            return move
+    raise ValueError(f"Illegal move {uci}")
+
+
+def move_to_san(game_state: GameState, move: Move) -> str:
+    """
+    Standard algebraic notation of the legal `move` in `game_state`, with
+    the check (+) or mate (#) suffix.
+    """
+    piece_type = abs(move.piece.piece)
+    to_square = cb.index_to_square(move.to_idx)
+
+    if piece_type == KING and abs(move.to_idx - move.piece.index) == 2:
+        san = "O-O" if move.to_idx > move.piece.index else "O-O-O"
+    elif piece_type == PAWN:
+        san = ""
+        if is_capture(game_state, move):
+            san = cb.index_to_square(move.piece.index)[0] + "x"
+        san += to_square
+        if move.promotion is not None:
+            san += "=" + BOARD_TO_FEN[abs(move.promotion)]
+    else:
+        san = BOARD_TO_FEN[piece_type] + disambiguation(game_state, move)
+        if is_capture(game_state, move):
+            san += "x"
+        san += to_square
+
+    g = game_state.copy()
+    g.make_move(move.piece, move.to_idx, move.promotion)
+    if g.checkmate:
+        san += "#"
+    elif g.checking_pieces:
+        san += "+"
+    return san
+
+
+def san_to_move(game_state: GameState, san: str) -> Move:
+    """
+    The legal move of `game_state` written `san`, ValueError if none.
+    Check marks, annotations and "e.p." are ignored, and zeros accepted
+    for castling.
+    """
+    wanted = normalize_san(san)
+    for move in generate_move_list(game_state):
+        if normalize_san(move_to_san(game_state, move)) == wanted:
+            return move
+    raise ValueError(f"Illegal move {san}")
+
+
+def normalize_san(san: str) -> str:
+    san = san.removesuffix("e.p.").strip().rstrip("+#!?")
+    return san.replace("0", "O").replace("=", "")
+
+
+def disambiguation(game_state: GameState, move: Move) -> str:
+    """File, rank or square of the moving piece when another one could go there"""
+    rivals = {
+        m.piece.index
+        for m in generate_move_list(game_state)
+        if m.piece.piece == move.piece.piece
+        and m.to_idx == move.to_idx
+        and m.piece.index != move.piece.index
+    }
+    if not rivals:
+        return ""
+    square = cb.index_to_square(move.piece.index)
+    if all(idx % 8 != move.piece.index % 8 for idx in rivals):
+        return square[0]
+    if all(idx // 8 != move.piece.index // 8 for idx in rivals):
+        return square[1]
+    return square
@@ -0,0 +1,218 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+import multiprocessing
+import os
+import sys
+from time import perf_counter
+
+from config import WHITE, Move
+from eval_cache import thread_eval_cache, thread_pawn_table
+from game_state import GameState
+from move_selection import generate_move_list, iterative_deepening, order_moves
+from notation import move_to_uci, uci_to_move
+from search_limits import SearchLimits, StopFlag
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+
+THREADS = "threads"
+PROCESSES = "processes"
+
+# Free-threaded builds (3.13t and later) run Python threads in parallel,
+# builds with a GIL need processes to use more than one core
+FREE_THREADED = not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def default_mode() -> str:
+    return THREADS if FREE_THREADED else PROCESSES
+
+
+def split_root_moves(game_state: GameState, workers: int) -> list[list[Move]]:
+    """
+    Root moves dealt round robin in move order, so that each group starts
+    with one of the likeliest best moves. There are no empty groups.
+    """
+    moves = order_moves(game_state)
+    groups = [moves[i::workers] for i in range(workers)]
+    return [group for group in groups if group]
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("forkserver")
+    )
+
+
+# ===============================================================
+# WORKERS
+# ===============================================================
+
+
+def search_root_moves(
+    game_state: GameState,
+    depth: int,
+    moves: list[Move],
+    tt: TranspositionTable,
+    movetime: float | None = None,
+    limits: SearchLimits | None = None,
+) -> tuple[list[tuple[float, Move]], SearchStats]:
+    """
+    `iterative_deepening` over the root `moves` only, returning the eval and
+    best move of every completed iteration, indexed by depth. An iteration
+    stopped by a limit is left out.
+
+    The search runs on a copy of `game_state` with the caches of the calling
+    thread, so that no position or cache is shared with another worker. The
+    transposition table may be shared: an entry is written as a whole.
+    """
+    g = game_state.copy()
+    if g.eval_cache is not None:
+        g.eval_cache = thread_eval_cache()
+    if g.pawn_table is not None:
+        g.pawn_table = thread_pawn_table()
+    exclude = [move for move in generate_move_list(g) if move not in moves]
+    stats = SearchStats()
+    iterations: list[tuple[float, Move]] = []
+    iterative_deepening(
+        g,
+        depth,
+        stats=stats,
+        tt=tt,
+        movetime=movetime,
+        limits=limits,
+        on_iteration=lambda _, eval, best_move: iterations.append((eval, best_move)),
+        exclude=exclude,
+    )
+    return iterations, stats
+
+
+def search_root_moves_in_process(
+    fen: str,
+    depth: int,
+    moves: list[str],
+    tt_size: int,
+    movetime: float | None,
+    max_nodes: int | None,
+) -> tuple[list[tuple[float, str]], SearchStats]:
+    """`search_root_moves` for a process pool: FEN and moves in UCI notation"""
+    game_state = GameState.from_fen(fen)
+    iterations, stats = search_root_moves(
+        game_state,
+        depth,
+        [uci_to_move(game_state, uci) for uci in moves],
+        TranspositionTable(tt_size),
+        movetime,
+        SearchLimits(max_nodes=max_nodes) if max_nodes is not None else None,
+    )
+    return [(eval, move_to_uci(move)) for eval, move in iterations], stats
+
+
+# ===============================================================
+# PARALLEL SEARCH
+# ===============================================================
+
+
+def parallel_search(
+    game_state: GameState,
+    depth: int,
+    workers: int | None = None,
+    mode: str | None = None,
+    stats: SearchStats | None = None,
+    tt: TranspositionTable | None = None,
+    movetime: float | None = None,
+    max_nodes: int | None = None,
+    stop: StopFlag | None = None,
+    pool: Executor | None = None,
+) -> tuple[float, Move]:
+    """
+    Root splitting search: the root moves are split between `workers`, each
+    group searched by `iterative_deepening`, and the best result is kept
+    among the groups' results at the deepest depth they all completed.
+
+    - threads: a `ThreadPoolExecutor` whose workers share `tt`, only
+      faster than a single search on free-threaded builds
+    - processes: a `ProcessPoolExecutor`, each worker with its own table,
+      started by a fork server since forking a threaded process is unsafe
+
+    `mode` defaults to threads on free-threaded builds, processes otherwise.
+    `max_nodes` is split evenly between the workers and `stop` needs the
+    threads mode. `pool`, an executor of the right kind, saves starting one
+    on every call.
+    """
+    mode = mode if mode is not None else default_mode()
+    if mode not in (THREADS, PROCESSES):
+        raise ValueError(f"Unknown parallel search mode: {mode}")
+    if mode == PROCESSES and stop is not None:
+        raise ValueError("A stop flag needs the threads mode")
+    workers = workers if workers is not None else os.cpu_count() or 1
+    tt = tt if tt is not None else TranspositionTable()
+    groups = split_root_moves(game_state, workers)
+    budget = max_nodes // len(groups) if max_nodes is not None else None
+
+    start = perf_counter()
+    owned = pool is None
+    if pool is None:
+        pool = (
+            ThreadPoolExecutor(len(groups))
+            if mode == THREADS
+            else process_pool(len(groups))
+        )
+    try:
+        if mode == THREADS:
+            limits = None
+            if budget is not None or stop is not None:
+                limits = SearchLimits(stop=stop, max_nodes=budget)
+            futures = [
+                pool.submit(
+                    search_root_moves,
+                    game_state,
+                    depth,
+                    group,
+                    tt,
+                    movetime,
+                    replace(limits) if limits is not None else None,
+                )
+                for group in groups
+            ]
+            results = [future.result() for future in futures]
+        else:
+            fen = game_state.to_fen()
+            futures = [
+                pool.submit(
+                    search_root_moves_in_process,
+                    fen,
+                    depth,
+                    [move_to_uci(move) for move in group],
+                    tt.size,
+                    movetime,
+                    budget,
+                )
+                for group in groups
+            ]
+            results = [
+                (
+                    [(eval, uci_to_move(game_state, uci)) for eval, uci in iterations],
+                    worker_stats,
+                )
+                for iterations, worker_stats in (future.result() for future in futures)
+            ]
+    finally:
+        if owned:
+            pool.shutdown()
+
+    if stats is not None:
+        for _, worker_stats in results:
+            stats.add(worker_stats)
+        stats.time += perf_counter() - start
+
+    # With limits the groups may stop at different depths, and evals of
+    # different depths do not compare: keep the deepest depth all completed
+    depth_reached = min(len(iterations) for iterations, _ in results) - 1
+    candidates = [iterations[depth_reached] for iterations, _ in results]
+
+    # Ties go to the earlier group, which holds the better ordered moves
+    maximazing = game_state.active_color == WHITE
+    best_eval, best_move = candidates[0]
+    for eval, move in candidates[1:]:
+        if eval > best_eval if maximazing else eval < best_eval:
+            best_eval, best_move = eval, move
+    return best_eval, best_move
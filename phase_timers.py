@@ -0,0 +1,130 @@
+from collections.abc import Callable
+from functools import wraps
+import sys
+from time import perf_counter
+
+import game_logic
+import legal_moves
+import move_generation
+from game_state import GameState
+
+# Functions timed by `PhaseTimers`: (owner, attribute name). Module level
+# functions are also replaced wherever they were imported by name.
+PHASES: list[tuple[object, str]] = [
+    (legal_moves, "generate_legal_moves"),
+    (game_logic, "analyze_king_safety"),
+    (move_generation, "generate_controlled_squares"),
+    (GameState, "make_move"),
+    (GameState, "copy"),
+    (GameState, "evaluate"),
+]
+
+
+class PhaseTimers:
+    """
+    Opt-in wall time and call counts of the engine hot spots (`PHASES`).
+
+    Nothing is instrumented until `enable` (or entering the context manager)
+    swaps the timed wrappers in, and `disable` puts the original functions
+    back, so the engine runs untouched when timers are off.
+
+    Phases nest (make_move generates the legal moves, which generate the
+    controlled squares): `total` is inclusive, `own` excludes the time
+    spent in nested phases.
+    """
+
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+        self.total: dict[str, float] = {}
+        self.own: dict[str, float] = {}
+        self._children: list[float] = []
+        self._patched: list[tuple[object, str, Callable]] = []
+        self.reset()
+
+    def __enter__(self) -> "PhaseTimers":
+        self.enable()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return self._patched != []
+
+    def reset(self) -> None:
+        for _, name in PHASES:
+            self.calls[name] = 0
+            self.total[name] = 0.0
+            self.own[name] = 0.0
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        for owner, name in PHASES:
+            original = getattr(owner, name)
+            timed = self._wrap(name, original)
+            if isinstance(owner, type):
+                self._patch(owner, name, original, timed)
+                continue
+            # `from module import function` made copies of the reference
+            for module in list(sys.modules.values()):
+                if getattr(module, name, None) is original:
+                    self._patch(module, name, original, timed)
+
+    def disable(self) -> None:
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    def _patch(self, owner: object, name: str, original: Callable, timed: Callable):
+        self._patched.append((owner, name, original))
+        setattr(owner, name, timed)
+
+    def _wrap(self, name: str, func: Callable) -> Callable:
+        calls = self.calls
+        total = self.total
+        own = self.own
+        children = self._children
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            children.append(0.0)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                nested = children.pop()
+                if children:
+                    children[-1] += elapsed
+                calls[name] += 1
+                total[name] += elapsed
+                own[name] += elapsed - nested
+
+        return timed
+
+    def report(self, elapsed: float | None = None) -> str:
+        """
+        Table of the phases, slowest (own time) first. With the `elapsed`
+        time of the search, own times are also given as a share of it.
+        """
+        lines = [
+            f"{'phase':<28} {'calls':>9} {'total ms':>10} {'own ms':>10}"
+            f" {'us/call':>8} {'%':>6}"
+        ]
+        for name in sorted(self.own, key=self.own.__getitem__, reverse=True):
+            calls = self.calls[name]
+            per_call = self.total[name] / calls * 1e6 if calls else 0.0
+            share = 100 * self.own[name] / elapsed if elapsed else 0.0
+            lines.append(
+                f"{name:<28} {calls:>9} {self.total[name] * 1e3:>10.1f}"
+                f" {self.own[name] * 1e3:>10.1f} {per_call:>8.1f} {share:>6.1f}"
+            )
+        if elapsed:
+            rest = elapsed - sum(self.own.values())
+            lines.append(
+                f"{'(search and other)':<28} {'':>9} {'':>10}"
+                f" {rest * 1e3:>10.1f} {'':>8} {100 * rest / elapsed:>6.1f}"
+            )
+        return "\n".join(lines)
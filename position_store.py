@@ -0,0 +1,340 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+
+from config import Move, Piece
+from game_state import POSITION_SIZE, GameState, decode_board
+
+# ===============================================================
+# FILE LAYOUT
+# ===============================================================
+
+# Data file: header, then append-only fixed size records
+#   - key: zobrist key of the position
+#   - position: packed position (see `game_state.pack_position`)
+#   - from_idx, to_idx: best move, NO_MOVE if none
+#   - promotion: signed promotion piece, 0 if none
+#   - score, depth: result of the search that produced the best move
+DATA_MAGIC = b"PSTORE02"
+DATA_HEADER = struct.Struct("<8sI")
+# Scores are doubles, so that they read back as the floats the search returned
+RECORD_STRUCT = struct.Struct(f"<Q{POSITION_SIZE}sBBbdB")
+RECORD_SIZE = RECORD_STRUCT.size
+NO_MOVE = 0xFF
+
+# Index file: header, then an open-addressing hash table (linear probing)
+# of (key, record offset) slots. Key 0 marks an empty slot.
+#   - capacity: number of slots
+#   - count: number of keys
+#   - data_size, records: size and number of records of the data file the
+#     index was built from, an index out of step with the data file is rebuilt
+INDEX_MAGIC = b"PINDEX02"
+INDEX_HEADER = struct.Struct("<8sQQQQ")
+SLOT_STRUCT = struct.Struct("<QQ")
+SLOT_SIZE = SLOT_STRUCT.size
+
+DEFAULT_INDEX_CAPACITY = 1 << 16
+MAX_LOAD_FACTOR = 0.7
+
+# Bytes of the packed position that identify it: board, flags and en passant
+# target, but not the move counters.
+POSITION_IDENTITY_SIZE = 34
+
+
+@dataclass
+class StoredPosition:
+    position: bytes
+    best_move: Move | None
+    score: float
+    depth: int
+
+
+def store_key(zobrist_key: int) -> int:
+    """Key 0 marks empty index slots, so it is stored as 1"""
+    return zobrist_key or 1
+
+
+# ===============================================================
+# POSITION STORE
+# ===============================================================
+
+
+class PositionStore:
+    """
+    On disk store of analyzed positions.
+
+    Records are appended to `path` and read back through a memory map.
+    `path + ".idx"` holds a memory-mapped hash index from zobrist key to the
+    latest record of the position, so a lookup reads a couple of slots and
+    one record without loading the file. `compact` drops superseded records.
+    """
+
+    def __init__(self, path: str, index_capacity: int = DEFAULT_INDEX_CAPACITY):
+        if index_capacity & (index_capacity - 1):
+            raise ValueError("Index capacity must be a power of two")
+
+        self.path: str = path
+        self.index_path: str = path + ".idx"
+
+        new_file = not os.path.exists(path)
+        self._data_file = open(path, "a+b", buffering=0)
+        if new_file:
+            self._data_file.write(DATA_HEADER.pack(DATA_MAGIC, RECORD_SIZE))
+        self._check_data_header()
+        self._data_size: int = self._drop_partial_record()
+        self._data_map: mmap.mmap = self._map_data()
+
+        if not (os.path.exists(self.index_path) and self._open_index()):
+            self._rebuild_index(index_capacity)
+
+    # ---------------------------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, game_state: GameState) -> bool:
+        return self.get(game_state) is not None
+
+    def __enter__(self) -> "PositionStore":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def get(self, game_state: GameState) -> StoredPosition | None:
+        """Latest record of `game_state`, None if it was never stored"""
+        offset = self._find_offset(store_key(game_state.zobrist_key))
+        if offset is None:
+            return None
+        stored = self._read_record(offset)
+        # Guard against zobrist collisions
+        if (
+            stored.position[:POSITION_IDENTITY_SIZE]
+            != game_state.to_bytes()[:POSITION_IDENTITY_SIZE]
+        ):
+            return None
+        return stored
+
+    def put(
+        self,
+        game_state: GameState,
+        best_move: Move | None,
+        score: float,
+        depth: int,
+    ) -> bool:
+        """
+        Append a record for `game_state`.
+
+        A position already stored with a deeper search is left as is.
+
+        Returns:
+            True if the record was written
+        """
+        key = store_key(game_state.zobrist_key)
+        existing = self._find_offset(key)
+        if existing is not None and self._read_record(existing).depth > depth:
+            return False
+
+        if best_move is None:
+            from_idx, to_idx, promotion = NO_MOVE, NO_MOVE, 0
+        else:
+            from_idx = best_move.piece.index
+            to_idx = best_move.to_idx
+            promotion = best_move.promotion or 0
+
+        offset = self._data_size
+        self._data_file.write(
+            RECORD_STRUCT.pack(
+                key,
+                game_state.to_bytes(),
+                from_idx,
+                to_idx,
+                promotion,
+                score,
+                depth,
+            )
+        )
+        self._data_size += RECORD_SIZE
+        self._insert(key, offset)
+        self._write_index_header()
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the data file with only the latest record of each position"""
+        offsets = sorted(offset for _, offset in self._slots())
+        self._refresh_data_map()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(DATA_HEADER.pack(DATA_MAGIC, RECORD_SIZE))
+            for offset in offsets:
+                f.write(self._data_map[offset : offset + RECORD_SIZE])
+
+        self._data_map.close()
+        self._data_file.close()
+        os.replace(tmp_path, self.path)
+
+        self._data_file = open(self.path, "a+b", buffering=0)
+        self._data_size = os.path.getsize(self.path)
+        self._data_map = self._map_data()
+        self._rebuild_index(self._capacity)
+
+    def close(self) -> None:
+        self._index_map.flush()
+        self._index_map.close()
+        self._index_file.close()
+        self._data_map.close()
+        self._data_file.close()
+
+    # ---------------------------------------------------------------------
+    # DATA FILE
+    # ---------------------------------------------------------------------
+
+    def _check_data_header(self) -> None:
+        self._data_file.seek(0)
+        header = self._data_file.read(DATA_HEADER.size)
+        if (
+            len(header) != DATA_HEADER.size
+            or DATA_HEADER.unpack(header) != (DATA_MAGIC, RECORD_SIZE)
+        ):
+            self._data_file.close()
+            raise ValueError(f"{self.path} is not a position store")
+
+    def _drop_partial_record(self) -> int:
+        """
+        Truncate a record cut short by a crash while it was written.
+
+        Returns:
+            the size of the data file
+        """
+        size = os.path.getsize(self.path)
+        partial = (size - DATA_HEADER.size) % RECORD_SIZE
+        if partial:
+            size -= partial
+            self._data_file.truncate(size)
+        return size
+
+    def _map_data(self) -> mmap.mmap:
+        return mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _refresh_data_map(self) -> None:
+        """Records appended since the file was mapped are not visible yet"""
+        if len(self._data_map) < self._data_size:
+            self._data_map.close()
+            self._data_map = self._map_data()
+
+    def _read_record(self, offset: int) -> StoredPosition:
+        if offset + RECORD_SIZE > len(self._data_map):
+            self._refresh_data_map()
+
+        _, position, from_idx, to_idx, promotion, score, depth = (
+            RECORD_STRUCT.unpack_from(self._data_map, offset)
+        )
+        best_move: Move | None = None
+        if from_idx != NO_MOVE:
+            board = decode_board(position[:32])
+            best_move = Move(
+                Piece(board[from_idx], from_idx), to_idx, promotion or None
+            )
+        return StoredPosition(position, best_move, score, depth)
+
+    # ---------------------------------------------------------------------
+    # INDEX FILE
+    # ---------------------------------------------------------------------
+
+    def _open_index(self) -> bool:
+        """
+        Map the index file.
+
+        Returns:
+            False if it does not match the data file, which was written to
+            by something else or after the last index update
+        """
+        if os.path.getsize(self.index_path) < INDEX_HEADER.size:
+            return False
+        self._index_file = open(self.index_path, "r+b")
+        self._index_map = mmap.mmap(self._index_file.fileno(), 0)
+        magic, capacity, count, data_size, records = INDEX_HEADER.unpack_from(
+            self._index_map, 0
+        )
+        self._capacity: int = capacity
+        self._count: int = count
+        return (
+            magic == INDEX_MAGIC
+            and data_size == self._data_size
+            and records == self._records()
+            and len(self._index_map) == INDEX_HEADER.size + capacity * SLOT_SIZE
+        )
+
+    def _write_index_header(self) -> None:
+        INDEX_HEADER.pack_into(
+            self._index_map,
+            0,
+            INDEX_MAGIC,
+            self._capacity,
+            self._count,
+            self._data_size,
+            self._records(),
+        )
+
+    def _records(self) -> int:
+        return (self._data_size - DATA_HEADER.size) // RECORD_SIZE
+
+    def _rebuild_index(self, capacity: int) -> None:
+        """Create an empty index of `capacity` slots and fill it from the data file"""
+        while self._data_size // RECORD_SIZE > capacity * MAX_LOAD_FACTOR:
+            capacity *= 2
+
+        if hasattr(self, "_index_map"):
+            self._index_map.close()
+            self._index_file.close()
+
+        with open(self.index_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, capacity, 0, 0, 0))
+            f.truncate(INDEX_HEADER.size + capacity * SLOT_SIZE)
+        self._open_index()
+
+        self._refresh_data_map()
+        for offset in range(DATA_HEADER.size, self._data_size, RECORD_SIZE):
+            key = struct.unpack_from("<Q", self._data_map, offset)[0]
+            self._insert(key, offset)
+        self._write_index_header()
+
+    def _slot_position(self, slot: int) -> int:
+        return INDEX_HEADER.size + slot * SLOT_SIZE
+
+    def _slots(self) -> Iterator[tuple[int, int]]:
+        for slot in range(self._capacity):
+            key, offset = SLOT_STRUCT.unpack_from(
+                self._index_map, self._slot_position(slot)
+            )
+            if key:
+                yield key, offset
+
+    def _find_slot(self, key: int) -> tuple[int, int | None]:
+        """Slot holding `key`, or the empty slot where it would go"""
+        mask = self._capacity - 1
+        slot = key & mask
+        while True:
+            slot_key, offset = SLOT_STRUCT.unpack_from(
+                self._index_map, self._slot_position(slot)
+            )
+            if slot_key == key:
+                return slot, offset
+            if slot_key == 0:
+                return slot, None
+            slot = (slot + 1) & mask
+
+    def _find_offset(self, key: int) -> int | None:
+        return self._find_slot(key)[1]
+
+    def _insert(self, key: int, offset: int) -> None:
+        slot, existing = self._find_slot(key)
+        SLOT_STRUCT.pack_into(self._index_map, self._slot_position(slot), key, offset)
+        if existing is None:
+            self._count += 1
+            if self._count > self._capacity * MAX_LOAD_FACTOR:
+                self._rebuild_index(self._capacity * 2)
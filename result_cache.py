@@ -0,0 +1,248 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+import sqlite3
+import time
+
+from config import Move
+from game_state import GameState
+from move_selection import iterative_deepening, principal_variation
+from notation import move_to_uci
+from search_limits import SearchLimits
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+
+SCHEMA_VERSION = 1
+DEFAULT_MAX_ENTRIES = 1_000_000
+# Puts between two checks of the size cap
+PRUNE_INTERVAL = 1000
+# Pruning keeps this fraction of `max_entries`, so that it runs rarely
+PRUNE_TARGET = 0.9
+# Seconds a result's last use may be stale: a hit only writes it back when
+# older, so that reads rarely wait on the WAL writer lock
+TOUCH_INTERVAL = 60.0
+# Plies within which the 50-move rule may end a search: deeper than any
+# search worth caching. Halfmove clocks further from 100 share a key.
+CLOCK_HORIZON = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    fen TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    best_move TEXT NOT NULL,
+    score REAL NOT NULL,
+    pv TEXT NOT NULL,
+    nodes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+# Only a search at least as deep replaces a stored result
+UPSERT = """
+INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (fen) DO UPDATE SET
+    depth = excluded.depth,
+    best_move = excluded.best_move,
+    score = excluded.score,
+    pv = excluded.pv,
+    nodes = excluded.nodes,
+    last_used = excluded.last_used
+WHERE excluded.depth >= results.depth
+"""
+
+
+@dataclass
+class AnalysisResult:
+    """Result of a search, moves in UCI notation"""
+
+    best_move: str
+    score: float
+    depth: int
+    pv: list[str]
+    nodes: int
+
+
+def normalize_fen(game_state: GameState) -> str:
+    """
+    FEN without the move counters, which do not change the search, except
+    for a halfmove clock close enough to 100 for the search to adjudicate a
+    50-move draw
+    """
+    fields = game_state.to_fen().split()
+    if game_state.half_moves >= 100 - CLOCK_HORIZON:
+        return " ".join(fields[:5])
+    return " ".join(fields[:4])
+
+
+class ResultCache:
+    """
+    SQLite cache of search results keyed by normalized FEN.
+
+    Each position keeps its deepest result, served to any search asking for
+    the same depth or less. The database runs in WAL mode so that several
+    worker processes can read while one writes. Past `max_entries`, the
+    least recently used results are pruned, the time of last use being
+    recorded to within `TOUCH_INTERVAL`.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self._puts: int = 0
+        self._db = sqlite3.connect(path, timeout=30)
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._db.close()
+            raise ValueError(f"{path} has cache schema {version}")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # ---------------------------------------------------------------------
+    # PUBLIC API
+    # ---------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def get(self, game_state: GameState, depth: int) -> AnalysisResult | None:
+        """Stored result of `game_state` searched at `depth` or deeper"""
+        fen = normalize_fen(game_state)
+        row = self._db.execute(
+            "SELECT best_move, score, depth, pv, nodes, last_used FROM results"
+            " WHERE fen = ? AND depth >= ?",
+            (fen, depth),
+        ).fetchone()
+        if row is None:
+            return None
+        best_move, score, stored_depth, pv, nodes, last_used = row
+        now = time.time()
+        if now - last_used >= TOUCH_INTERVAL:
+            with self._db:
+                self._db.execute(
+                    "UPDATE results SET last_used = ? WHERE fen = ?", (now, fen)
+                )
+        return AnalysisResult(best_move, score, stored_depth, pv.split(), nodes)
+
+    def put(self, game_state: GameState, result: AnalysisResult) -> None:
+        with self._db:
+            self._db.execute(UPSERT, self._row(game_state, result))
+        self._puts += 1
+        if self._puts >= PRUNE_INTERVAL:
+            self.prune()
+
+    def put_many(self, results: Iterable[tuple[GameState, AnalysisResult]]) -> None:
+        """Store many results in a single transaction"""
+        rows = (self._row(game_state, result) for game_state, result in results)
+        with self._db:
+            self._db.executemany(UPSERT, rows)
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Delete the least recently used results once there are more than
+        `max_entries`, down to `PRUNE_TARGET` of it.
+
+        Returns:
+            the number of results deleted
+        """
+        self._puts = 0
+        count = len(self)
+        if count <= self.max_entries:
+            return 0
+        excess = count - int(self.max_entries * PRUNE_TARGET)
+        with self._db:
+            self._db.execute(
+                "DELETE FROM results WHERE fen IN"
+                " (SELECT fen FROM results ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        return excess
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ---------------------------------------------------------------------
+    # HELPERS
+    # ---------------------------------------------------------------------
+
+    @staticmethod
+    def _row(game_state: GameState, result: AnalysisResult) -> tuple:
+        return (
+            normalize_fen(game_state),
+            result.depth,
+            result.best_move,
+            result.score,
+            " ".join(result.pv),
+            result.nodes,
+            time.time(),
+        )
+
+
+def search(
+    game_state: GameState,
+    depth: int,
+    tt: TranspositionTable | None = None,
+    movetime: float | None = None,
+    limits: SearchLimits | None = None,
+    completed_only: bool = False,
+) -> AnalysisResult:
+    """
+    `iterative_deepening` returning an `AnalysisResult`.
+
+    A search stopped by a limit may return the best move of its unfinished
+    iteration; with `completed_only` the result is the one of the last
+    completed iteration, which the reported depth fully backs.
+    """
+    tt = tt if tt is not None else TranspositionTable()
+    stats = SearchStats()
+    completed: list[tuple[float, Move]] = []
+    score, best_move = iterative_deepening(
+        game_state,
+        depth,
+        stats=stats,
+        tt=tt,
+        movetime=movetime,
+        limits=limits,
+        on_iteration=lambda _, score, move: completed.append((score, move)),
+    )
+    if completed_only:
+        score, best_move = completed[-1]
+    return AnalysisResult(
+        move_to_uci(best_move),
+        score,
+        len(completed) - 1,
+        [move_to_uci(move) for move in principal_variation(game_state, best_move, tt)],
+        stats.total_nodes,
+    )
+
+
+def cached_search(
+    cache: ResultCache,
+    game_state: GameState,
+    depth: int,
+    tt: TranspositionTable | None = None,
+    limits: SearchLimits | None = None,
+) -> tuple[AnalysisResult, bool]:
+    """
+    Result of `game_state` at `depth` from `cache`, searched and stored on a
+    miss. A search stopped by `limits` is stored with the result of the
+    last iteration it completed.
+
+    Returns:
+        the result and whether it came from the cache
+    """
+    result = cache.get(game_state, depth)
+    if result is not None:
+        return result, True
+    result = search(game_state, depth, tt, limits=limits, completed_only=True)
+    cache.put(game_state, result)
+    return result, False
@@ -0,0 +1,77 @@
+from dataclasses import dataclass, replace
+from time import perf_counter
+from typing import Protocol
+
+from config import Move
+
+# Nodes searched between two checks of the clock and of the stop flag
+POLL_INTERVAL = 256
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the search when a limit is reached.
+
+    `partial` is set by an interrupted root search to its best (eval, move)
+    pair when that eval is exact, i.e. inside the root window.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.partial: tuple[float, Move] | None = None
+
+
+class StopFlag(Protocol):
+    """`threading.Event`, `multiprocessing.Event` or anything alike"""
+
+    def is_set(self) -> bool: ...
+
+
+@dataclass
+class SearchLimits:
+    """
+    Limits checked by the search at every node:
+        - max_nodes: budget of nodes (alpha-beta and quiescence)
+        - deadline: `perf_counter()` time past which the search stops
+        - stop: flag set by another thread or process to stop the search
+
+    The node budget is checked at every node, so a node limited search stops
+    at the same node on every run and its result is reproducible. The clock
+    and the stop flag are polled every `poll_interval` nodes only.
+
+    A search hitting a limit raises `SearchAborted`, which
+    `iterative_deepening` turns into the best move found so far.
+    """
+
+    deadline: float | None = None
+    stop: StopFlag | None = None
+    max_nodes: int | None = None
+    poll_interval: int = POLL_INTERVAL
+    nodes: int = 0
+
+    @classmethod
+    def from_movetime(
+        cls, movetime: float, stop: StopFlag | None = None
+    ) -> "SearchLimits":
+        return cls(perf_counter() + movetime, stop)
+
+    def check(self) -> None:
+        """Count a node, raise `SearchAborted` if a limit is reached"""
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted
+        if self.nodes % self.poll_interval:
+            return
+        if self.stop is not None and self.stop.is_set():
+            raise SearchAborted
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise SearchAborted
+
+
+def with_deadline(limits: SearchLimits | None, deadline: float) -> SearchLimits:
+    """Copy of `limits` stopping at `deadline` at the latest"""
+    if limits is None:
+        return SearchLimits(deadline)
+    if limits.deadline is not None and limits.deadline <= deadline:
+        return limits
+    return replace(limits, deadline=deadline)
@@ -0,0 +1,112 @@
+from dataclasses import asdict, dataclass, field, fields
+
+
+@dataclass
+class SearchStats:
+    """
+    Counters filled by the search when a `SearchStats` is passed to it.
+
+    Nodes:
+        - nodes: alpha-beta nodes (depth > 0)
+        - qnodes: quiescence nodes
+        - nodes_per_depth: nodes + qnodes of each iterative deepening
+          iteration, indexed by depth
+        - cutoffs: alpha-beta nodes failing high (beta <= alpha)
+        - first_move_cutoffs: cutoffs produced by the first move searched
+
+    Transposition table:
+        - tt_probes: lookups at alpha-beta nodes
+        - tt_hits: lookups finding the position
+        - tt_cutoffs: hits whose score was returned without searching
+
+    Aspiration windows:
+        - fail_lows: root searches returning a score <= alpha
+        - fail_highs: root searches returning a score >= beta
+        - re_searches: root searches repeated with a wider window
+
+    Pruning near the leaves:
+        - futility_pruned: quiet moves skipped at frontier nodes
+        - razored: pre-frontier nodes resolved by a quiescence search
+        - see_pruned: losing captures (negative SEE) skipped in quiescence
+
+    time: seconds spent in `iterative_deepening`
+    """
+
+    nodes: int = 0
+    qnodes: int = 0
+    nodes_per_depth: list[int] = field(default_factory=list)
+    cutoffs: int = 0
+    first_move_cutoffs: int = 0
+
+    tt_probes: int = 0
+    tt_hits: int = 0
+    tt_cutoffs: int = 0
+
+    aspiration_searches: int = 0
+    fail_lows: int = 0
+    fail_highs: int = 0
+    re_searches: int = 0
+
+    futility_pruned: int = 0
+    razored: int = 0
+    see_pruned: int = 0
+
+    time: float = 0
+
+    @property
+    def total_nodes(self) -> int:
+        return self.nodes + self.qnodes
+
+    @property
+    def nps(self) -> float:
+        """Nodes (including quiescence) per second"""
+        return self.total_nodes / self.time if self.time else 0.0
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of cutoffs caused by the first move, a measure of move ordering"""
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    @property
+    def tt_hit_rate(self) -> float:
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def effective_branching_factor(self) -> float:
+        """Ratio of the node counts of the last two iterations"""
+        if len(self.nodes_per_depth) < 2 or not self.nodes_per_depth[-2]:
+            return 0.0
+        return self.nodes_per_depth[-1] / self.nodes_per_depth[-2]
+
+    def add(self, other: "SearchStats") -> None:
+        """
+        Add the counters of `other`, eg. of a search run by another worker.
+        Nodes per depth are added depth by depth, `time` is left unchanged.
+        """
+        for f in fields(self):
+            if f.name in ("nodes_per_depth", "time"):
+                continue
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+        for depth, nodes in enumerate(other.nodes_per_depth):
+            if depth < len(self.nodes_per_depth):
+                self.nodes_per_depth[depth] += nodes
+            else:
+                self.nodes_per_depth.append(nodes)
+
+    def to_dict(self) -> dict:
+        """Counters and derived rates, ready to be serialized"""
+        stats = asdict(self)
+        stats.update(
+            total_nodes=self.total_nodes,
+            nps=self.nps,
+            first_move_cutoff_rate=self.first_move_cutoff_rate,
+            tt_hit_rate=self.tt_hit_rate,
+            effective_branching_factor=self.effective_branching_factor,
+        )
+        return stats
+
+    def to_json(self, **kwargs) -> str:
+        """`to_dict` as JSON, `kwargs` are passed to `json.dumps`"""
+        import json
+
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,74 @@
+from collections.abc import Callable
+import marshal
+import os
+import sys
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+# Bumped whenever the layout of the file changes
+TABLE_CACHE_VERSION = 1
+# A marshal file is only read back by the Python version that wrote it
+HEADER = (TABLE_CACHE_VERSION, marshal.version, sys.version_info[:2])
+
+DEFAULT_TABLE_CACHE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "__pycache__", "tables.marshal"
+)
+# Path of the cache file, an empty value disables the cache
+TABLE_CACHE_ENV = "CHESS_TABLE_CACHE"
+
+# name -> (parameters, table), read from the file on first use
+_tables: dict[str, tuple[Any, Any]] | None = None
+
+
+def table_cache_path() -> str | None:
+    path = os.environ.get(TABLE_CACHE_ENV, DEFAULT_TABLE_CACHE)
+    return path or None
+
+
+def read_tables(path: str) -> dict[str, tuple[Any, Any]]:
+    """Every table of the file at `path` in one read, none if it is stale"""
+    try:
+        with open(path, "rb") as f:
+            header, tables = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return {}
+    return tables if header == HEADER else {}
+
+
+def write_tables(path: str, tables: dict[str, tuple[Any, Any]]) -> None:
+    """Replace the file atomically, a read-only install keeps no cache"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(marshal.dumps((HEADER, tables)))
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def cached_table(name: str, params: Any, build: Callable[[], T]) -> T:
+    """
+    Table `name` built by `build()` from `params`, stored in a binary file
+    so that later processes load it instead of building it again.
+
+    Tables are made of ints, floats, strings, lists, tuples and dicts (what
+    `marshal` stores). `params` identifies the table: a stored table built
+    from other parameters is rebuilt. Meant to be called at import time.
+    """
+    global _tables
+    path = table_cache_path()
+    if path is None:
+        return build()
+    if _tables is None:
+        _tables = read_tables(path)
+
+    stored = _tables.get(name)
+    if stored is not None and stored[0] == params:
+        return stored[1]
+    table = build()
+    _tables[name] = (params, table)
+    write_tables(path, _tables)
+    return table
@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+from analysis_server import AnalysisServer, analyze_position, percentile
+
+fen_mate_in_one = "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1"
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+async def send(writer: asyncio.StreamWriter, request: dict) -> None:
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+
+
+async def receive(reader: asyncio.StreamReader) -> dict:
+    return json.loads(await asyncio.wait_for(reader.readline(), 30))
+
+
+def run_session(session, **listen) -> None:
+    async def main():
+        server = AnalysisServer(workers=1, queue_size=4)
+        listener = await server.start(**listen)
+        try:
+            if "path" in listen:
+                reader, writer = await asyncio.open_unix_connection(listen["path"])
+            else:
+                port = listener.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await session(server, reader, writer)
+            writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(main())
+
+
+def test_analyze_position():
+    result = analyze_position(fen_mate_in_one, 2, None)
+
+    assert result["bestmove"] == "b1b8"
+    assert result["san"] == "Qb8#"
+    assert result["pv"] == ["b1b8"]
+    assert result["depth"] == 2
+    assert result["nodes"] > 0
+
+
+def test_percentile():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 50) == 2.0
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_server_analyze_and_metrics():
+    async def session(server, reader, writer):
+        await send(writer, {"id": 1, "fen": fen_mate_in_one, "depth": 2})
+        response = await receive(reader)
+        assert response["id"] == 1
+        assert response["status"] == "ok"
+        assert response["bestmove"] == "b1b8"
+
+        await send(writer, {"id": 2, "type": "metrics"})
+        metrics = await receive(reader)
+        assert metrics["id"] == 2
+        assert metrics["completed"] == 1
+        assert metrics["queue_depth"] == 0
+        assert metrics["latency_p99"] >= metrics["latency_p50"] > 0
+
+    run_session(session)
+
+
+def test_server_unix_socket(tmp_path):
+    async def session(server, reader, writer):
+        await send(writer, {"id": "a", "fen": fen_mate_in_one, "depth": 1})
+        assert (await receive(reader))["bestmove"] == "b1b8"
+
+    run_session(session, path=str(tmp_path / "analysis.sock"))
+
+
+def test_server_rejects_invalid_requests():
+    async def session(server, reader, writer):
+        writer.write(b"not json\n")
+        assert (await receive(reader))["status"] == "error"
+
+        await send(writer, {"id": 1, "fen": fen_mate_in_one, "depth": 0})
+        response = await receive(reader)
+        assert response == {"id": 1, "status": "error", "error": response["error"]}
+
+        await send(writer, {"id": 2, "type": "cancel"})
+        assert (await receive(reader))["status"] == "error"
+
+        await send(writer, {"id": 3, "fen": "8/8/8/8 w - - 0 1"})
+        assert (await receive(reader))["status"] == "error"
+
+        # Unhashable ids are rejected and the connection keeps serving
+        for request_id in ([4], {"n": 5}):
+            await send(writer, {"id": request_id, "fen": fen_mate_in_one})
+            assert (await receive(reader))["status"] == "error"
+            await send(writer, {"id": request_id, "type": "cancel"})
+            assert (await receive(reader))["status"] == "error"
+        await send(writer, {"id": 6, "fen": fen_mate_in_one, "depth": 1})
+        assert (await receive(reader))["id"] == 6
+
+    run_session(session)
+
+
+def test_server_cancel_queued_request():
+    async def session(server, reader, writer):
+        await send(writer, {"id": 1, "fen": fen_tactic_4, "depth": 3})
+        await send(writer, {"id": 2, "fen": fen_tactic_4, "depth": 3})
+        await send(writer, {"id": 2, "type": "cancel"})
+
+        assert await receive(reader) == {"id": 2, "status": "cancelled"}
+        assert (await receive(reader))["id"] == 1
+
+        await send(writer, {"type": "metrics"})
+        metrics = await receive(reader)
+        assert metrics["completed"] == 1
+        assert metrics["cancelled"] == 1
+
+    run_session(session)
+
+
+def test_server_cancel_running_request():
+    async def session(server, reader, writer):
+        await send(writer, {"id": 1, "fen": fen_tactic_4, "depth": 10})
+        while server.running == 0:
+            await asyncio.sleep(0.01)
+        await send(writer, {"id": 1, "type": "cancel"})
+        assert await receive(reader) == {"id": 1, "status": "cancelled"}
+
+        # The stopped search frees the only worker for the next request
+        await send(writer, {"id": 2, "fen": fen_mate_in_one, "depth": 1})
+        response = await asyncio.wait_for(receive(reader), 5)
+        assert response["id"] == 2
+        assert response["bestmove"] == "b1b8"
+
+    run_session(session)
+
+
+def test_server_movetime_is_a_hard_limit():
+    async def session(server, reader, writer):
+        await send(writer, {"id": 1, "fen": fen_tactic_4, "movetime": 0.3})
+        response = await receive(reader)
+
+        assert response["status"] == "ok"
+        assert response["time"] < 0.6
+
+    run_session(session)
+
+
+def test_server_multipv():
+    async def session(server, reader, writer):
+        await send(writer, {"id": 1, "fen": fen_tactic_4, "depth": 2, "multipv": 3})
+        response = await receive(reader)
+
+        assert response["status"] == "ok"
+        assert len(response["lines"]) == 3
+        assert response["bestmove"] == response["lines"][0]["bestmove"]
+        assert len({line["bestmove"] for line in response["lines"]}) == 3
+        scores = [line["score"] for line in response["lines"]]
+        assert scores == sorted(scores, reverse=True)
+
+        await send(writer, {"id": 2, "fen": fen_tactic_4, "multipv": 0})
+        assert (await receive(reader))["status"] == "error"
+
+    run_session(session)
@@ -0,0 +1,58 @@
+from attack_tables import (
+    BETWEEN,
+    DIAGONAL_RAYS,
+    KING_ATTACKS,
+    KNIGHT_ATTACKS,
+    LINE,
+    ORTHOGONAL_RAYS,
+    PAWN_ATTACKS,
+    build_attack_tables,
+    occupancy,
+    squares,
+)
+from chess_board import square_to_index
+from config import BLACK, WHITE
+
+
+def mask(*names: str) -> int:
+    return occupancy([square_to_index(name) for name in names])
+
+
+def sq(name: str) -> int:
+    return square_to_index(name)
+
+
+def test_between():
+    assert BETWEEN[sq("a1")][sq("d4")] == mask("b2", "c3")
+    assert BETWEEN[sq("d4")][sq("a1")] == mask("b2", "c3")
+    assert BETWEEN[sq("e1")][sq("e4")] == mask("e2", "e3")
+    assert BETWEEN[sq("a1")][sq("b1")] == 0
+    assert BETWEEN[sq("a1")][sq("b3")] == 0
+
+
+def test_line():
+    assert LINE[sq("c3")][sq("e5")] == mask(
+        "a1", "b2", "c3", "d4", "e5", "f6", "g7", "h8"
+    )
+    assert LINE[sq("a1")][sq("b3")] == 0
+
+
+def test_piece_attacks():
+    assert KNIGHT_ATTACKS[sq("a1")] == mask("b3", "c2")
+    assert KING_ATTACKS[sq("h8")] == mask("g8", "g7", "h7")
+    assert PAWN_ATTACKS[WHITE][sq("a2")] == mask("b3")
+    assert PAWN_ATTACKS[BLACK][sq("e5")] == mask("d4", "f4")
+    assert bin(ORTHOGONAL_RAYS[sq("d4")]).count("1") == 14
+    assert bin(DIAGONAL_RAYS[sq("d4")]).count("1") == 13
+
+
+def test_cached_tables_match_build():
+    tables = build_attack_tables()
+
+    assert tables["between"] == BETWEEN
+    assert tables["knight"] == KNIGHT_ATTACKS
+
+
+def test_squares():
+    assert list(squares(mask("h8", "a1", "e4"))) == [sq("a1"), sq("e4"), sq("h8")]
+    assert list(squares(0)) == []
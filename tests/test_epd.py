@@ -0,0 +1,73 @@
+import json
+
+from benchmarks.epd import (
+    DEFAULT_SUITE,
+    EPDEntry,
+    parse_epd_line,
+    read_epd,
+    run_suite,
+    solve_position,
+)
+
+
+def test_parse_epd_line():
+    entry = parse_epd_line(
+        'r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq -'
+        ' bm Qxf7# Qxf7; am Nf6; id "scholar; 1"; hmvc 4; fmvn 4;'
+    )
+
+    assert entry is not None
+    assert entry.fen.endswith(" w KQkq - 4 4")
+    assert entry.best_moves == ["Qxf7#", "Qxf7"]
+    assert entry.avoid_moves == ["Nf6"]
+    assert entry.id == "scholar; 1"
+
+
+def test_parse_epd_line_skips_comments():
+    assert parse_epd_line("# comment") is None
+    assert parse_epd_line("   ") is None
+
+
+def test_read_default_suite():
+    entries = read_epd(DEFAULT_SUITE)
+    assert len(entries) >= 5
+    assert all(entry.best_moves or entry.avoid_moves for entry in entries)
+
+
+def test_solve_position_best_move():
+    entry = EPDEntry("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1", {"bm": ["Qb8#"]})
+    result = solve_position(entry, max_depth=3, movetime=None)
+
+    assert result.solved
+    assert result.move == "Qb8#"
+    assert result.nodes_to_solution is not None
+    assert result.nodes_to_solution <= result.nodes
+
+
+def test_solve_position_avoid_move():
+    entry = EPDEntry("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1", {"am": ["Qb8#"]})
+    result = solve_position(entry, max_depth=3, movetime=None)
+
+    assert not result.solved
+    assert result.time_to_solution is None
+
+
+def test_node_limited_solve_is_deterministic():
+    entry = EPDEntry(
+        "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2", {"am": ["h3"]}
+    )
+    runs = [solve_position(entry, movetime=None, nodes=2000) for _ in range(2)]
+
+    assert runs[0].move == runs[1].move
+    assert runs[0].nodes == runs[1].nodes
+
+
+def test_run_suite_summary():
+    entries = read_epd(DEFAULT_SUITE)[:2]
+    summary = run_suite(entries, max_depth=2, movetime=None, workers=1)
+
+    assert summary["total"] == 2
+    assert summary["solved"] == 2
+    assert summary["nodes"] == sum(p["nodes"] for p in summary["positions"])
+    assert summary["nps"] > 0
+    json.dumps(summary)
@@ -0,0 +1,138 @@
+from eval_cache import EvalCache
+from game_state import GameState
+import pytest
+import threading
+
+
+def test_get_put():
+    cache = EvalCache(size=16, ways=4)
+
+    assert cache.get(42) is None
+    cache.put(42, 1.5)
+
+    assert cache.get(42) == 1.5
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+    assert len(cache) == 1
+
+
+def test_key_verification():
+    cache = EvalCache(size=16, ways=4)
+    # 4 buckets: 3 and 7 share a bucket but are different positions
+    cache.put(3, 1.0)
+
+    assert cache.get(7) is None
+    assert cache.get(3) == 1.0
+
+
+def test_lru_eviction():
+    cache = EvalCache(size=8, ways=2)
+    # 4 buckets: 1, 5 and 9 go to the same one
+    cache.put(1, 1.0)
+    cache.put(5, 5.0)
+    cache.get(1)
+    cache.put(9, 9.0)
+
+    assert cache.evictions == 1
+    assert cache.get(5) is None
+    assert cache.get(1) == 1.0
+    assert cache.get(9) == 9.0
+
+
+def test_put_updates_value():
+    cache = EvalCache(size=8, ways=2)
+    cache.put(1, 1.0)
+    cache.put(1, 2.0)
+
+    assert cache.get(1) == 2.0
+    assert len(cache) == 1
+    assert cache.evictions == 0
+
+
+def test_clear_and_resize():
+    cache = EvalCache(size=16, ways=4)
+    for key in range(10):
+        cache.put(key, key)
+    cache.get(3)
+
+    cache.resize(64)
+
+    assert cache.size == 64
+    assert len(cache) == 10
+    assert all(cache.get(key) == key for key in range(10))
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 0, 0)
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        EvalCache(size=10, ways=4)
+    with pytest.raises(ValueError):
+        EvalCache(size=12, ways=4)
+
+
+def test_evaluate_fills_cache():
+    cache = EvalCache(size=16, ways=4)
+    g = GameState.from_fen("2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2")
+    g.eval_cache = cache
+
+    eval = g.evaluate()
+
+    assert cache.get(g.zobrist_key) == eval
+    assert g.copy().evaluate() == eval
+    assert cache.hits == 2
+
+
+def test_mate_is_not_cached():
+    cache = EvalCache(size=16, ways=4)
+    g = GameState.from_fen("1Q5k/8/6K1/8/8/8/8/8 b - - 0 1")
+    g.eval_cache = cache
+
+    assert g.checkmate
+    assert g.evaluate() == 10_000
+    assert len(cache) == 0
+
+
+def test_thread_caches():
+    caches = []
+
+    def new_game_state():
+        g = GameState.starting_position()
+        caches.append((g.eval_cache, g.pawn_table))
+
+    new_game_state()
+    new_game_state()
+    thread = threading.Thread(target=new_game_state)
+    thread.start()
+    thread.join()
+
+    # One cache per thread, kept by copies
+    assert caches[0] == caches[1]
+    assert caches[2][0] is not caches[0][0]
+    assert caches[2][1] is not caches[0][1]
+    assert GameState.starting_position().copy().eval_cache is caches[0][0]
+
+
+def test_concurrent_lookups_match_keys():
+    # Values are derived from keys, so a value read with the wrong key shows
+    cache = EvalCache(size=8, ways=4)
+    errors = []
+
+    def hammer(offset: int):
+        for i in range(20_000):
+            key = (i * 7 + offset) % 32
+            cache.put(key, key * 0.5)
+            value = cache.get(key ^ 4)
+            if value is not None and value != (key ^ 4) * 0.5:
+                errors.append((key ^ 4, value))
+
+    threads = [threading.Thread(target=hammer, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
@@ -0,0 +1,101 @@
+import chess_board as cb
+from config import Piece, BLACK_PAWN, WHITE_KING
+from evaluate_position import (
+    BACKWARD_PAWN,
+    DOUBLED_PAWN,
+    ISOLATED_PAWN,
+    PASSED_PAWN,
+    evaluate_pawn_structure,
+)
+from eval_cache import PawnHashTable
+from game_state import GameState
+import pytest
+
+
+def sq(square: str) -> int:
+    """Quick helper for tests: sq('a1') return index 0"""
+    return cb.square_to_index(square)
+
+
+def pawn_score(fen: str) -> float:
+    return evaluate_pawn_structure(GameState.from_fen(fen).board)[0]
+
+
+def test_start_position_is_balanced():
+    g = GameState.from_fen(
+        "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    )
+
+    assert evaluate_pawn_structure(g.board) == (0, 0, 0)
+
+
+def test_passed_pawn():
+    score, w_passed, b_passed = evaluate_pawn_structure(
+        GameState.from_fen("4k3/8/8/8/8/1P6/P7/4K3 w - - 0 1").board
+    )
+
+    # b3 is passed and supports a2, which is passed too
+    assert w_passed == 1 << sq("a2") | 1 << sq("b3")
+    assert b_passed == 0
+    assert score == round(PASSED_PAWN[1] + PASSED_PAWN[2], 2)
+
+
+def test_passed_pawn_blocked_by_adjacent_file():
+    assert evaluate_pawn_structure(
+        GameState.from_fen("4k3/2p5/8/8/8/8/1P6/4K3 w - - 0 1").board
+    )[1:] == (0, 0)
+
+
+def test_doubled_and_isolated_pawns():
+    # Black has an isolated pair doubled on the a file, white a healthy pair
+    score = pawn_score("4k3/p7/p7/8/8/8/PP6/4K3 w - - 0 1")
+
+    assert score == round(-2 * ISOLATED_PAWN - DOUBLED_PAWN, 2)
+
+
+def test_backward_pawn():
+    # d3 cannot advance past c5 and e4 is too far ahead to support it, e4 is
+    # passed and c5 isolated
+    assert pawn_score("4k3/8/8/2p5/4P3/3P4/8/4K3 w - - 0 1") == round(
+        BACKWARD_PAWN + PASSED_PAWN[3] - ISOLATED_PAWN, 2
+    )
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        "4k3/p7/p7/8/8/8/PP6/4K3 w - - 0 1",
+        "4k3/8/8/2p5/4P3/3P4/8/4K3 w - - 0 1",
+    ],
+)
+def test_color_symmetry(fen: str):
+    g = GameState.from_fen(fen)
+    mirrored = [-g.board[(7 - i // 8) * 8 + i % 8] for i in range(64)]
+
+    assert (
+        evaluate_pawn_structure(mirrored)[0]
+        == -evaluate_pawn_structure(g.board)[0]
+    )
+
+
+def test_pawn_table_hits():
+    table = PawnHashTable(size=16)
+    g = GameState.from_fen("4k3/p7/8/8/8/8/P7/4K3 w - - 0 1")
+    g.pawn_table = table
+
+    first = g.pawn_structure()
+    g = g.copy()
+    g.make_move(Piece(WHITE_KING, sq("e1")), sq("f1"))
+
+    assert g.pawn_structure() == first
+    assert (table.hits, table.misses) == (1, 1)
+
+    g.make_move(Piece(BLACK_PAWN, sq("a7")), sq("a5"))
+    g.pawn_structure()
+
+    assert (table.hits, table.misses) == (1, 2)
+
+
+def test_pawn_table_size():
+    with pytest.raises(ValueError):
+        PawnHashTable(size=12)
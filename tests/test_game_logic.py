@@ -3,6 +3,7 @@ from chess_board import ChessBoard, parse_index
 import move_generation as mv
 import game_logic as gl
 import config
+from game_state import GameState
 from config import (
     Piece,
     PieceMoves,
@@ -133,3 +134,71 @@ def test_analyze_king_safety():
     assert len(checking_pieces) == 1
 
     assert checking_pieces[0] == Piece(BLACK_BISHOP, sq("h8"))
+
+
+def test_analyze_king_safety_pins():
+    g = GameState.from_fen("4k3/8/8/b7/8/8/3B4/4K1Nr w - - 0 1")
+
+    checking_pieces, pinned_pieces = gl.analyze_king_safety(
+        g.board, g.board_state.w_king_idx, WHITE, g.board_state
+    )
+
+    assert checking_pieces == []
+    assert sorted(pinned_pieces, key=lambda pinned: pinned.piece.index) == [
+        PinnedPiece(Piece(WHITE_KNIGHT, sq("g1")), (1, 0), sq("h1")),
+        PinnedPiece(Piece(WHITE_BISHOP, sq("d2")), (-1, 1), sq("a5")),
+    ]
+
+
+def test_analyze_king_safety_double_check():
+    # The rook checks along the first rank, the knight on f3
+    g = GameState.from_fen("4k3/8/8/b7/8/5n2/3B4/4K2r w - - 0 1")
+
+    checking_pieces, pinned_pieces = gl.analyze_king_safety(
+        g.board, g.board_state.w_king_idx, WHITE
+    )
+
+    assert len(checking_pieces) == 2
+    assert Piece(BLACK_KNIGHT, sq("f3")) in checking_pieces
+    assert Piece(BLACK_ROOK, sq("h1")) in checking_pieces
+    assert pinned_pieces == []
+
+
+def see_of(fen: str, from_square: str, to_square: str, promotion: int | None = None) -> int:
+    g = GameState.from_fen(fen)
+    piece = Piece(g.board[sq(from_square)], sq(from_square))
+    return gl.see(g.board, config.Move(piece, sq(to_square), promotion))
+
+
+def test_see_single_capture():
+    assert see_of("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1", "e5") == 1
+
+
+def test_see_xray_sequence():
+    # Nxe5 Nxe5 Rxe5 Bxe5 with the queens behind the rook and the bishop
+    fen = "1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1"
+    assert see_of(fen, "d3", "e5") == -2
+
+    # Rxd5 Rxd5 Qxd5: the queen x-rays through the rook
+    fen = "4k3/3r4/8/3p4/8/8/3R4/3QK3 w - - 0 1"
+    assert see_of(fen, "d2", "d5") == 1
+
+
+def test_see_even_trade():
+    assert see_of("4k3/8/2p5/3p4/4P3/8/8/4K3 w - - 0 1", "e4", "d5") == 0
+
+
+def test_see_does_not_mutate_board():
+    fen = "1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1"
+    g = GameState.from_fen(fen)
+    board = g.board.copy()
+    gl.see(g.board, config.Move(Piece(WHITE_KNIGHT, sq("d3")), sq("e5")))
+
+    assert g.board == board
+
+
+def test_see_en_passant_and_promotion():
+    assert see_of("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5", "d6") == 1
+    assert see_of("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7", "b8", WHITE_QUEEN) == 8
+    # Promoting next to the king loses the queen
+    assert see_of("2k5/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7", "b8", WHITE_QUEEN) == -1
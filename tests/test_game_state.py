@@ -0,0 +1,189 @@
+import random
+
+import chess_board as cb
+import game_state as gs
+from game_state import GameState
+from zobrist import compute_hash, compute_pawn_hash
+from config import (
+    CastlingState,
+    Piece,
+    EMPTY_SQUARE,
+    WHITE,
+    BLACK,
+    WHITE_PAWN,
+    WHITE_BISHOP,
+    WHITE_QUEEN,
+    BLACK_KING,
+)
+import pytest
+
+
+def sq(square: str) -> int:
+    """Quick helper for tests: sq('a1') return index 0"""
+    return cb.square_to_index(square)
+
+
+fen_fried_live = "r1bqkb1r/pppp1ppp/2n2n2/4p1N1/2B1P3/8/PPPP1PPP/RNBQK2R b KQkq - 0 1"
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+fen_en_passant = "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w Kq f6 0 3"
+
+
+@pytest.mark.parametrize("fen", [gs.FEN_START, fen_fried_live, fen_tactic_4, fen_en_passant])
+def test_fen_round_trip(fen: str):
+    assert GameState.from_fen(fen).to_fen() == fen
+
+
+def test_castling_bits():
+    for bits in range(16):
+        assert CastlingState.from_bits(bits).to_bits() == bits
+    assert CastlingState().to_bits() == 0b1111
+    assert CastlingState.from_fen("Kq").to_bits() == 0b1001
+
+
+def test_castling_state_disable():
+    castling = CastlingState()
+
+    castling.disable_kingside(WHITE)
+    castling.disable_all(BLACK)
+
+    assert castling.to_fen() == "Q"
+    assert not castling.can_castle_kingside(WHITE)
+    assert castling.can_castle_queenside(WHITE)
+    assert not castling.can_castle_queenside(BLACK)
+    assert castling == CastlingState.from_fen("Q")
+
+
+@pytest.mark.parametrize("fen", [gs.FEN_START, fen_fried_live, fen_tactic_4, fen_en_passant])
+def test_bytes_round_trip(fen: str):
+    g = GameState.from_fen(fen)
+
+    data = g.to_bytes()
+    g2 = GameState.from_bytes(data)
+
+    assert len(data) == gs.POSITION_SIZE
+    assert g2.board == g.board
+    assert g2.to_fen() == fen
+
+
+def test_unpack_position_fields():
+    g = GameState.from_fen(fen_en_passant)
+    g.full_moves = 300
+
+    board, color, castling, en_passant, half, full = gs.unpack_position(g.to_bytes())
+
+    assert board[sq("e8")] == BLACK_KING
+    assert color == WHITE
+    assert castling == CastlingState.from_fen("Kq").to_bits()
+    assert en_passant == sq("f6")
+    assert half == 0
+    assert full == 300
+
+
+def test_unpack_position_errors():
+    data = GameState.starting_position().to_bytes()
+
+    with pytest.raises(ValueError):
+        gs.unpack_position(data[:-1])
+
+    # Nibble 7 is not a piece
+    with pytest.raises(ValueError):
+        gs.unpack_position(b"\x07" + data[1:])
+
+
+def test_iter_unpack_positions():
+    games = [GameState.from_fen(fen) for fen in [gs.FEN_START, fen_fried_live, fen_tactic_4]]
+    buffer = memoryview(gs.pack_positions(games))
+
+    decoded = list(gs.iter_unpack_positions(buffer))
+
+    assert len(decoded) == 3
+    for g, (board, color, castling, en_passant, half, full) in zip(games, decoded):
+        assert board == g.board
+        assert color == g.active_color
+        assert castling == g.castling_state.to_bits()
+        assert en_passant == g.en_passant_target
+        assert (half, full) == (g.half_moves, g.full_moves)
+    assert decoded[1][1] == BLACK
+
+    with pytest.raises(ValueError):
+        list(gs.iter_unpack_positions(buffer[:-1]))
+
+
+def test_promoted_piece_packing():
+    g = GameState.from_fen("4k3/1Q6/8/8/8/8/8/4K3 b - - 0 1")
+
+    assert GameState.from_bytes(g.to_bytes()).board[sq("b7")] == WHITE_QUEEN
+
+
+def play_random_game(seed: int, plies: int):
+    """Yield the game state after each random legal move"""
+    rng = random.Random(seed)
+    g = GameState.starting_position()
+    for _ in range(plies):
+        if g.checkmate or g.draw:
+            return
+        assert g.legal_moves is not None
+        i = rng.randrange(len(g.legal_moves.pieces))
+        piece = g.legal_moves.pieces[i]
+        move = rng.choice(g.legal_moves.move_list[i])
+        promotion = None
+        if abs(piece.piece) == 1 and (move < 8 or move >= 56):
+            promotion = WHITE_QUEEN if g.active_color == WHITE else -WHITE_QUEEN
+        g.make_move(piece, move, promotion)
+        yield g
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_zobrist_key(seed: int):
+    for g in play_random_game(seed, 120):
+        assert g.zobrist_key == compute_hash(
+            g.board, g.active_color, g.castling_state, g.en_passant_target
+        )
+        assert g.copy().zobrist_key == g.zobrist_key
+
+
+def test_zobrist_key_transposition():
+    g1 = GameState.starting_position()
+    g2 = GameState.starting_position()
+
+    for g, moves in ((g1, ["g1f3", "g8f6", "b1c3"]), (g2, ["b1c3", "g8f6", "g1f3"])):
+        for m in moves:
+            g.make_move(Piece(g.board[sq(m[:2])], sq(m[:2])), sq(m[2:]))
+
+    assert g1.zobrist_key == g2.zobrist_key
+    assert g1.zobrist_key != GameState.from_fen(g1.to_fen().replace(" b ", " w ")).zobrist_key
+
+
+def test_en_passant_capture():
+    g = GameState.from_fen(fen_en_passant)
+
+    g.make_move(Piece(WHITE_PAWN, sq("e5")), sq("f6"))
+
+    assert g.board[sq("f5")] == EMPTY_SQUARE
+    assert g.board[sq("f6")] == WHITE_PAWN
+    assert g.en_passant_target is None
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_pawn_key(seed: int):
+    for g in play_random_game(seed, 120):
+        assert g.pawn_key == compute_pawn_hash(g.board)
+
+
+def test_pawn_key_ignores_pieces():
+    a = GameState.from_fen("4k3/p7/8/8/8/8/P7/4K3 w - - 0 1")
+    b = GameState.from_fen("r3k3/p7/8/8/8/8/P7/1N2K3 b - - 0 1")
+
+    assert a.pawn_key == b.pawn_key
+    assert a.zobrist_key != b.zobrist_key
+
+
+def test_rook_capture_removes_castling_right():
+    g = GameState.from_fen("r3k2r/8/8/8/8/8/6B1/R3K2R w KQkq - 0 1")
+
+    g.make_move(Piece(WHITE_BISHOP, sq("g2")), sq("a8"))
+
+    assert g.castling_state.to_fen() == "KQk"
+    assert g.zobrist_key == compute_hash(
+        g.board, g.active_color, g.castling_state, g.en_passant_target
+    )
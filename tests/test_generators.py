@@ -0,0 +1,84 @@
+from benchmarks.generators import (
+    GENERATORS,
+    NODE_KINDS,
+    PERCENTILES,
+    Position,
+    bench_generator,
+    compare_generators,
+    generator_samples,
+    legal_move_samples,
+    trace_positions,
+)
+from game_state import GameState
+from legal_moves import generate_legal_moves
+import move_generation as mv
+import pytest
+
+fen_kiwipete = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return trace_positions([fen_kiwipete], depth=1, max_positions=20)
+
+
+def test_trace_positions(positions):
+    assert len(positions) == 20
+    assert all(len(p.board) == 64 for p in positions)
+
+
+def test_generator_samples(positions):
+    for name, piece_type in GENERATORS.items():
+        samples = generator_samples(name, positions)
+        assert samples
+        assert all(abs(board[square]) == piece_type for board, square, *_ in samples)
+
+
+def test_bench_generator(positions):
+    samples = generator_samples("generate_rook_moves", positions)
+
+    result = bench_generator("generate_rook_moves", samples)
+
+    assert result.calls == len(samples)
+    assert result.ns_per_call > 0
+    assert list(result.percentiles) == list(PERCENTILES)
+    assert result.percentiles[50] <= result.percentiles[99]
+
+
+def test_compare_generators(positions):
+    samples = generator_samples("generate_knight_moves", positions)
+
+    current, candidate = compare_generators(
+        "generate_knight_moves",
+        lambda *args: mv.generate_knight_moves(*args)[::-1],
+        samples,
+        rounds=1,
+    )
+
+    assert current.calls == candidate.calls == len(samples)
+
+    with pytest.raises(ValueError):
+        compare_generators(
+            "generate_knight_moves", mv.generate_king_moves, samples, rounds=1
+        )
+
+
+def test_legal_move_samples():
+    fens = [
+        fen_kiwipete,
+        # Rook e8 checking the king
+        "4r2k/8/8/8/8/8/8/4K3 w - - 0 1",
+        # Bishop d2 pinned by bishop a5
+        "7k/8/8/b7/8/8/3B4/4K3 w - - 0 1",
+    ]
+    positions = [
+        Position(g.board[:], g.en_passant_target, g.active_color)
+        for g in map(GameState.from_fen, fens)
+    ]
+
+    samples = legal_move_samples(positions)
+
+    assert list(samples) == list(NODE_KINDS)
+    assert all(len(samples[kind]) == 1 for kind in NODE_KINDS)
+    result = bench_generator("check", samples["check"], generate_legal_moves)
+    assert result.calls == 1
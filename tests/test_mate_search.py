@@ -0,0 +1,50 @@
+from game_state import GameState
+from mate_search import format_line, solve_mate
+
+fen_mate_in_one = "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1"
+# Philidor's legacy, a smothered mate by checks only
+fen_smothered = "5rk1/6pp/8/6N1/8/8/4Q3/K7 w - - 0 1"
+# The only mate starts with a quiet king move
+fen_quiet_mate = "k7/8/2K5/8/8/8/8/7R w - - 0 1"
+
+
+def test_mate_in_one():
+    g = GameState.from_fen(fen_mate_in_one)
+    result = solve_mate(g, 3)
+
+    assert result.mate_in == 1
+    assert format_line(g, result.line) == "Qb8#"
+    assert result.nodes > 0
+
+
+def test_mate_with_sacrifice_for_black():
+    g = GameState.from_fen("6k1/pp4p1/2p5/2bp4/8/P5Pb/1P3rrP/2BRRN1K b - - 0 1")
+    result = solve_mate(g, 3)
+
+    assert result.mate_in == 2
+    assert format_line(g, result.line) == "Rg1+ Kxg1 Rxf1#"
+
+
+def test_smothered_mate_line():
+    g = GameState.from_fen(fen_smothered)
+    result = solve_mate(g, 5)
+
+    assert result.mate_in == 5
+    assert len(result.line) == 9
+    assert format_line(g, result.line).endswith("Qg8+ Rxg8 Nf7#")
+
+
+def test_mate_not_found_within_bound():
+    g = GameState.from_fen(fen_smothered)
+    assert solve_mate(g, 4).mate_in is None
+
+
+def test_checks_only_prunes_quiet_mates():
+    g = GameState.from_fen(fen_quiet_mate)
+    checks = solve_mate(g, 2)
+    all_moves = solve_mate(g, 2, checks_only=False)
+
+    assert checks.mate_in is None
+    assert all_moves.mate_in == 2
+    assert checks.nodes < all_moves.nodes
+
@@ -1,6 +1,8 @@
 import chess_board as cb
+from attack_tables import occupancy
 from chess_board import BoardState, ChessBoard
 from game_logic import analyze_king_safety
+from game_state import GameState
 import move_generation as mv
 import pytest
 
@@ -372,22 +374,6 @@ def test_castling_moves_special_case():
     assert_move_set_equality(moves, ["c1"])
 
 
-def test_generate_blocking_moves_diagonal():
-    b = ChessBoard.setup_position({"a1": WHITE_KING, "h8": BLACK_BISHOP})
-
-    moves = mv.generate_blocking_moves(b.board, sq("a1"), Piece(BLACK_BISHOP, sq("h8")))
-    assert moves != []
-    assert_move_set_equality(moves, ["b2", "c3", "d4", "e5", "f6", "g7"])
-
-
-def test_generate_blocking_moves_aligned():
-    b = ChessBoard.setup_position({"e4": WHITE_KING, "e8": BLACK_ROOK})
-
-    moves = mv.generate_blocking_moves(b.board, sq("e4"), Piece(BLACK_ROOK, sq("e8")))
-    assert moves != []
-    assert_move_set_equality(moves, ["e5", "e6", "e7"])
-
-
 def unwrap(b: ChessBoard, color: int):
     castling_state = CastlingState()
     castling_state.disable_all(color)
@@ -455,7 +441,54 @@ def test_generate_moves_filter_pinned():
             assert_move_set_equality(moves, ["e5"])
 
 
-def test_generate_single_check_moves():
+def legal_moves_of(fen: str, square: str) -> list[int]:
+    g = GameState.from_fen(fen)
+    pieces = [piece.index for piece in g.legal_moves.pieces]
+    if sq(square) not in pieces:
+        return []
+    return g.legal_moves.move_list[pieces.index(sq(square))]
+
+
+def test_pinned_pieces_stay_on_the_pin():
+    # The queen may not leave rank 1 for the b-file of the pinning queen
+    assert_move_set_equality(
+        legal_moves_of("4k3/8/8/8/8/8/8/1q1QK3 w - - 0 1", "d1"), ["b1", "c1"]
+    )
+    # Nor may the pawn push onto the other diagonal of the bishop
+    assert_move_set_equality(
+        legal_moves_of("4k3/8/8/8/8/7b/6P1/5K2 w - - 0 1", "g2"), ["h3"]
+    )
+    # A bishop pinned on a file and a knight have no move
+    assert legal_moves_of("4r1k1/8/8/8/8/8/4B3/4K3 w - - 0 1", "e2") == []
+    assert legal_moves_of("4r1k1/8/8/8/8/8/4N3/4K3 w - - 0 1", "e2") == []
+
+
+def test_en_passant_exposing_king_is_illegal():
+    # Both pawns leave the fifth rank, uncovering the rook on the king
+    assert_move_set_equality(
+        legal_moves_of("8/8/8/KPp4r/8/8/8/7k w - c6 0 1", "b5"), ["b6"]
+    )
+    assert_move_set_equality(
+        legal_moves_of("8/8/8/KPp4b/8/8/8/7k w - c6 0 1", "b5"), ["b6", "c6"]
+    )
+
+
+def evasion_params(b: ChessBoard) -> dict:
+    params = unwrap(b, WHITE)
+    params.pop("castling_state")
+    params.pop("ennemy_controlled")
+    checking_pieces, pinned_pieces = analyze_king_safety(b.board, b.w_king_idx, WHITE)
+    return {
+        **params,
+        "checking_piece": checking_pieces[0],
+        "pinned_pieces": pinned_pieces,
+        "e_piece_list": b.b_pieces,
+        "e_idx_list": b.b_idx,
+        "occupied": occupancy(b.w_idx) | occupancy(b.b_idx),
+    }
+
+
+def test_generate_evasion_moves():
     b = ChessBoard.setup_position(
         {
             "e1": WHITE_KING,
@@ -467,17 +500,10 @@ def test_generate_single_check_moves():
         }
     )
 
-    checking_pieces, pinned_pieces = analyze_king_safety(b.board, b.w_king_idx, WHITE)
-    params = unwrap(b, WHITE)
-    _ = params.pop("castling_state")
-
-    piece_moves = mv.generate_single_check_moves(
-        **params,  # pyright: ignore[reportArgumentType]
-        checking_piece=checking_pieces[0],
-        pinned_pieces=pinned_pieces,
-    )
+    params = evasion_params(b)
+    piece_moves = mv.generate_evasion_moves(**params)
 
-    assert checking_pieces[0] == Piece(BLACK_BISHOP, sq("h4"))
+    assert params["checking_piece"] == Piece(BLACK_BISHOP, sq("h4"))
 
     assert len(piece_moves.pieces) == len(piece_moves.move_list)
     assert len(piece_moves.pieces) == 2
@@ -487,3 +513,96 @@ def test_generate_single_check_moves():
             assert_move_set_equality(moves, ["f1", "d1", "d2"])
         if piece.piece == WHITE_QUEEN:
             assert_move_set_equality(moves, ["f2"])
+
+
+def test_generate_evasion_moves_captures_and_blocks():
+    b = ChessBoard.setup_position(
+        {
+            "a1": WHITE_KING,
+            "h8": BLACK_BISHOP,
+            "c8": WHITE_ROOK,
+            "e4": WHITE_KNIGHT,
+            "d2": WHITE_PAWN,
+            "e2": WHITE_PAWN,
+            "h1": WHITE_QUEEN,
+            "a8": BLACK_KING,
+        }
+    )
+
+    piece_moves = mv.generate_evasion_moves(**evasion_params(b))
+    moves = {
+        cb.index_to_square(piece.index): squares
+        for piece, squares in zip(piece_moves.pieces, piece_moves.move_list)
+    }
+
+    # Interpositions on b2..g7 and captures of h8, nothing else
+    assert_move_set_equality(moves["c8"], ["c3", "h8"])
+    assert_move_set_equality(moves["e4"], ["c3", "f6"])
+    assert_move_set_equality(moves["d2"], ["d4"])
+    assert_move_set_equality(moves["h1"], ["h8"])
+    assert "e2" not in moves
+    assert_move_set_equality(moves["a1"], ["a2", "b1"])
+
+
+def test_generate_evasion_moves_skips_pinned_pieces():
+    b = ChessBoard.setup_position(
+        {
+            "e1": WHITE_KING,
+            "e2": WHITE_ROOK,
+            "e8": BLACK_ROOK,
+            "a5": BLACK_BISHOP,
+            "h8": BLACK_KING,
+        }
+    )
+
+    piece_moves = mv.generate_evasion_moves(**evasion_params(b))
+
+    # The rook could block on d2 or b4... but it is pinned on the e-file
+    assert piece_moves.pieces == [Piece(WHITE_KING, sq("e1"))]
+    assert_move_set_equality(piece_moves.move_list[0], ["d1", "f1", "f2"])
+
+
+def test_generate_evasion_moves_en_passant():
+    # The e-pawn just moved two squares and gives check
+    g = GameState.from_fen("8/8/8/3Pp3/5K2/8/8/7k w - e6 0 1")
+    assert g.checking_pieces == [Piece(BLACK_PAWN, sq("e5"))]
+    pawn = g.legal_moves.pieces.index(Piece(WHITE_PAWN, sq("d5")))
+    assert_move_set_equality(g.legal_moves.move_list[pawn], ["e6"])
+
+    # Taking it would uncover the bishop behind
+    g = GameState.from_fen("1b6/8/8/3Pp3/5K2/8/8/7k w - e6 0 1")
+    assert Piece(WHITE_PAWN, sq("d5")) not in g.legal_moves.pieces
+
+
+def test_generate_king_escapes():
+    b = ChessBoard.setup_position(
+        {"e1": WHITE_KING, "e8": BLACK_ROOK, "c3": BLACK_KNIGHT, "h8": BLACK_KING}
+    )
+
+    escapes = mv.generate_king_escapes(
+        b.board,
+        WHITE,
+        b.w_king_idx,
+        b.b_pieces,
+        b.b_idx,
+        occupancy(b.w_idx) | occupancy(b.b_idx),
+    )
+
+    # e2 stays on the rook file, d1 and e2 are covered by the knight
+    assert_move_set_equality(escapes, ["d2", "f1", "f2"])
+
+
+def test_is_en_passant_exposing_king():
+    # Both pawns leave the fifth rank, uncovering the rook
+    b = ChessBoard.setup_position(
+        {"a5": WHITE_KING, "b5": WHITE_PAWN, "c5": BLACK_PAWN, "h5": BLACK_ROOK}
+    )
+    occupied = occupancy(b.w_idx) | occupancy(b.b_idx)
+
+    assert mv.is_en_passant_exposing_king(
+        b.board, WHITE, sq("a5"), sq("b5"), sq("c6"), occupied
+    )
+    b.board[sq("h5")] = BLACK_BISHOP
+    assert not mv.is_en_passant_exposing_king(
+        b.board, WHITE, sq("a5"), sq("b5"), sq("c6"), occupied
+    )
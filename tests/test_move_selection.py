@@ -0,0 +1,355 @@
+import json
+import chess_board as cb
+import move_selection as ms
+from game_state import GameState
+from search_stats import SearchStats
+from config import (
+    Move,
+    Piece,
+    WHITE,
+    BLACK_PAWN,
+    BLACK_QUEEN,
+    WHITE_QUEEN,
+)
+import pytest
+
+
+def sq(square: str) -> int:
+    """Quick helper for tests: sq('a1') return index 0"""
+    return cb.square_to_index(square)
+
+
+def alpha_beta(
+    game_state: GameState,
+    depth: int,
+    maximazing: bool,
+    alpha: float = -5000,
+    beta: float = 5000,
+) -> float:
+    """Plain alpha-beta used as a reference for the search"""
+    if depth == 0:
+        return ms.quiescence(game_state, maximazing, alpha, beta)
+    if game_state.draw or game_state.checkmate:
+        return game_state.evaluate()
+    best_eval = float("-inf") if maximazing else float("+inf")
+    for move in ms.generate_move_list(game_state):
+        g = game_state.copy()
+        g.make_move(move.piece, move.to_idx, move.promotion)
+        eval = alpha_beta(g, depth - 1, not maximazing, alpha, beta)
+        if maximazing:
+            best_eval = max(best_eval, eval)
+            alpha = max(alpha, eval)
+        else:
+            best_eval = min(best_eval, eval)
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+    return best_eval
+
+
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+def test_reduction_table():
+    table = ms.REDUCTION_TABLE
+
+    assert len(table) == ms.LMR_MAX_DEPTH
+    assert all(len(row) == ms.LMR_MAX_MOVES for row in table)
+    assert table[1][1] == 0
+
+    for depth in range(1, ms.LMR_MAX_DEPTH):
+        for move_number in range(1, ms.LMR_MAX_MOVES - 1):
+            assert table[depth][move_number] <= table[depth][move_number + 1]
+
+
+def test_late_move_reduction():
+    assert ms.late_move_reduction(2, 30) == 0
+    assert ms.late_move_reduction(8, 0) == 0
+    assert ms.late_move_reduction(8, 2) == 0
+    assert ms.late_move_reduction(8, 30) > 0
+    assert ms.late_move_reduction(3, 63) <= 2
+
+
+def test_black_promotion_is_signed():
+    g = GameState.from_fen("7k/8/8/8/8/8/1p6/7K b - - 0 1")
+    promotions = {
+        m.promotion for m in ms.generate_move_list(g) if m.piece.piece == BLACK_PAWN
+    }
+    assert promotions == {-5, -4, -3, -2}
+
+
+def test_order_moves_captures_first():
+    g = GameState.from_fen("7k/8/8/3q4/8/8/8/3QK3 w - - 0 1")
+
+    moves = ms.order_moves(g)
+
+    assert moves[0] == Move(Piece(WHITE_QUEEN, sq("d1")), sq("d5"))
+    assert not ms.is_quiet_move(g, moves[0])
+    assert all(ms.is_quiet_move(g, m) for m in moves[1:])
+
+
+def test_en_passant_is_capture():
+    g = GameState.from_fen("7k/8/8/3pP3/8/8/8/K7 w - d6 0 1")
+
+    move = Move(Piece(1, sq("e5")), sq("d6"))
+
+    assert ms.is_capture(g, move)
+    assert ms.is_quiet_move(g, Move(Piece(1, sq("e5")), sq("e6")))
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        fen_tactic_4,
+        "r1bqkb1r/pppp1ppp/2n2n2/4p1N1/2B1P3/8/PPPP1PPP/RNBQK2R b KQkq - 0 1",
+    ],
+)
+def test_pvs_matches_alpha_beta(fen: str, monkeypatch: pytest.MonkeyPatch):
+    """
+    Without reductions (depth < LMR_MIN_DEPTH) or pruning PVS returns the
+    exact score
+    """
+    monkeypatch.setattr(ms, "FUTILITY_DEPTH", 0)
+    monkeypatch.setattr(ms, "RAZORING_DEPTH", 0)
+    g = GameState.from_fen(fen)
+    maximazing = g.active_color == WHITE
+
+    assert ms.min_max(g, 2, maximazing) == alpha_beta(g, 2, maximazing)
+
+
+def test_minmax_selection_mate_in_one():
+    g = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1")
+
+    move = ms.minmax_selection(g, 1)
+
+    assert move == Move(Piece(WHITE_QUEEN, sq("b1")), sq("b8"))
+
+
+def test_minmax_selection_wins_queen():
+    g = GameState.from_fen("4k3/8/8/8/3q4/8/8/3R3K w - - 0 1")
+
+    eval, move = ms.search_root(g, 2)
+
+    assert move == Move(Piece(4, sq("d1")), sq("d4"))
+    assert eval > 0
+    assert g.board[sq("d4")] == BLACK_QUEEN
+
+
+def test_aspiration_search_matches_full_window():
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+
+    full_eval, _ = ms.search_root(g, 2)
+    eval, _ = ms.aspiration_search(g, 2, full_eval + 3, window=0.25, stats=stats)
+
+    assert eval == full_eval
+    assert stats.fail_lows > 0
+    assert stats.re_searches == stats.fail_lows + stats.fail_highs
+    assert stats.aspiration_searches == stats.re_searches + 1
+
+
+def test_aspiration_search_accepts_mate_scores():
+    g = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1")
+    stats = SearchStats()
+
+    eval, move = ms.aspiration_search(g, 1, 0, stats=stats)
+
+    assert eval == 10_000
+    assert move == Move(Piece(WHITE_QUEEN, sq("b1")), sq("b8"))
+    assert stats.fail_highs > 0
+
+
+def test_aspiration_search_researches_black_refutation_first(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    # Black to move wins the queen, failing low on a window around 0
+    g = GameState.from_fen("k7/8/8/3q4/8/8/8/3Q3K b - - 0 1")
+    capture = Move(Piece(BLACK_QUEEN, sq("d5")), sq("d1"))
+    pv_moves = []
+    search_root = ms.search_root
+
+    def recording_search_root(*args):
+        pv_moves.append(args[4])
+        return search_root(*args)
+
+    monkeypatch.setattr(ms, "search_root", recording_search_root)
+    stats = SearchStats()
+    eval, move = ms.aspiration_search(g, 1, 0, window=0.25, stats=stats)
+
+    assert move == capture
+    assert stats.fail_lows > 0
+    assert pv_moves[0] is None
+    assert pv_moves[1:] and all(m == capture for m in pv_moves[1:])
+
+
+def test_iterative_deepening_stats():
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+
+    eval, _ = ms.iterative_deepening(g, 2, stats=stats)
+
+    assert eval == ms.search_root(g, 2)[0]
+    assert stats.aspiration_searches >= 2
+
+
+def test_quiescence_resolves_captures():
+    # White to move takes the queen, black then takes the rook back
+    g = GameState.from_fen("3rk3/8/8/8/3q4/8/8/3R3K w - - 0 1")
+
+    assert g.evaluate() == -9
+    assert ms.quiescence(g, True) == -5
+
+
+def test_quiescence_stands_pat():
+    g = GameState.from_fen("4k3/8/8/8/3p4/8/3R4/7K w - - 0 1")
+
+    # Rxd4 is the only capture and it wins a pawn
+    assert ms.quiescence(g, True) == 5
+    # Black to move would rather not capture anything
+    g = GameState.from_fen("4k3/8/8/8/3p4/8/3R4/7K b - - 0 1")
+    assert ms.quiescence(g, False) == g.evaluate()
+
+
+def test_futility_pruning_keeps_result(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ms, "RAZORING_DEPTH", 0)
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+
+    eval, _ = ms.iterative_deepening(g, 3, stats=stats)
+
+    assert stats.futility_pruned > 0
+
+    monkeypatch.setattr(ms, "FUTILITY_DEPTH", 0)
+    stats = SearchStats()
+
+    assert ms.iterative_deepening(g, 3, stats=stats)[0] == eval
+    assert stats.futility_pruned == 0
+
+
+def test_futility_pruning_keeps_checks():
+    # White is far behind but Re8 mates: a quiet check is not pruned
+    g = GameState.from_fen("6k1/5ppp/8/8/8/8/qqq5/4R1K1 w - - 0 1")
+    stats = SearchStats()
+
+    assert ms.min_max(g, 1, True, -20, ms.MAX_BOUND, stats) == 10_000
+    assert stats.futility_pruned > 0
+
+
+def test_razoring_stays_close(monkeypatch: pytest.MonkeyPatch):
+    # Razoring trusts a quiescence search, positional terms can move the
+    # score a little but not by a pawn
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+
+    eval, _ = ms.iterative_deepening(g, 3, stats=stats)
+
+    assert stats.razored > 0
+
+    monkeypatch.setattr(ms, "RAZORING_DEPTH", 0)
+    stats = SearchStats()
+
+    assert abs(ms.iterative_deepening(g, 3, stats=stats)[0] - eval) < 1
+    assert stats.razored == 0
+
+
+def test_order_moves_losing_captures_last():
+    # Qxd5 is defended by the pawn on c6, Kf1-e2 etc. are quiet
+    g = GameState.from_fen("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1")
+
+    scored = ms.score_moves(g)
+    losing = Move(Piece(WHITE_QUEEN, sq("d1")), sq("d5"))
+
+    assert scored[-1] == (ms.LOSING_CAPTURE_SCORE - 8, losing)
+    assert all(score == 0 for score, _ in scored[:-1])
+
+
+def test_search_stats():
+    g = GameState.from_fen(fen_tactic_4)
+
+    move, stats = ms.minmax_search(g, 3)
+
+    assert move == ms.minmax_selection(g, 3)
+    assert len(stats.nodes_per_depth) == 4
+    assert sum(stats.nodes_per_depth) == stats.total_nodes
+    assert stats.qnodes > stats.nodes > 0
+    assert 0 < stats.first_move_cutoffs <= stats.cutoffs
+    assert 0 < stats.tt_hits <= stats.tt_probes
+    assert stats.time > 0 and stats.nps > 0
+    assert stats.effective_branching_factor == (
+        stats.nodes_per_depth[3] / stats.nodes_per_depth[2]
+    )
+
+
+def test_search_stats_json():
+    _, stats = ms.minmax_search(GameState.from_fen(fen_tactic_4), 2)
+
+    exported = json.loads(stats.to_json())
+
+    assert exported["nodes"] == stats.nodes
+    assert exported["nodes_per_depth"] == stats.nodes_per_depth
+    assert exported["first_move_cutoff_rate"] == stats.first_move_cutoff_rate
+    assert exported["nps"] == stats.nps
+
+
+def test_principal_variation():
+    g = GameState.from_fen(fen_tactic_4)
+    tt = ms.TranspositionTable()
+    _, best_move = ms.iterative_deepening(g, 3, tt=tt)
+    pv = ms.principal_variation(g, best_move, tt)
+
+    assert pv[0] == best_move
+    assert 1 < len(pv) <= 4
+
+
+def test_iterative_deepening_movetime():
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+    ms.iterative_deepening(g, 10, stats=stats, movetime=0.01)
+
+    assert len(stats.nodes_per_depth) < 11
+
+
+def test_multipv_search_exact_lines():
+    g = GameState.from_fen(fen_tactic_4)
+    lines = ms.multipv_search(g, 2, 3)
+
+    assert len({(line.move.piece.index, line.move.to_idx) for line in lines}) == 3
+    assert [line.score for line in lines] == sorted(
+        (line.score for line in lines), reverse=True
+    )
+    excluded = []
+    for line in lines:
+        eval, _ = ms.search_root(g, 2, exclude=excluded)
+        assert line.score == eval
+        assert line.pv[0] == line.move
+        excluded.append(line.move)
+
+
+def test_multipv_search_first_line_is_best_move():
+    g = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1")
+    lines = ms.multipv_search(g, 2, 50)
+
+    assert len(lines) == len(ms.generate_move_list(g))
+    assert lines[0].move == Move(Piece(WHITE_QUEEN, sq("b1")), sq("b8"))
+    assert lines[0].score == 10_000
+
+
+def test_multipv_search_reuses_transposition_table():
+    g = GameState.from_fen(fen_tactic_4)
+    stats = SearchStats()
+    lines = ms.multipv_search(g, 3, 3, stats=stats)
+
+    independent = 0
+    excluded = []
+    for line in lines:
+        single = SearchStats()
+        tt = ms.TranspositionTable()
+        best = None
+        for depth in range(4):
+            _, best = ms.search_root(
+                g, depth, pv_move=best, stats=single, tt=tt, exclude=excluded
+            )
+        independent += single.total_nodes
+        excluded.append(line.move)
+
+    assert stats.total_nodes < independent
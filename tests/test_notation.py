@@ -0,0 +1,39 @@
+from game_state import GameState
+from move_selection import generate_move_list
+from notation import move_to_san, move_to_uci, san_to_move, uci_to_move
+import pytest
+
+fen_kiwipete = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+fen_promotion = "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"
+
+
+def test_san_and_uci_round_trip():
+    for fen in (fen_kiwipete, fen_promotion):
+        g = GameState.from_fen(fen)
+        for move in generate_move_list(g):
+            assert san_to_move(g, move_to_san(g, move)) == move
+            assert uci_to_move(g, move_to_uci(move)) == move
+
+
+@pytest.mark.parametrize(
+    "fen, san, uci",
+    [
+        (fen_kiwipete, "O-O", "e1g1"),
+        (fen_kiwipete, "0-0-0", "e1c1"),
+        (fen_kiwipete, "dxe6!", "d5e6"),
+        (fen_kiwipete, "Qxf6", "f3f6"),
+        (fen_promotion, "dxc8=Q+", "d7c8q"),
+        (fen_promotion, "dxc8N", "d7c8n"),
+    ],
+)
+def test_san_to_move_variants(fen: str, san: str, uci: str):
+    g = GameState.from_fen(fen)
+    assert move_to_uci(san_to_move(g, san)) == uci
+
+
+def test_san_to_move_illegal():
+    g = GameState.from_fen(fen_kiwipete)
+    with pytest.raises(ValueError):
+        san_to_move(g, "Ke3")
+    with pytest.raises(ValueError):
+        uci_to_move(g, "e1e3")
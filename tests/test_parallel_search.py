@@ -0,0 +1,113 @@
+import threading
+
+from benchmarks.parallel import format_results, measure_scaling
+from game_state import GameState
+from move_selection import generate_move_list, iterative_deepening
+import parallel_search as parallel_search_module
+from parallel_search import (
+    PROCESSES,
+    THREADS,
+    parallel_search,
+    search_root_moves,
+    split_root_moves,
+)
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+import pytest
+
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+MATE_IN_ONE = "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1"
+
+
+def test_split_root_moves():
+    g = GameState.from_fen(KIWIPETE)
+
+    groups = split_root_moves(g, 3)
+
+    assert len(groups) == 3
+    assert sorted(map(repr, sum(groups, []))) == sorted(
+        map(repr, generate_move_list(g))
+    )
+    # More workers than moves: no empty group
+    assert len(split_root_moves(GameState.from_fen("7k/8/8/8/8/8/8/K7 w - - 0 1"), 8))
+    assert all(split_root_moves(GameState.from_fen("7k/8/8/8/8/8/8/K7 w - - 0 1"), 8))
+
+
+def test_search_root_moves_only_searches_its_moves():
+    g = GameState.from_fen(KIWIPETE)
+    moves = generate_move_list(g)[:5]
+
+    iterations, stats = search_root_moves(g, 2, moves, TranspositionTable())
+
+    assert len(iterations) == 3
+    assert all(best_move in moves for _, best_move in iterations)
+    assert stats.total_nodes > 0
+
+
+@pytest.mark.parametrize("mode", [THREADS, PROCESSES])
+def test_parallel_search_finds_mate(mode: str):
+    g = GameState.from_fen(MATE_IN_ONE)
+    stats = SearchStats()
+
+    eval, move = parallel_search(g, 1, workers=2, mode=mode, stats=stats)
+
+    g.make_move(move.piece, move.to_idx, move.promotion)
+    assert g.checkmate
+    assert eval == 10_000
+    assert stats.total_nodes > 0
+    assert len(stats.nodes_per_depth) == 2
+
+
+def test_parallel_search_single_worker_matches_search():
+    g = GameState.from_fen(KIWIPETE)
+    serial = SearchStats()
+    parallel = SearchStats()
+
+    expected = iterative_deepening(g, 2, stats=serial, tt=TranspositionTable())
+    result = parallel_search(g, 2, workers=1, mode=THREADS, stats=parallel)
+
+    assert result == expected
+    assert parallel.total_nodes == serial.total_nodes
+
+
+def test_parallel_search_compares_groups_at_the_same_depth(monkeypatch):
+    g = GameState.from_fen(KIWIPETE)
+    first, second = split_root_moves(g, 2)
+
+    # The first group completed depth 1 with a better eval, the second was
+    # stopped after depth 0
+    def fake_search(game_state, depth, moves, *args):
+        if moves == first:
+            return [(0.0, first[0]), (5.0, first[0])], SearchStats()
+        return [(1.0, second[0])], SearchStats()
+
+    monkeypatch.setattr(parallel_search_module, "search_root_moves", fake_search)
+
+    assert parallel_search(g, 1, workers=2, mode=THREADS) == (1.0, second[0])
+
+
+def test_parallel_search_stop():
+    stop = threading.Event()
+    stop.set()
+
+    eval, move = parallel_search(
+        GameState.from_fen(KIWIPETE), 10, workers=2, mode=THREADS, stop=stop
+    )
+
+    assert move in generate_move_list(GameState.from_fen(KIWIPETE))
+
+    with pytest.raises(ValueError):
+        parallel_search(GameState.from_fen(KIWIPETE), 1, mode=PROCESSES, stop=stop)
+
+
+def test_measure_scaling():
+    results = measure_scaling([MATE_IN_ONE], depth=1, workers=(1, 2))
+
+    assert [(r.mode, r.workers) for r in results] == [
+        (THREADS, 1),
+        (THREADS, 2),
+        (PROCESSES, 1),
+        (PROCESSES, 2),
+    ]
+    assert results[0].speedup == 1.0
+    assert "processes" in format_results(results)
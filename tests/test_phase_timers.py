@@ -0,0 +1,47 @@
+import game_state
+import legal_moves
+import move_generation
+from game_state import GameState
+from move_selection import minmax_selection
+from phase_timers import PHASES, PhaseTimers
+
+
+def test_timers_count_calls():
+    g = GameState.from_fen("2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2")
+
+    with PhaseTimers() as timers:
+        minmax_selection(g, 2)
+
+    assert timers.calls["make_move"] > 0
+    # Every make_move generates the legal moves of the new position
+    assert timers.calls["generate_legal_moves"] == timers.calls["make_move"]
+    # Positions in check skip the squares controlled by the ennemy
+    assert 0 < timers.calls["generate_controlled_squares"] < timers.calls["make_move"]
+    for _, name in PHASES:
+        assert 0 <= timers.own[name] <= timers.total[name]
+    assert timers.own["make_move"] < timers.total["make_move"]
+    assert "make_move" in timers.report(1.0)
+
+
+def test_disabled_timers_restore_functions():
+    originals = [getattr(owner, name) for owner, name in PHASES]
+    imported = game_state.generate_legal_moves
+
+    timers = PhaseTimers()
+    timers.enable()
+
+    assert timers.enabled
+    assert GameState.make_move is not originals[3]
+    assert game_state.generate_legal_moves is not imported
+
+    timers.disable()
+
+    assert not timers.enabled
+    assert [getattr(owner, name) for owner, name in PHASES] == originals
+    assert game_state.generate_legal_moves is imported
+    assert legal_moves.generate_legal_moves is imported
+    assert move_generation.generate_controlled_squares is originals[2]
+
+    calls = dict(timers.calls)
+    GameState.starting_position().copy()
+    assert timers.calls == calls
@@ -0,0 +1,134 @@
+import os
+
+import chess_board as cb
+import position_store as ps
+from game_state import GameState
+from position_store import PositionStore
+from config import Move, Piece, WHITE_KNIGHT, BLACK_KNIGHT
+import pytest
+
+
+def sq(square: str) -> int:
+    """Quick helper for tests: sq('a1') return index 0"""
+    return cb.square_to_index(square)
+
+
+fen_fried_live = "r1bqkb1r/pppp1ppp/2n2n2/4p1N1/2B1P3/8/PPPP1PPP/RNBQK2R b KQkq - 0 1"
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+@pytest.fixture
+def store_path(tmp_path) -> str:
+    return str(tmp_path / "positions.bin")
+
+
+def test_put_and_get(store_path: str):
+    g = GameState.starting_position()
+    move = Move(Piece(WHITE_KNIGHT, sq("g1")), sq("f3"))
+
+    with PositionStore(store_path) as store:
+        assert g.lookup(store) is None
+        assert store.put(g, move, 0.25, 4)
+
+        stored = g.lookup(store)
+        assert stored is not None
+        assert stored.best_move == move
+        assert stored.score == 0.25
+        assert stored.depth == 4
+        assert GameState.from_bytes(stored.position).to_fen() == g.to_fen()
+        assert GameState.from_fen(fen_tactic_4) not in store
+        assert len(store) == 1
+
+
+def test_reopen(store_path: str):
+    g = GameState.from_fen(fen_fried_live)
+    move = Move(Piece(BLACK_KNIGHT, sq("f6")), sq("e4"))
+
+    with PositionStore(store_path) as store:
+        store.put(g, move, -1.15, 3)
+        store.put(GameState.from_fen(fen_tactic_4), None, 2, 1)
+
+    with PositionStore(store_path) as store:
+        assert len(store) == 2
+        assert g.lookup(store).score == -1.15
+        assert g.lookup(store).best_move == move
+        assert GameState.from_fen(fen_tactic_4).lookup(store).best_move is None
+
+    # The index is rebuilt from the data file if it is lost
+    os.remove(store_path + ".idx")
+    with PositionStore(store_path) as store:
+        assert len(store) == 2
+        assert g.lookup(store).depth == 3
+
+
+def test_stale_index_is_rebuilt(store_path: str):
+    g = GameState.from_fen(fen_fried_live)
+    other = GameState.from_fen(fen_tactic_4)
+
+    with PositionStore(store_path) as store:
+        store.put(g, None, -1, 3)
+    with open(store_path + ".idx", "rb") as f:
+        stale_index = f.read()
+
+    # Appended to while the old index is kept
+    with PositionStore(store_path) as store:
+        store.put(other, None, 2, 1)
+    with open(store_path + ".idx", "wb") as f:
+        f.write(stale_index)
+    with PositionStore(store_path) as store:
+        assert len(store) == 2
+        assert other.lookup(store).depth == 1
+
+    # Truncated, with a record cut short at the end
+    with open(store_path, "r+b") as f:
+        f.truncate(ps.DATA_HEADER.size + ps.RECORD_SIZE + 3)
+    with PositionStore(store_path) as store:
+        assert len(store) == 1
+        assert other not in store
+        assert g.lookup(store).depth == 3
+    assert os.path.getsize(store_path) == ps.DATA_HEADER.size + ps.RECORD_SIZE
+
+
+def test_deeper_record_wins(store_path: str):
+    g = GameState.starting_position()
+
+    with PositionStore(store_path) as store:
+        store.put(g, None, 0.5, 5)
+        assert not store.put(g, None, 0.1, 2)
+        assert store.put(g, None, 0.3, 6)
+
+        assert g.lookup(store).score == 0.3
+        assert len(store) == 1
+
+
+def test_index_growth_and_compaction(store_path: str):
+    games = [GameState.starting_position()]
+    for m in ["e2e4", "e7e5", "g1f3", "b8c6", "f1c4", "g8f6", "d2d3"]:
+        g = games[-1].copy()
+        g.make_move(Piece(g.board[sq(m[:2])], sq(m[:2])), sq(m[2:]))
+        games.append(g)
+
+    with PositionStore(store_path, index_capacity=4) as store:
+        for depth in (1, 2):
+            for g in games:
+                store.put(g, None, depth, depth)
+
+        assert len(store) == len(games)
+        size = os.path.getsize(store_path)
+
+        store.compact()
+
+        assert os.path.getsize(store_path) < size
+        assert len(store) == len(games)
+        assert all(g.lookup(store).depth == 2 for g in games)
+
+
+def test_invalid_file(store_path: str):
+    with open(store_path, "wb") as f:
+        f.write(b"not a store")
+
+    with pytest.raises(ValueError):
+        PositionStore(store_path)
+
+    with pytest.raises(ValueError):
+        PositionStore(store_path + "2", index_capacity=3)
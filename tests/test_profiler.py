@@ -0,0 +1,32 @@
+from benchmarks.profiler import SamplingProfiler, sample_engine
+
+
+def busy(n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+def test_sampling_profiler_records_stacks():
+    with SamplingProfiler(interval=0.001) as profiler:
+        busy(2_000_000)
+
+    assert sum(profiler.samples.values()) > 0
+    assert any("busy (test_profiler.py" in stack[-1] for stack in profiler.samples)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in profiler.collapsed())
+
+
+def test_speedscope_output():
+    profiler = sample_engine(
+        ["2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"], 2, 0.001
+    )
+
+    profile = profiler.speedscope()
+    frames = profile["shared"]["frames"]
+    sampled = profile["profiles"][0]
+
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"]) > 0
+    assert all(0 <= i < len(frames) for s in sampled["samples"] for i in s)
+    assert any(f["name"].startswith("minmax_selection") for f in frames)
@@ -0,0 +1,82 @@
+from benchmarks.regression import (
+    CORPUS,
+    Metric,
+    compare,
+    load_baseline,
+    perft,
+    save_baseline,
+)
+from game_state import GameState
+import pytest
+
+
+@pytest.mark.parametrize("depth, nodes", [(0, 1), (1, 20), (2, 400), (3, 8902)])
+def test_perft_start(depth: int, nodes: int):
+    assert perft(GameState.starting_position(), depth) == nodes
+
+
+def test_perft_kiwipete():
+    assert perft(GameState.from_fen(CORPUS["kiwipete"]), 2) == 2039
+
+
+@pytest.mark.parametrize(
+    "fen, depth, nodes",
+    [
+        # En passant uncovering a rook on the king
+        ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 3, 2812),
+        # Pinned queens and promotions
+        ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3, 9467),
+        # Pinned pawn that may not push
+        ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 2, 1486),
+    ],
+)
+def test_perft_tricky_positions(fen: str, depth: int, nodes: int):
+    assert perft(GameState.from_fen(fen), depth) == nodes
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "pos": {
+            "search_time": Metric(1.0, 0.01, False),
+            "perft_nps": Metric(1000, 0.01, True),
+            "search_nodes": Metric(500, 0.0, False),
+        }
+    }
+    # Within the noise threshold, faster, and exactly the same node count
+    current = {
+        "pos": {
+            "search_time": Metric(1.05, 0.02, False),
+            "perft_nps": Metric(2000, 0.01, True),
+            "search_nodes": Metric(500, 0.0, False),
+        }
+    }
+    assert compare(baseline, current) == []
+
+    current = {
+        "pos": {
+            "search_time": Metric(1.5, 0.02, False),
+            "perft_nps": Metric(500, 0.01, True),
+            "search_nodes": Metric(501, 0.0, False),
+        }
+    }
+    regressions = compare(baseline, current)
+    assert [r.split(":")[0] for r in regressions] == [
+        "pos search_time",
+        "pos perft_nps",
+        "pos search_nodes",
+    ]
+
+
+def test_noisy_metric_tolerance():
+    baseline = {"pos": {"search_time": Metric(1.0, 0.2, False)}}
+
+    assert compare(baseline, {"pos": {"search_time": Metric(1.3, 0.2, False)}}) == []
+
+
+def test_baseline_round_trip(tmp_path):
+    results = {"pos": {"search_time": Metric(1.0, 0.01, False)}}
+    path = str(tmp_path / "baseline.json")
+
+    save_baseline(results, path)
+
+    assert load_baseline(path) == results
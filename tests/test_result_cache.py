@@ -0,0 +1,175 @@
+import sqlite3
+
+from game_state import GameState
+from move_selection import generate_move_list
+from notation import move_to_uci
+import result_cache as rc
+from result_cache import AnalysisResult, ResultCache, cached_search, normalize_fen
+import pytest
+
+fen_mate_in_one = "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1"
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+@pytest.fixture
+def cache_path(tmp_path) -> str:
+    return str(tmp_path / "results.sqlite")
+
+
+def result(depth: int, best_move: str = "e2e4") -> AnalysisResult:
+    return AnalysisResult(best_move, 0.5, depth, [best_move, "e7e5"], 100 * depth)
+
+
+def king_position(file: int) -> GameState:
+    """Positions differing by the file of the white king"""
+    rank = (str(file) if file else "") + "K" + (str(7 - file) if file < 7 else "")
+    return GameState.from_fen(f"7k/8/8/8/8/8/8/{rank} w - - 0 1")
+
+
+def test_normalize_fen_ignores_move_counters():
+    a = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 0 1")
+    b = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 12 40")
+
+    assert normalize_fen(a) == normalize_fen(b) == "7k/8/6K1/8/8/8/8/1Q6 w - -"
+
+
+def test_normalize_fen_keeps_clock_near_50_move_draw():
+    far = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 12 40")
+    near = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 99 90")
+    nearer = GameState.from_fen("7k/8/6K1/8/8/8/8/1Q6 w - - 98 89")
+
+    assert normalize_fen(near) == "7k/8/6K1/8/8/8/8/1Q6 w - - 99"
+    assert len({normalize_fen(g) for g in (far, near, nearer)}) == 3
+
+
+def test_put_and_get(cache_path: str):
+    g = GameState.starting_position()
+    with ResultCache(cache_path) as cache:
+        assert cache.get(g, 1) is None
+        cache.put(g, result(3))
+
+        assert cache.get(g, 3) == result(3)
+        assert cache.get(g, 2) == result(3)
+        assert cache.get(g, 4) is None
+
+    with ResultCache(cache_path) as cache:
+        assert cache.get(g, 3) == result(3)
+        assert cache._db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_keeps_deepest_result(cache_path: str):
+    g = GameState.starting_position()
+    with ResultCache(cache_path) as cache:
+        cache.put(g, result(4, "d2d4"))
+        cache.put(g, result(2, "e2e4"))
+        assert cache.get(g, 1) == result(4, "d2d4")
+
+        cache.put(g, result(5, "g1f3"))
+        assert cache.get(g, 1) == result(5, "g1f3")
+        assert len(cache) == 1
+
+
+def test_put_many_prunes_least_recently_used(
+    cache_path: str, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(rc, "TOUCH_INTERVAL", 0)
+    positions = [king_position(file) for file in range(8)]
+    with ResultCache(cache_path, max_entries=10) as cache:
+        cache.put_many((g, result(1)) for g in positions[:6])
+        # Touch the oldest one, the next ones become the least recently used
+        assert cache.get(positions[0], 1) is not None
+        cache.put_many((g, result(1)) for g in positions[6:])
+        assert len(cache) == 8
+
+        cache.max_entries = 5
+        assert cache.prune() == 4
+        assert len(cache) == 4
+        for g in (positions[0], positions[6], positions[7]):
+            assert cache.get(g, 1) is not None
+
+
+def test_get_touches_only_stale_results(cache_path: str):
+    g = GameState.starting_position()
+    with ResultCache(cache_path) as cache:
+        cache.put(g, result(1))
+        last_used = "SELECT last_used FROM results"
+        stored = cache._db.execute(last_used).fetchone()[0]
+
+        cache.get(g, 1)
+        assert cache._db.execute(last_used).fetchone()[0] == stored
+
+        with cache._db:
+            cache._db.execute("UPDATE results SET last_used = ?", (stored - 3600,))
+        cache.get(g, 1)
+        assert cache._db.execute(last_used).fetchone()[0] >= stored
+
+
+def test_put_prunes_periodically(cache_path: str, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rc, "PRUNE_INTERVAL", 2)
+    with ResultCache(cache_path, max_entries=1) as cache:
+        for i in range(4):
+            cache.put(king_position(i), result(1))
+        assert len(cache) <= 2
+
+
+def test_rejects_other_schema(cache_path: str):
+    db = sqlite3.connect(cache_path)
+    db.execute("PRAGMA user_version = 99")
+    db.close()
+
+    with pytest.raises(ValueError):
+        ResultCache(cache_path)
+
+
+def test_cached_search(cache_path: str):
+    g = GameState.from_fen(fen_tactic_4)
+    with ResultCache(cache_path) as cache:
+        searched, cached = cached_search(cache, g, 2)
+        assert not cached
+        assert searched.depth == 2
+        assert searched.pv[0] == searched.best_move
+
+        again, cached = cached_search(cache, g, 1)
+        assert cached
+        assert again == searched
+
+
+def test_cached_search_stores_completed_iteration(
+    cache_path: str, monkeypatch: pytest.MonkeyPatch
+):
+    g = GameState.from_fen(fen_tactic_4)
+    completed, partial = generate_move_list(g)[:2]
+
+    # Depth 0 completed, depth 1 stopped with another best move
+    def stopped_search(game_state, depth, on_iteration, **kwargs):
+        on_iteration(0, 0.5, completed)
+        return 3.0, partial
+
+    monkeypatch.setattr(rc, "iterative_deepening", stopped_search)
+    assert rc.search(g, 1).best_move == move_to_uci(partial)
+
+    with ResultCache(cache_path) as cache:
+        searched, _ = cached_search(cache, g, 1)
+
+        assert (searched.best_move, searched.score, searched.depth) == (
+            move_to_uci(completed),
+            0.5,
+            0,
+        )
+        assert cache.get(g, 0) == searched
+
+
+def test_server_worker_uses_cache(cache_path: str):
+    import analysis_server
+
+    analysis_server.init_worker(1 << 10, cache_path=cache_path)
+    try:
+        first = analysis_server.analyze_position(fen_mate_in_one, 2, None)
+        second = analysis_server.analyze_position(fen_mate_in_one, 1, None)
+    finally:
+        analysis_server.init_worker(1 << 10)
+
+    assert not first["cached"]
+    assert second["cached"]
+    assert second["bestmove"] == first["bestmove"] == "b1b8"
+    assert second["san"] == "Qb8#"
@@ -0,0 +1,103 @@
+import threading
+
+from game_state import GameState
+import move_selection as ms
+from move_selection import iterative_deepening, minmax_search, search_root
+from search_limits import POLL_INTERVAL, SearchAborted, SearchLimits
+from search_stats import SearchStats
+from transposition_table import TranspositionTable
+import pytest
+
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+def test_check_polls_every_interval():
+    stop = threading.Event()
+    limits = SearchLimits(stop=stop, poll_interval=4)
+    stop.set()
+    for _ in range(3):
+        limits.check()
+    with pytest.raises(SearchAborted):
+        limits.check()
+
+
+def test_deadline_aborts_search():
+    limits = SearchLimits(deadline=0.0, poll_interval=1)
+    with pytest.raises(SearchAborted):
+        search_root(GameState.from_fen(fen_tactic_4), 2, limits=limits)
+
+
+def test_stopped_search_returns_last_iteration():
+    g = GameState.from_fen(fen_tactic_4)
+    stop = threading.Event()
+    stop.set()
+    stats = SearchStats()
+
+    eval, move = iterative_deepening(
+        g, 5, stats=stats, limits=SearchLimits(stop=stop, poll_interval=1)
+    )
+
+    # Only the depth 0 iteration, which ignores the limits, completed
+    assert len(stats.nodes_per_depth) == 1
+    assert (eval, move) == search_root(g, 0)
+
+
+def test_node_budget():
+    limits = SearchLimits(max_nodes=3)
+    for _ in range(3):
+        limits.check()
+    with pytest.raises(SearchAborted):
+        limits.check()
+
+
+def test_node_limited_search_is_deterministic():
+    g = GameState.from_fen(fen_tactic_4)
+    runs = [minmax_search(g, 10, max_nodes=3000) for _ in range(2)]
+
+    (move_a, stats_a), (move_b, stats_b) = runs
+    assert move_a == move_b
+    timings = {"time": 0, "nps": 0}
+    assert stats_a.to_dict() | timings == stats_b.to_dict() | timings
+    assert stats_a.total_nodes - stats_a.nodes_per_depth[0] <= 3001
+
+
+def test_node_limited_search_keeps_exact_partial_iteration():
+    g = GameState.from_fen(fen_tactic_4)
+    complete = SearchStats()
+    iterative_deepening(g, 2, stats=complete, tt=TranspositionTable())
+    budget = complete.total_nodes - complete.nodes_per_depth[0]
+
+    # A budget ending inside depth 3 still returns a move
+    stats = SearchStats()
+    limits = SearchLimits(max_nodes=budget + 50)
+    eval, move = iterative_deepening(
+        g, 3, stats=stats, tt=TranspositionTable(), limits=limits
+    )
+    assert len(stats.nodes_per_depth) == 3
+    assert move in ms.generate_move_list(g)
+
+
+def test_minmax_selection_stop_token():
+    stop = threading.Event()
+    stop.set()
+    g = GameState.from_fen(fen_tactic_4)
+
+    move, stats = minmax_search(g, 10, stop=stop)
+
+    # The flag is polled every POLL_INTERVAL nodes
+    assert stats.total_nodes - stats.nodes_per_depth[0] <= POLL_INTERVAL
+    assert move in ms.generate_move_list(g)
+
+
+def test_aborted_root_search_attaches_exact_partial():
+    g = GameState.from_fen(fen_tactic_4)
+    # Stopped in the first root move: nothing to keep
+    with pytest.raises(SearchAborted) as aborted:
+        search_root(g, 3, limits=SearchLimits(max_nodes=100))
+    assert aborted.value.partial is None
+
+    with pytest.raises(SearchAborted) as aborted:
+        search_root(g, 3, limits=SearchLimits(max_nodes=600))
+    assert aborted.value.partial is not None
+    eval, move = aborted.value.partial
+    assert -5000 < eval < 5000
@@ -0,0 +1,137 @@
+import math
+
+from benchmarks.selfplay import (
+    Engine,
+    EngineConfig,
+    GameResult,
+    MatchScore,
+    parse_engine,
+    play_game,
+    run_match,
+    sprt_decision,
+    to_pgn,
+)
+from game_state import GameState
+import move_selection as ms
+from search_stats import SearchStats
+import pytest
+
+fen_mate_in_one = "7k/8/6K1/8/8/8/8/1Q6 w - - 0 1"
+
+
+def test_play_game_checkmate():
+    game = play_game(fen_mate_in_one, EngineConfig("a", 1), EngineConfig("b", 1))
+
+    assert game.result == "1-0"
+    assert game.termination == "checkmate"
+    assert game.moves == ["Qb8#"]
+
+
+def test_play_game_max_plies():
+    start = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    game = play_game(start, EngineConfig("a", 1), EngineConfig("b", 1), max_plies=4)
+
+    assert game.result == "1/2-1/2"
+    assert game.termination == "max plies"
+    assert len(game.moves) == 4
+
+
+def test_overrides_are_restored():
+    margin = ms.FUTILITY_MARGIN
+    config = EngineConfig("a", 1, overrides={"move_selection.FUTILITY_MARGIN": 7})
+    play_game(fen_mate_in_one, config, config)
+
+    assert ms.FUTILITY_MARGIN == margin
+
+
+def test_lmr_overrides_rebuild_reduction_table():
+    fen = "r1bqkb1r/pppp1ppp/2n2n2/4p1N1/2B1P3/8/PPPP1PPP/RNBQK2R b KQkq - 0 1"
+    table = ms.REDUCTION_TABLE
+
+    def search_nodes(overrides: dict[str, float]) -> int:
+        engine = Engine(EngineConfig("a", overrides=overrides))
+        previous = engine._swap_overrides()
+        try:
+            stats = SearchStats()
+            ms.iterative_deepening(GameState.from_fen(fen), 3, stats=stats)
+        finally:
+            engine._restore_overrides(previous)
+        return stats.total_nodes
+
+    default = search_nodes({})
+    # No reduction at all
+    unreduced = search_nodes({"move_selection.LMR_BASE": -10})
+
+    assert unreduced > default
+    assert ms.REDUCTION_TABLE is table
+
+
+def test_to_pgn():
+    game = GameResult(
+        "rnbqkbnr/pppp1ppp/4p3/8/3PP3/8/PPP2PPP/RNBQKBNR b KQkq - 0 2",
+        "a",
+        "b",
+        "0-1",
+        "checkmate",
+        ["d5", "exd5", "exd5"],
+        1.0,
+    )
+
+    pgn = to_pgn(game, 3)
+
+    assert '[Round "3"]' in pgn
+    assert '[Result "0-1"]' in pgn
+    assert pgn.endswith("2... d5 3. exd5 exd5 0-1\n")
+
+
+def test_match_score():
+    score = MatchScore(wins=30, draws=40, losses=30)
+    elo, margin = score.elo()
+
+    assert score.score == 0.5
+    assert elo == 0
+    assert 0 < margin < 100
+    assert score.llr(0, 10) < 0 < score.llr(-10, 0)
+
+    assert MatchScore(wins=10).elo()[0] == math.inf
+
+
+def test_sprt_decision():
+    assert sprt_decision(MatchScore(wins=5, draws=5, losses=5)) is None
+    assert sprt_decision(MatchScore(wins=400, draws=200, losses=100)) == "H1"
+    assert sprt_decision(MatchScore(wins=100, draws=200, losses=400)) == "H0"
+
+
+def test_run_match(tmp_path):
+    pgn_path = tmp_path / "games.pgn"
+
+    result = run_match(
+        EngineConfig("a", 1),
+        EngineConfig("b", 1),
+        openings=[fen_mate_in_one],
+        workers=2,
+        pgn_path=str(pgn_path),
+    )
+
+    # Whoever plays white mates at once
+    assert (result.score.wins, result.score.losses) == (1, 1)
+    assert pgn_path.read_text().count("[Event") == 2
+    assert result.games_per_hour > 0
+
+    with pytest.raises(ValueError):
+        run_match(EngineConfig("a"), EngineConfig("a"), openings=[])
+
+
+def test_parse_engine_node_budget():
+    config = parse_engine("a:8:2000n")
+    assert (config.depth, config.nodes, config.movetime) == (8, 2000, None)
+    assert parse_engine("b:3:0.5").movetime == 0.5
+
+
+def test_node_limited_games_are_reproducible():
+    start = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+    games = [
+        play_game(start, parse_engine("a:8:300n"), parse_engine("b:8:300n"), 6)
+        for _ in range(2)
+    ]
+    assert games[0].moves == games[1].moves
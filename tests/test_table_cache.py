@@ -0,0 +1,95 @@
+import marshal
+import subprocess
+import sys
+
+from benchmarks.startup import ROOT, format_results, measure_startup
+from move_selection import (
+    LMR_MAX_DEPTH,
+    LMR_MAX_MOVES,
+    REDUCTION_TABLE,
+    build_reduction_table,
+)
+import table_cache
+from table_cache import TABLE_CACHE_ENV, cached_table, read_tables
+import pytest
+import zobrist
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch: pytest.MonkeyPatch) -> str:
+    path = str(tmp_path / "tables.marshal")
+    monkeypatch.setenv(TABLE_CACHE_ENV, path)
+    monkeypatch.setattr(table_cache, "_tables", None)
+    return path
+
+
+def test_cached_table_is_built_once(cache_path: str, monkeypatch):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {1: [2, 3], -1: [4]}
+
+    assert cached_table("t", (1, 0.5), build) == {1: [2, 3], -1: [4]}
+    # A new process reads the file
+    monkeypatch.setattr(table_cache, "_tables", None)
+    assert cached_table("t", (1, 0.5), build) == {1: [2, 3], -1: [4]}
+    assert len(builds) == 1
+    assert read_tables(cache_path)["t"] == ((1, 0.5), {1: [2, 3], -1: [4]})
+
+
+def test_cached_table_rebuilds_on_new_params(cache_path: str):
+    cached_table("t", 1, lambda: [1])
+
+    assert cached_table("t", 2, lambda: [2]) == [2]
+    assert read_tables(cache_path)["t"] == (2, [2])
+
+
+def test_stale_or_corrupt_file_is_ignored(cache_path: str):
+    with open(cache_path, "wb") as f:
+        f.write(marshal.dumps(((0, 0, (2, 7)), {"t": (1, [0])})))
+    assert read_tables(cache_path) == {}
+
+    with open(cache_path, "wb") as f:
+        f.write(b"not marshal")
+    assert read_tables(cache_path) == {}
+    assert cached_table("t", 1, lambda: [1]) == [1]
+
+
+def test_disabled_cache(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv(TABLE_CACHE_ENV, "")
+    monkeypatch.setattr(table_cache, "_tables", None)
+
+    assert cached_table("t", 1, lambda: [1]) == [1]
+    assert table_cache._tables is None
+
+
+def test_cached_tables_match_generated():
+    assert (
+        zobrist.PIECE_KEYS,
+        zobrist.CASTLING_KEYS,
+        zobrist.EN_PASSANT_KEYS,
+        zobrist.SIDE_KEY,
+    ) == zobrist.build_keys(zobrist.ZOBRIST_SEED)
+    assert REDUCTION_TABLE == build_reduction_table(LMR_MAX_DEPTH, LMR_MAX_MOVES)
+
+
+def test_engine_does_not_import_profiler():
+    code = (
+        "import sys, game_state, move_selection, main;"
+        "print('cProfile' in sys.modules or 'benchmarks.profiler' in sys.modules)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    ).stdout
+
+    assert output.strip() == "False"
+
+
+def test_measure_startup():
+    results = measure_startup(runs=1, depth=0)
+
+    assert list(results) == ["cold", "warm", "disabled"]
+    assert not any(r["profiler_imported"] for r in results.values())
+    assert all(r["total"] > r["imports"] > 0 for r in results.values())
+    assert "warm" in format_results(results)
@@ -0,0 +1,71 @@
+from config import Move, Piece, WHITE
+from game_state import GameState
+import move_selection as ms
+from transposition_table import (
+    EXACT,
+    LOWER_BOUND,
+    UPPER_BOUND,
+    TranspositionTable,
+    bound_flag,
+)
+import pytest
+
+fen_tactic_4 = "2r2kr1/R4p1p/4p3/1pqnPp2/5P2/Q7/P3N1PP/1R5K w - - 1 2"
+
+
+def test_get_put():
+    tt = TranspositionTable(size=16)
+    move = Move(Piece(1, 8), 16)
+
+    assert tt.get(42) is None
+    tt.put(42, 3, 1.5, EXACT, move)
+
+    entry = tt.get(42)
+    assert entry is not None
+    assert (entry.depth, entry.score, entry.flag, entry.best_move) == (
+        3,
+        1.5,
+        EXACT,
+        move,
+    )
+    # Same slot, different position
+    assert tt.get(42 + 16) is None
+    assert len(tt) == 1
+
+
+def test_deeper_entry_is_kept():
+    tt = TranspositionTable(size=16)
+    tt.put(1, 4, 1.0, EXACT, None)
+    tt.put(1, 2, 2.0, EXACT, None)
+
+    assert tt.get(1).score == 1.0  # pyright: ignore[reportOptionalMemberAccess]
+
+    # Another position in the slot always replaces it
+    tt.put(17, 1, 3.0, EXACT, None)
+    assert tt.get(1) is None
+
+    tt.clear()
+    assert len(tt) == 0
+
+
+def test_bound_flag():
+    assert bound_flag(0, 1, 2) == UPPER_BOUND
+    assert bound_flag(3, 1, 2) == LOWER_BOUND
+    assert bound_flag(1.5, 1, 2) == EXACT
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        TranspositionTable(size=12)
+
+
+def test_search_with_table_keeps_score():
+    g = GameState.from_fen(fen_tactic_4)
+    maximazing = g.active_color == WHITE
+    tt = TranspositionTable()
+
+    eval = ms.min_max(g, 3, maximazing, tt=tt)
+
+    assert len(tt) > 0
+    assert ms.min_max(g, 3, maximazing, tt=tt) == eval
+    assert ms.min_max(g, 3, maximazing) == eval
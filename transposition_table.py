@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+from config import Move
+
+DEFAULT_TT_SIZE = 1 << 16
+
+# Meaning of a stored score, the search being fail-soft:
+#   - EXACT: the score was inside the (alpha, beta) window
+#   - LOWER_BOUND: the score was >= beta, the true score may be higher
+#   - UPPER_BOUND: the score was <= alpha, the true score may be lower
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+@dataclass
+class TTEntry:
+    key: int
+    depth: int
+    score: float
+    flag: int
+    best_move: Move | None
+
+
+def bound_flag(score: float, alpha: float, beta: float) -> int:
+    """Flag of a score returned by a search called with (alpha, beta)"""
+    if score <= alpha:
+        return UPPER_BOUND
+    if score >= beta:
+        return LOWER_BOUND
+    return EXACT
+
+
+class TranspositionTable:
+    """
+    Fixed size table of search results keyed by zobrist key.
+
+    Direct mapped: the slot is picked by the low bits of the key and stores
+    the full key to verify a hit. A new result replaces the slot unless the
+    slot holds a deeper search of the same position.
+    """
+
+    def __init__(self, size: int = DEFAULT_TT_SIZE):
+        if size < 1 or size & (size - 1):
+            raise ValueError("Transposition table size must be a power of two")
+        self.size: int = size
+        self._mask: int = size - 1
+        self._entries: list[TTEntry | None] = [None] * size
+
+    def __len__(self) -> int:
+        return self.size - self._entries.count(None)
+
+    def get(self, key: int) -> TTEntry | None:
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def put(
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        flag: int,
+        best_move: Move | None,
+    ) -> None:
+        slot = key & self._mask
+        entry = self._entries[slot]
+        if entry is not None and entry.key == key and entry.depth > depth:
+            return
+        self._entries[slot] = TTEntry(key, depth, score, flag, best_move)
+
+    def clear(self) -> None:
+        self._entries = [None] * self.size
@@ -0,0 +1,73 @@
+from config import PAWN, WHITE, CastlingState
+from table_cache import cached_table
+
+# Fixed seed: keys have to be the same in every process, position stores and
+# caches on disk depend on it.
+ZOBRIST_SEED = 0x5EED_C4E55
+
+
+def build_keys(
+    seed: int,
+) -> tuple[dict[int, list[int]], list[int], list[int], int]:
+    """Piece, castling, en passant and side keys drawn from `seed`"""
+    import random
+
+    rng = random.Random(seed)
+    piece_keys = {
+        piece: [rng.getrandbits(64) for _ in range(64)]
+        for piece in (1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6)
+    }
+    castling_keys = [rng.getrandbits(64) for _ in range(16)]
+    en_passant_keys = [rng.getrandbits(64) for _ in range(8)]
+    return piece_keys, castling_keys, en_passant_keys, rng.getrandbits(64)
+
+
+PIECE_KEYS: dict[int, list[int]]
+# Indexed by `CastlingState.to_bits()`
+CASTLING_KEYS: list[int]
+# Indexed by the file of the en passant target
+EN_PASSANT_KEYS: list[int]
+# XORed in when white is to move
+SIDE_KEY: int
+PIECE_KEYS, CASTLING_KEYS, EN_PASSANT_KEYS, SIDE_KEY = cached_table(
+    "zobrist", ZOBRIST_SEED, lambda: build_keys(ZOBRIST_SEED)
+)
+
+
+def en_passant_key(en_passant_target: int | None) -> int:
+    return 0 if en_passant_target is None else EN_PASSANT_KEYS[en_passant_target % 8]
+
+
+def compute_hash(
+    board: list[int],
+    active_color: int,
+    castling_state: CastlingState,
+    en_passant_target: int | None = None,
+) -> int:
+    """
+    Zobrist key of a position, computed from scratch.
+
+    `GameState` keeps its key up to date incrementally in `make_move`,
+    this is used to initialize it.
+    """
+    key: int = 0
+    for square_idx, piece in enumerate(board):
+        if piece:
+            key ^= PIECE_KEYS[piece][square_idx]
+    key ^= CASTLING_KEYS[castling_state.to_bits()]
+    key ^= en_passant_key(en_passant_target)
+    if active_color == WHITE:
+        key ^= SIDE_KEY
+    return key
+
+
+def compute_pawn_hash(board: list[int]) -> int:
+    """
+    Zobrist key of the pawns only, used to index the pawn hash table.
+    Kept up to date incrementally by `GameState` like the main key.
+    """
+    key: int = 0
+    for square_idx, piece in enumerate(board):
+        if piece == PAWN or piece == -PAWN:
+            key ^= PIECE_KEYS[piece][square_idx]
+    return key